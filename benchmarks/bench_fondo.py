@@ -0,0 +1,151 @@
+"""
+Benchmark: detección/reemplazo de fondo sólido (NumPy) vs la versión escalar original.
+
+Uso:
+    python benchmarks/bench_fondo.py                 # corpus sintético
+    python benchmarks/bench_fondo.py carpeta_logos/  # corpus de logos reales
+
+Verifica además que la salida sea bit a bit idéntica a la versión escalar.
+"""
+import math
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PIL import Image, ImageFilter, ImageOps, ImageDraw
+
+from gestionDeImagenes.gestionImagen import (
+    is_solid_background, _replace_solid_bg_with_white, BG_DETECTION_TOLERANCE,
+    BG_REQUIRED_RATIO, AA_BLUR_ALPHA
+)
+
+
+# ================= REFERENCIA (versión escalar original) =================
+
+def ref_is_solid_background(img, sample_pixels=200, tolerance=BG_DETECTION_TOLERANCE, required_ratio=BG_REQUIRED_RATIO):
+    img_conv = img.convert("RGBA")
+    w, h = img_conv.size
+    pixels = img_conv.load()
+    samples = []
+    step_x = max(1, w // 20)
+    step_y = max(1, h // 20)
+    for x in range(0, w, step_x):
+        samples.append(pixels[x, 0])
+        samples.append(pixels[x, h - 1])
+    for y in range(0, h, step_y):
+        samples.append(pixels[0, y])
+        samples.append(pixels[w - 1, y])
+    if len(samples) > sample_pixels:
+        samples = samples[:sample_pixels]
+    opaque_samples = [s for s in samples if s[3] > 10]
+    if not opaque_samples:
+        return False, None
+
+    def rgb_no_alpha(c):
+        return (c[0], c[1], c[2])
+
+    try:
+        rep = max(set([rgb_no_alpha(s) for s in opaque_samples]),
+                  key=lambda x: sum(1 for s in opaque_samples if rgb_no_alpha(s) == x))
+    except ValueError:
+        return False, None
+
+    def color_dist(a, b):
+        return math.sqrt(sum((a[i] - b[i]) ** 2 for i in range(3)))
+
+    within = sum(1 for s in opaque_samples if color_dist(rgb_no_alpha(s), rep) <= tolerance)
+    ratio = within / max(1, len(opaque_samples))
+    return (ratio >= required_ratio), rep if (ratio >= required_ratio) else None
+
+
+def ref_replace_solid_bg_with_white(img, bg_color, tolerance=BG_DETECTION_TOLERANCE, aa_blur=AA_BLUR_ALPHA):
+    img = img.convert("RGBA")
+    w, h = img.size
+    px = img.load()
+    mask = Image.new("L", (w, h), 255)
+    mask_px = mask.load()
+
+    def color_dist(a, b):
+        return math.sqrt(sum((a[i] - b[i]) ** 2 for i in range(3)))
+
+    for y in range(h):
+        for x in range(w):
+            r, g, b, a = px[x, y]
+            if a < 12:
+                mask_px[x, y] = 0
+            else:
+                mask_px[x, y] = 255 if color_dist((r, g, b), bg_color) <= tolerance else 0
+
+    mask = mask.filter(ImageFilter.GaussianBlur(radius=aa_blur))
+    inv_mask = ImageOps.invert(mask)
+    white_bg = Image.new("RGBA", (w, h), (255, 255, 255, 255))
+    return Image.composite(img, white_bg, inv_mask)
+
+
+# ================= CORPUS =================
+
+def corpus_sintetico(n=12, seed=7):
+    """Logos de prueba: fondos sólidos con ruido, transparencias y empates de color en el borde."""
+    rnd = random.Random(seed)
+    imgs = []
+    for i in range(n):
+        w, h = rnd.choice([(200, 200), (500, 500), (800, 450), (1200, 1200)])
+        bg = tuple(rnd.randrange(256) for _ in range(3))
+        img = Image.new("RGBA", (w, h), bg + (255,))
+        draw = ImageDraw.Draw(img)
+        for _ in range(6):
+            x0, y0 = rnd.randrange(w), rnd.randrange(h)
+            draw.ellipse([x0, y0, x0 + w // 4, y0 + h // 4],
+                         fill=tuple(rnd.randrange(256) for _ in range(3)) + (rnd.choice([0, 128, 255]),))
+        # Ruido cerca del color de fondo (pone a prueba la tolerancia)
+        px = img.load()
+        for _ in range(w * h // 50):
+            x, y = rnd.randrange(w), rnd.randrange(h)
+            px[x, y] = tuple(max(0, min(255, c + rnd.randint(-12, 12))) for c in bg) + (255,)
+        if i % 4 == 3:  # bordes mitad y mitad -> empate en el color más común
+            draw.rectangle([0, 0, w // 2, h], fill=(10, 10, 10, 255))
+            draw.rectangle([w // 2, 0, w, h], fill=(240, 240, 240, 255))
+        imgs.append((f"sintetico_{i}_{w}x{h}", img))
+    return imgs
+
+
+def corpus_carpeta(carpeta):
+    imgs = []
+    for nombre in sorted(os.listdir(carpeta)):
+        try:
+            imgs.append((nombre, Image.open(os.path.join(carpeta, nombre)).convert("RGBA")))
+        except Exception:
+            pass
+    return imgs
+
+
+def _medir(fn, *args):
+    t0 = time.perf_counter()
+    res = fn(*args)
+    return res, time.perf_counter() - t0
+
+
+def main():
+    corpus = corpus_carpeta(sys.argv[1]) if len(sys.argv) > 1 else corpus_sintetico()
+    t_ref = t_new = 0.0
+    distintos = 0
+    for nombre, img in corpus:
+        det_ref, dt = _medir(ref_is_solid_background, img); t_ref += dt
+        det_new, dt = _medir(is_solid_background, img); t_new += dt
+        color = det_ref[1] or img.convert("RGB").getpixel((0, 0))
+        out_ref, dt = _medir(ref_replace_solid_bg_with_white, img, color); t_ref += dt
+        out_new, dt = _medir(_replace_solid_bg_with_white, img, color); t_new += dt
+        igual = det_ref == det_new and out_ref.tobytes() == out_new.tobytes()
+        distintos += not igual
+        print(f"{nombre:<32} {'OK' if igual else 'DISTINTO'}")
+
+    print(f"\n{len(corpus)} imágenes | escalar: {t_ref:.2f}s | numpy: {t_new:.3f}s | "
+          f"speedup x{t_ref / max(t_new, 1e-9):.0f} | distintos: {distintos}")
+    return 1 if distintos else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,332 @@
+"""
+Suite de benchmarks del ETL contra el servidor mock (sin red).
+
+Uso:
+    python benchmarks/bench_suite.py                              # dataset sintético de 300 estaciones
+    python benchmarks/bench_suite.py -k orb -k titulo --rondas 10
+    python benchmarks/bench_suite.py --fixtures fixtures_http/    # respuestas grabadas (servidor_mock.py --grabar)
+    python benchmarks/bench_suite.py --latencia 0.02 --errores 0.05
+    python benchmarks/bench_suite.py --guardar base.json
+    python benchmarks/bench_suite.py --comparar base.json --tolerancia 0.15   # exit 1 si hay regresión
+
+Cada benchmark recibe un objeto `benchmark` al estilo pytest-benchmark
+(`benchmark(fn, *args)` o `benchmark.pedantic(fn, setup=...)`): calentamiento,
+N rondas cronometradas y estadísticas min/mediana/p95. Antes de importar el
+proyecto se apunta config.py al mock (RADIO_ETL_URL_*), se desactiva la caché
+HTTP (cada ronda pega al mock), se levantan los límites de cortesía y se acorta
+el backoff, para que lo medido sea el ETL y no las esperas.
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from servidor_mock import ServidorMock, generar
+
+SUITES = {}
+
+
+def suite(nombre):
+    def registrar(fn):
+        SUITES[nombre] = fn
+        return fn
+    return registrar
+
+
+# ================= RUNNER =================
+
+class Benchmark:
+    """Interfaz mínima de pytest-benchmark: benchmark(fn, ...) y benchmark.pedantic(...)."""
+
+    def __init__(self, rondas=5, calentamiento=1):
+        self.rondas, self.calentamiento = rondas, calentamiento
+        self.tiempos = []
+        self.items = None  # elementos por ronda (para informar throughput)
+
+    def __call__(self, fn, *args, **kwargs):
+        return self.pedantic(fn, args, kwargs)
+
+    def pedantic(self, fn, args=(), kwargs=None, setup=None, rondas=None, calentamiento=None):
+        """`setup()` (no cronometrado) corre antes de cada ronda; si retorna (args, kwargs) los reemplaza."""
+        kwargs = kwargs or {}
+        resultado = None
+        total = (self.calentamiento if calentamiento is None else calentamiento) + (rondas or self.rondas)
+        for i in range(total):
+            if setup is not None:
+                preparado = setup()
+                if preparado is not None: args, kwargs = preparado
+            t0 = time.perf_counter()
+            resultado = fn(*args, **kwargs)
+            dt = time.perf_counter() - t0
+            if i >= total - (rondas or self.rondas):
+                self.tiempos.append(dt)
+        return resultado
+
+    def stats(self):
+        t = sorted(self.tiempos)
+        mediana = statistics.median(t)
+        res = {
+            "rondas": len(t), "min": t[0], "mediana": mediana, "media": statistics.fmean(t),
+            "p95": t[min(len(t) - 1, int(round(0.95 * (len(t) - 1))))], "max": t[-1],
+            "desvio": statistics.stdev(t) if len(t) > 1 else 0.0,
+        }
+        if self.items:
+            res["items"] = self.items
+            res["items_s"] = self.items / mediana if mediana else 0.0
+        return res
+
+
+@contextlib.contextmanager
+def silencio():
+    """El ETL imprime por estación: fuera de la medición visible."""
+    with contextlib.redirect_stdout(io.StringIO()):
+        yield
+
+
+# ================= BENCHMARKS =================
+
+@suite("parse_fcc_visual")
+def bench_fcc(benchmark, ctx):
+    from config import URL_FCC_FM
+    from scrapers.fcc import parse_fcc_visual
+    with silencio():
+        filas = benchmark(parse_fcc_visual, URL_FCC_FM, "FM")
+    benchmark.items = len(filas)
+
+
+@suite("scrape_orb_v10")
+def bench_orb(benchmark, ctx):
+    from limpiezaTitulo.limpiezaTitulo import clean_title_extract_freq
+    from scrapers.orb import scrape_orb_v10
+    titulos = [clean_title_extract_freq(t, None)[0] for t in ctx["titulos"][:ctx["muestra"]]]
+    with silencio():
+        benchmark(lambda: [scrape_orb_v10(t) for t in titulos])
+    benchmark.items = len(titulos)
+
+
+@suite("clean_title_extract_freq")
+def bench_titulo(benchmark, ctx):
+    from limpiezaTitulo.limpiezaTitulo import clean_title_extract_freq
+    from limpiezaTitulo.limpiezaTitulo import normalizar_titulo
+    titulos = ctx["titulos"]
+    # Sin memoización: mide las reglas, no los aciertos de caché
+    benchmark.pedantic(lambda: [clean_title_extract_freq(t, None) for t in titulos],
+                       setup=normalizar_titulo.cache_clear)
+    benchmark.items = len(titulos)
+
+
+@suite("normalizar_titulos")
+def bench_titulos_serie(benchmark, ctx):
+    import pandas as pd
+    from limpiezaTitulo.limpiezaTitulo import normalizar_titulo, normalizar_titulos
+    serie = pd.Series(ctx["titulos"])
+    benchmark.pedantic(normalizar_titulos, (serie,), setup=normalizar_titulo.cache_clear)
+    benchmark.items = len(serie)
+
+
+@suite("classify_about_type")
+def bench_clasificador(benchmark, ctx):
+    from clasificadorTipo.clasificadorTipo import classify_about_type
+    tags = ctx["tags"]
+    benchmark(lambda: [classify_about_type(t) for t in tags])
+    benchmark.items = len(tags)
+
+
+@suite("classify_about_type_lote")
+def bench_clasificador_lote(benchmark, ctx):
+    from clasificadorTipo.clasificadorTipo import classify_about_type_lote
+    benchmark(classify_about_type_lote, ctx["tags"])
+    benchmark.items = len(ctx["tags"])
+
+
+@suite("process_pipeline")
+def bench_logos(benchmark, ctx):
+    from gestionDeImagenes.gestionImagen import process_pipeline
+    logos = ctx["logos"][:ctx["muestra"]]
+    salida = os.path.join(ctx["tmp"], "logos_bench")
+    os.makedirs(salida, exist_ok=True)
+
+    def procesar():
+        for i, p in enumerate(logos):
+            process_pipeline(p, os.path.join(salida, f"{i}.webp"))
+    with silencio():
+        benchmark(procesar)
+    benchmark.items = len(logos)
+
+
+@suite("main")
+def bench_main(benchmark, ctx):
+    """Corrida completa en una carpeta nueva por ronda (sin estado, caché ni registro previos)."""
+    import version10
+    rondas = []
+
+    def carpeta_nueva():
+        rondas.append(tempfile.mkdtemp(dir=ctx["tmp"]))
+        os.chdir(rondas[-1])
+
+    with silencio():
+        benchmark.pedantic(version10.main, kwargs=_kwargs_main(ctx), setup=carpeta_nueva,
+                           rondas=max(1, benchmark.rondas // 2))
+    os.chdir(ctx["cwd"])
+    benchmark.items = _filas_exportadas(rondas[-1])
+
+
+@suite("main_resuelta")
+def bench_main_resuelta(benchmark, ctx):
+    """
+    Re-corrida con las URLs ORB ya resueltas (camino directo, sin búsquedas): cada
+    ronda es la segunda corrida en su carpeta; la primera, sin cronometrar, llena
+    el índice de resolución y los detalles guardados. Con ORB_SOLO_RESUMEN=false
+    (RADIO_ETL_ORB_SOLO_RESUMEN) se mide la misma re-corrida bajando cada detalle.
+    """
+    import version10
+    rondas = []
+
+    def primera_corrida():
+        rondas.append(tempfile.mkdtemp(dir=ctx["tmp"]))
+        os.chdir(rondas[-1])
+        version10.main(**_kwargs_main(ctx))
+
+    with silencio():
+        benchmark.pedantic(version10.main, kwargs=_kwargs_main(ctx), setup=primera_corrida,
+                           rondas=max(1, benchmark.rondas // 2))
+    os.chdir(ctx["cwd"])
+    benchmark.items = _filas_exportadas(rondas[-1])
+
+
+def _kwargs_main(ctx):
+    return {"concurrency": ctx["concurrencia"], "logo_workers": 0, "formatos": ["jsonl"], "reporte": None}
+
+
+def _filas_exportadas(carpeta):
+    """Filas del export jsonl de una corrida de 'main'."""
+    from config import EXPORT_NOMBRE
+    with open(os.path.join(carpeta, f"{EXPORT_NOMBRE}.jsonl"), encoding="utf-8") as f:
+        return sum(1 for _ in f)
+
+
+# ================= ENTORNO =================
+
+def cargar_dataset(carpeta):
+    """Títulos, tags y logos del dataset: dataset.json (sintético) o, en una grabación, la respuesta de RB."""
+    path = os.path.join(carpeta, "dataset.json")
+    if os.path.exists(path):
+        with open(path, encoding="utf-8") as f:
+            datos = json.load(f)
+    else:
+        with open(os.path.join(carpeta, "indice.json"), encoding="utf-8") as f:
+            indice = json.load(f)
+        rb = next((e for k, e in indice.items() if k.startswith("GET /json/")), None)
+        estaciones = []
+        if rb is not None:
+            with open(os.path.join(carpeta, "cuerpos", rb["archivo"]), encoding="utf-8") as f:
+                estaciones = json.load(f)
+        datos = {
+            "titulos": [st.get("name", "") for st in estaciones],
+            "tags": [st.get("tags", "") for st in estaciones],
+            "logos": sorted({os.path.join("cuerpos", e["archivo"]) for e in indice.values()
+                             if e["headers"].get("Content-Type", "").startswith("image/")}),
+        }
+    datos["logos"] = [os.path.join(carpeta, p) for p in datos["logos"]]
+    return datos
+
+
+def preparar_proyecto():
+    """Ajustes de config.py antes de que los módulos del ETL lo importen."""
+    import config
+    config.LIMITE_PRUEBA = None
+    config.CACHE_HTTP_ACTIVO = False
+    config.RATE_LIMITS.clear()
+    config.RATE_LIMIT_DEFAULT = (1e6, 1e6)
+    config.HTTP_BACKOFF_BASE, config.HTTP_BACKOFF_MAX = 0.01, 0.05
+
+
+def comparar(resultados, base, tolerancia):
+    """Suites cuya mediana empeoró más de `tolerancia` respecto de `base`."""
+    regresiones = []
+    for nombre, r in resultados.items():
+        anterior = base.get(nombre)
+        if anterior is None: continue
+        cambio = r["mediana"] / anterior["mediana"] - 1 if anterior["mediana"] else 0.0
+        estado = "REGRESIÓN" if cambio > tolerancia else "ok"
+        print(f"   {nombre:26s} {anterior['mediana'] * 1e3:10.1f}ms -> {r['mediana'] * 1e3:10.1f}ms "
+              f"({cambio:+.1%}) {estado}")
+        if cambio > tolerancia: regresiones.append(nombre)
+    return regresiones
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("-k", action="append", default=[], help="solo suites cuyo nombre contenga el texto")
+    ap.add_argument("--fixtures", help="carpeta de respuestas grabadas (default: dataset sintético)")
+    ap.add_argument("-n", "--estaciones", type=int, default=300, help="tamaño del dataset sintético")
+    ap.add_argument("--muestra", type=int, default=20, help="estaciones/logos por ronda en orb y logos")
+    ap.add_argument("--rondas", type=int, default=5)
+    ap.add_argument("--calentamiento", type=int, default=1)
+    ap.add_argument("--concurrencia", type=int, default=8, help="estaciones en vuelo en 'main'")
+    ap.add_argument("--latencia", type=float, default=0.0, help="segundos por request en el mock")
+    ap.add_argument("--jitter", type=float, default=0.0)
+    ap.add_argument("--errores", type=float, default=0.0, help="fracción de requests con 503/429/reset")
+    ap.add_argument("--guardar", help="escribe los resultados (JSON) como línea base")
+    ap.add_argument("--comparar", help="línea base JSON contra la que comparar")
+    ap.add_argument("--tolerancia", type=float, default=0.10, help="empeoramiento tolerado de la mediana")
+    args = ap.parse_args(argv)
+
+    elegidas = [n for n in SUITES if not args.k or any(k in n for k in args.k)]
+    if not elegidas:
+        print(f"Ninguna suite coincide (disponibles: {', '.join(SUITES)})")
+        return 2
+
+    cwd, tmp = os.getcwd(), tempfile.mkdtemp(prefix="bench_etl_")
+    carpeta = args.fixtures or os.path.join(tmp, "fixtures")
+    mock = ServidorMock(carpeta, latencia=args.latencia, jitter=args.jitter, errores=args.errores,
+                        tipos_error=("503", "429", "reset"))
+    resultados = {}
+    try:
+        # El mock arranca antes que nada: config.py lee RADIO_ETL_URL_* al importarse
+        mock.iniciar()
+        os.environ.update(mock.entorno())  # también para los procesos hijos
+        preparar_proyecto()
+        if args.fixtures is None:
+            generar(carpeta, args.estaciones)
+            mock.grabacion.cargar()
+        ctx = dict(cargar_dataset(carpeta), tmp=tmp, cwd=cwd, muestra=args.muestra,
+                   concurrencia=args.concurrencia)
+        print(f"Mock en {mock.base} | {len(ctx['titulos'])} estaciones | {args.rondas} rondas\n")
+        print(f"   {'suite':26s} {'min':>10s} {'mediana':>10s} {'p95':>10s} {'items/s':>10s}")
+        for nombre in elegidas:
+            b = Benchmark(args.rondas, args.calentamiento)
+            SUITES[nombre](b, ctx)
+            r = resultados[nombre] = b.stats()
+            print(f"   {nombre:26s} {r['min'] * 1e3:8.1f}ms {r['mediana'] * 1e3:8.1f}ms {r['p95'] * 1e3:8.1f}ms "
+                  f"{r.get('items_s', 0):10.0f}")
+    finally:
+        os.chdir(cwd)  # "main" corre dentro de carpetas temporales
+        mock.detener()
+        shutil.rmtree(tmp, ignore_errors=True)
+    print(f"\nMock: {mock.stats}")
+
+    if args.guardar:
+        with open(args.guardar, "w", encoding="utf-8") as f:
+            json.dump(resultados, f, indent=2)
+        print(f"Resultados en {args.guardar}")
+    if args.comparar:
+        with open(args.comparar, encoding="utf-8") as f:
+            base = json.load(f)
+        print(f"\nComparación con {args.comparar} (tolerancia {args.tolerancia:.0%}):")
+        if comparar(resultados, base, args.tolerancia):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,96 @@
+"""
+Equivalencia y benchmark de los parsers ORB (bs4 vs lxml).
+
+Uso:
+    python benchmarks/equivalencia_orb.py                  # fixtures de benchmarks/fixtures/orb
+    python benchmarks/equivalencia_orb.py paginas_orb/     # páginas reales guardadas (*.html)
+    python benchmarks/equivalencia_orb.py -n 200           # repeticiones para medir
+
+Los archivos busqueda_*.html se comparan como búsqueda, listado_*.html como listado
+y el resto como detalle.
+Falla (exit 1) si algún campo difiere entre backends. La equivalencia con el
+scrape_orb_v10 original la fija tests/test_orbParser.py.
+"""
+import argparse
+import glob
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scrapers.orb import data_vacia
+from scrapers.orbParser import BACKENDS
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "orb")
+
+
+def correr(nombre, archivo, html):
+    """Resultado comparable: (valor, tipo de excepción). Los campos llenados antes de un error cuentan."""
+    busqueda, detalle, listado = BACKENDS[nombre]
+    for prefijo, fn in (("busqueda", busqueda), ("listado", listado)):
+        if os.path.basename(archivo).startswith(prefijo):
+            try:
+                return fn(html), None
+            except Exception as e:
+                return None, type(e).__name__
+    data = data_vacia()
+    try:
+        detalle(html, data)
+        return data, None
+    except Exception as e:
+        return data, type(e).__name__
+
+
+def medir(nombre, archivo, html, n):
+    t0 = time.perf_counter()
+    for _ in range(n):
+        correr(nombre, archivo, html)
+    return (time.perf_counter() - t0) / n
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("carpeta", nargs="?", default=FIXTURES)
+    ap.add_argument("-n", type=int, default=50, help="repeticiones por página para medir")
+    args = ap.parse_args()
+
+    archivos = sorted(glob.glob(os.path.join(args.carpeta, "*.html")))
+    if not archivos:
+        print(f"Sin páginas .html en {args.carpeta}")
+        return 1
+
+    fallos = 0
+    total = {nombre: 0.0 for nombre in BACKENDS}
+    for archivo in archivos:
+        with open(archivo, encoding="utf-8") as f:
+            html = f.read()
+        ref = correr("bs4", archivo, html)
+        res = correr("lxml", archivo, html)
+        if ref != res:
+            fallos += 1
+            print(f"[DIFF] {os.path.basename(archivo)}")
+            if isinstance(ref[0], dict):
+                for k in ref[0]:
+                    if ref[0][k] != res[0].get(k):
+                        print(f"   {k}: bs4={ref[0][k]!r} lxml={res[0].get(k)!r}")
+            else:
+                print(f"   bs4={ref[0]!r} lxml={res[0]!r}")
+            if ref[1] != res[1]:
+                print(f"   excepción: bs4={ref[1]} lxml={res[1]}")
+
+        tiempos = {nombre: medir(nombre, archivo, html, args.n) for nombre in BACKENDS}
+        for nombre, t in tiempos.items():
+            total[nombre] += t
+        print(f"{os.path.basename(archivo):32s} bs4 {tiempos['bs4'] * 1e3:7.2f} ms | "
+              f"lxml {tiempos['lxml'] * 1e3:7.2f} ms | x{tiempos['bs4'] / tiempos['lxml']:.1f}"
+              f"{'' if ref[1] is None else f' (excepción {ref[1]})'}")
+
+    print(f"\nTotal por página: bs4 {total['bs4'] * 1e3:.2f} ms | lxml {total['lxml'] * 1e3:.2f} ms "
+          f"| x{total['bs4'] / total['lxml']:.1f}")
+    print("OK: backends equivalentes" if not fallos else f"FALLO: {fallos} páginas con diferencias")
+    return 1 if fallos else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
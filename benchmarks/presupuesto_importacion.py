@@ -0,0 +1,92 @@
+"""
+Presupuesto de arranque: tiempo de import de cada módulo y dependencias pesadas prohibidas.
+
+Uso:
+    python benchmarks/presupuesto_importacion.py          # exit 1 si algún módulo se pasa
+    python benchmarks/presupuesto_importacion.py -v       # + los imports más caros de cada uno
+
+Cada módulo se importa en un intérprete nuevo (`python -X importtime`), así
+se mide el arranque en frío como lo paga un proceso 'spawn' del pool. Se toma
+el mínimo de --rondas corridas. Un módulo falla si supera su presupuesto (ms)
+o si al importarlo queda cargada alguna dependencia que solo debe cargar la
+etapa que la usa (p. ej. pandas o Pillow al importar slugs).
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PESADAS = ("pandas", "numpy", "PIL", "bs4", "requests", "lxml", "pyarrow", "openpyxl")
+
+# módulo -> (presupuesto en ms, dependencias que no debe cargar)
+PRESUPUESTO = {
+    "config": (10, PESADAS),
+    "cli": (25, PESADAS),
+    "slugs.slugs": (25, PESADAS),
+    "limpiezaTitulo.limpiezaTitulo": (25, PESADAS),
+    "clasificadorTipo.clasificadorTipo": (25, PESADAS),
+    "exportacion.exportador": (25, PESADAS),
+    "estado.almacen": (25, PESADAS),
+    "red.cliente": (25, PESADAS),
+    "distribuido.cola": (25, PESADAS),
+    "distribuido.nodos": (20, PESADAS),  # medido 4-6 ms (el pipeline se importa por función)
+    "version10": (80, PESADAS + ("asyncio",)),
+    # Etapas: cargan lo suyo y nada más
+    "scrapers.orbParser": (80, ("pandas", "numpy", "PIL", "bs4", "requests")),
+    "vinculacion.vinculacion": (250, ("pandas", "PIL", "bs4", "requests")),
+    "scrapers.resolucionOrb": (300, ("pandas", "PIL", "bs4")),
+    "gestionDeImagenes.gestionImagen": (300, ("pandas", "bs4", "lxml")),
+}
+
+MEDIR = """
+import importlib, json, sys, time
+t0 = time.perf_counter()
+importlib.import_module(sys.argv[1])
+print(json.dumps({"ms": (time.perf_counter() - t0) * 1e3, "modulos": sorted(sys.modules)}))
+"""
+
+
+def importar(modulo):
+    """(ms, módulos cargados, [(ms acumulados, nombre)] de -X importtime) en un intérprete nuevo."""
+    r = subprocess.run([sys.executable, "-X", "importtime", "-c", MEDIR, modulo],
+                       cwd=RAIZ, capture_output=True, text=True)
+    if r.returncode != 0:
+        raise RuntimeError(f"No se pudo importar {modulo}:\n{r.stderr[-2000:]}")
+    datos = json.loads(r.stdout.strip().splitlines()[-1])
+    costos = []
+    for linea in r.stderr.splitlines():
+        if not linea.startswith("import time:") or "cumulative" in linea: continue
+        _, acumulado, nombre = linea[len("import time:"):].split("|")
+        costos.append((int(acumulado) / 1e3, nombre.rstrip()))
+    return datos["ms"], set(datos["modulos"]), costos
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("modulos", nargs="*", help="solo estos módulos (default: todos los del presupuesto)")
+    ap.add_argument("--rondas", type=int, default=3)
+    ap.add_argument("-v", "--verbose", action="store_true")
+    args = ap.parse_args()
+
+    fallas = 0
+    print(f"   {'módulo':36s} {'ms':>7s} {'límite':>7s}")
+    for modulo in args.modulos or PRESUPUESTO:
+        limite, prohibidas = PRESUPUESTO.get(modulo, (float("inf"), ()))
+        corridas = [importar(modulo) for _ in range(args.rondas)]
+        ms, cargados, costos = min(corridas, key=lambda c: c[0])
+        indebidas = [m for m in prohibidas if m in cargados]
+        ok = ms <= limite and not indebidas
+        fallas += not ok
+        print(f"   {modulo:36s} {ms:7.1f} {limite:7.0f}  {'ok' if ok else 'FALLA'}"
+              + (f"  (carga {', '.join(indebidas)})" if indebidas else ""))
+        if args.verbose or not ok:
+            for acumulado, nombre in sorted(costos, reverse=True)[:8]:
+                print(f"      {acumulado:8.1f} ms  {nombre}")
+    return 1 if fallas else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,395 @@
+"""
+Servidor HTTP local que reemplaza a ORB, FCC, Radio-Browser y el CDN de logos.
+
+Reproduce respuestas grabadas (indice.json + cuerpos/) con latencia y errores
+configurables, para medir el ETL sin tocar los hosts reales.
+
+Uso:
+    python benchmarks/servidor_mock.py --generar 2000 fixtures_http/   # dataset sintético
+    python benchmarks/servidor_mock.py fixtures_http/ --latencia 0.05 --errores 0.02
+    python benchmarks/servidor_mock.py fixtures_http/ --grabar         # proxy: graba lo que falte
+
+El ETL apunta al mock con las variables que imprime al arrancar:
+    RADIO_ETL_URL_ORB=http://127.0.0.1:8765 RADIO_ETL_URL_FCC=... RADIO_ETL_URL_RADIO_BROWSER=...
+
+Todas las rutas van en la raíz (los enlaces de ORB son relativos a la raíz):
+/search y /us/... -> ORB, /fcc-bin/... -> FCC, /json/... -> Radio-Browser, /img/... -> CDN.
+Una búsqueda no grabada responde un listado vacío (como ORB sin resultados).
+"""
+import argparse
+import hashlib
+import io
+import json
+import os
+import random
+import re
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import quote_plus, urlparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Host real de cada prefijo de ruta (modo --grabar y reescritura de cuerpos)
+ORIGENES = [
+    ("/fcc-bin/", "https://transition.fcc.gov"),
+    ("/json/", "https://de1.api.radio-browser.info"),
+    ("/img/", "https://cdn.onlineradiobox.com"),
+    ("/", "https://onlineradiobox.com"),
+]
+REGEX_HOSTS = re.compile(rb'(?:https?:)?//(?:cdn\.)?onlineradiobox\.com')
+LISTADO_VACIO = b'<!DOCTYPE html><html><body><ul class="stations-list"></ul></body></html>'
+
+
+def clave(ruta):
+    """Clave de grabación: ruta + query tal como llega ("/search?q=kabc&c=us")."""
+    return f"GET {ruta}"
+
+
+def ruta_de(url):
+    """Ruta + query como la recibe el servidor (requests re-codifica espacios, etc.)."""
+    from requests.utils import requote_uri
+    u = urlparse(requote_uri(url))
+    return u.path + (f"?{u.query}" if u.query else "")
+
+
+# ================= GRABACIONES =================
+
+class Grabacion:
+    """indice.json: clave -> {archivo, status, headers}; cuerpos/<sha1>.bin."""
+
+    def __init__(self, carpeta):
+        self.carpeta = carpeta
+        self.lock = threading.Lock()
+        os.makedirs(os.path.join(carpeta, "cuerpos"), exist_ok=True)
+        self.path_indice = os.path.join(carpeta, "indice.json")
+        self.cargar()
+
+    def cargar(self):
+        indice = {}
+        if os.path.exists(self.path_indice):
+            with open(self.path_indice, encoding="utf-8") as f:
+                indice = json.load(f)
+        with self.lock:
+            self.indice = indice
+
+    def buscar(self, k):
+        entrada = self.indice.get(k)
+        if entrada is None: return None
+        with open(os.path.join(self.carpeta, "cuerpos", entrada["archivo"]), "rb") as f:
+            return entrada["status"], entrada["headers"], f.read()
+
+    def agregar(self, k, status, headers, cuerpo):
+        archivo = hashlib.sha1(cuerpo).hexdigest() + ".bin"
+        path = os.path.join(self.carpeta, "cuerpos", archivo)
+        if not os.path.exists(path):
+            with open(path, "wb") as f:
+                f.write(cuerpo)
+        with self.lock:
+            self.indice[k] = {"archivo": archivo, "status": status, "headers": headers}
+        return path
+
+    def guardar(self):
+        with self.lock:
+            with open(self.path_indice, "w", encoding="utf-8") as f:
+                json.dump(self.indice, f, ensure_ascii=False, indent=0)
+
+
+# ================= SERVIDOR =================
+
+class ServidorMock:
+    def __init__(self, carpeta, puerto=0, latencia=0.0, jitter=0.0, errores=0.0,
+                 tipos_error=("503",), semilla=0, grabar=False):
+        self.grabacion = Grabacion(carpeta)
+        self.puerto = puerto
+        self.latencia, self.jitter = latencia, jitter
+        self.errores, self.tipos_error = errores, tuple(tipos_error)
+        self.rnd = random.Random(semilla)
+        self.grabar = grabar
+        self.lock = threading.Lock()
+        self.stats = {"requests": 0, "inyectados": 0, "no_grabadas": 0, "grabadas": 0}
+        self.httpd = None
+        self.base = None
+
+    def _contar(self, k):
+        with self.lock:
+            self.stats[k] += 1
+
+    def _sorteo(self):
+        """(demora, error inyectado o None) de una request."""
+        with self.lock:
+            demora = self.latencia + (self.rnd.uniform(0, self.jitter) if self.jitter else 0.0)
+            error = self.rnd.choice(self.tipos_error) if self.rnd.random() < self.errores else None
+        return demora, error
+
+    def _upstream(self, ruta):
+        import requests
+        origen = next(o for prefijo, o in ORIGENES if ruta.startswith(prefijo))
+        r = requests.get(origen + ruta, headers={"User-Agent": "Mozilla/5.0"}, timeout=60)
+        headers = {k: v for k, v in r.headers.items() if k.lower() in ("content-type", "etag", "last-modified")}
+        self.grabacion.agregar(clave(ruta), r.status_code, headers, r.content)
+        self._contar("grabadas")
+        return r.status_code, headers, r.content
+
+    def responder(self, ruta):
+        """(status, headers, cuerpo) para `ruta`; None = cortar la conexión."""
+        self._contar("requests")
+        demora, error = self._sorteo()
+        if demora: time.sleep(demora)
+        if error is not None:
+            self._contar("inyectados")
+            if error == "reset": return None
+            if error == "429": return 429, {"Retry-After": "0"}, b"Too Many Requests"
+            return int(error), {}, b"error inyectado"
+
+        res = self.grabacion.buscar(clave(ruta))
+        if res is None and self.grabar:
+            res = self._upstream(ruta)
+        if res is None:
+            self._contar("no_grabadas")
+            if ruta.startswith("/search"):
+                return 200, {"Content-Type": "text/html; charset=utf-8"}, LISTADO_VACIO
+            return 404, {}, b"no grabada"
+        status, headers, cuerpo = res
+        tipo = headers.get("Content-Type", "")
+        if "html" in tipo or "json" in tipo:
+            # Enlaces absolutos a ORB/CDN -> el mock (los logos se piden acá también)
+            cuerpo = REGEX_HOSTS.sub(self.base.encode(), cuerpo)
+        return status, headers, cuerpo
+
+    def iniciar(self):
+        servidor = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"  # keep-alive, como los hosts reales
+            disable_nagle_algorithm = True  # cabecera y cuerpo van en writes separados
+
+            def do_GET(self):
+                res = servidor.responder(self.path)
+                if res is None:
+                    self.close_connection = True
+                    return
+                status, headers, cuerpo = res
+                self.send_response(status)
+                for k, v in headers.items():
+                    self.send_header(k, v)
+                self.send_header("Content-Length", str(len(cuerpo)))
+                self.end_headers()
+                self.wfile.write(cuerpo)
+
+            def log_message(self, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", self.puerto), Handler)
+        self.httpd.daemon_threads = True
+        self.base = f"http://127.0.0.1:{self.httpd.server_address[1]}"
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+        return self.base
+
+    def detener(self):
+        if self.httpd is not None:
+            self.httpd.shutdown()
+            self.httpd.server_close()
+            self.httpd = None
+        if self.grabar:
+            self.grabacion.guardar()
+
+    def entorno(self):
+        """Variables que reemplazan los hosts de config.py (leer antes de importar config)."""
+        return {"RADIO_ETL_URL_ORB": self.base, "RADIO_ETL_URL_FCC": self.base,
+                "RADIO_ETL_URL_RADIO_BROWSER": self.base}
+
+    def __enter__(self):
+        self.iniciar()
+        return self
+
+    def __exit__(self, *exc):
+        self.detener()
+
+
+# ================= DATASET SINTÉTICO =================
+# Estaciones con callsign, frecuencia, ciudad y tags; para cada una: fila de
+# Radio-Browser, línea FCC, página de detalle ORB, búsquedas por título limpio
+# y por callsign (la estación + distractores) y un logo PNG.
+
+MARCAS = ("Eagle", "Kiss", "Star", "River", "Power", "Jack", "Bob", "Magic", "Mix", "Hot",
+          "Lite", "Wave", "Thunder", "Country", "Classic Rock", "Jazz", "Gospel", "Oldies",
+          "Sports", "News Talk", "Public Radio", "La Raza", "Tejano", "Praise", "Hits")
+CIUDADES = (("Austin", "TX", "Texas", 30.27, -97.74), ("Dallas", "TX", "Texas", 32.78, -96.8),
+            ("Detroit", "MI", "Michigan", 42.33, -83.05), ("Denver", "CO", "Colorado", 39.74, -104.99),
+            ("Miami", "FL", "Florida", 25.76, -80.19), ("Seattle", "WA", "Washington", 47.61, -122.33),
+            ("Chicago", "IL", "Illinois", 41.88, -87.63), ("Phoenix", "AZ", "Arizona", 33.45, -112.07))
+TAGS = ("rock", "classic rock", "news", "talk", "country", "jazz", "pop", "hits", "christian",
+        "gospel", "sports", "spanish", "latino", "public radio", "npr", "oldies", "80s", "dance")
+
+
+def _png(i, lado=300):
+    """Logo sintético: fondo sólido (lo detecta el pipeline) + formas de color."""
+    from PIL import Image, ImageDraw
+    rnd = random.Random(i)
+    fondo = (255, 255, 255) if i % 3 else tuple(rnd.randrange(256) for _ in range(3))
+    im = Image.new("RGB", (lado, lado // (1 + i % 2)), fondo)
+    d = ImageDraw.Draw(im)
+    for _ in range(4):
+        x0, y0 = rnd.randrange(lado // 2), rnd.randrange(im.height // 2)
+        d.ellipse((x0, y0, x0 + rnd.randrange(20, lado // 2), y0 + rnd.randrange(20, im.height // 2)),
+                  fill=tuple(rnd.randrange(256) for _ in range(3)))
+    b = io.BytesIO()
+    im.save(b, "PNG")
+    return b.getvalue()
+
+
+def _cf_email(email, k=0x5a):
+    return "%02x" % k + "".join("%02x" % (ord(c) ^ k) for c in email)
+
+
+def _detalle(e):
+    return f"""<!DOCTYPE html><html lang="en"><head><meta charset="utf-8"><title>{e['nombre']} | Online Radio Box</title>
+<script>var station = {{"name": "{e['nombre']}"}};</script></head><body>
+<ul class="breadcrumbs" itemscope itemtype="http://schema.org/BreadcrumbList">
+<li itemprop="itemListElement" itemscope><a href="/us/" itemprop="item"><span itemprop="name">United States</span></a></li>
+<li itemprop="itemListElement" itemscope><a href="/us/?cs=us.{e['estado'].lower()}" itemprop="item"><span itemprop="name">{e['estado']}</span></a></li>
+<li itemprop="itemListElement" itemscope><a href="/us/?cs=us.{e['ciudad'].lower()}" itemprop="item"><span itemprop="name">{e['ciudad']}</span></a></li></ul>
+<section class="station station-main" itemscope itemtype="http://schema.org/RadioStation">
+<figure class="station_logo"><img src="//cdn.onlineradiobox.com/img/l/{e['logo']}.png" alt="{e['callsign']}" itemprop="image"></figure>
+<h1 itemprop="name" class="station__title">{e['nombre']}</h1>
+<button class="b-play station_play" stream="https://stream.example.com/{e['slug']}.mp3">Play</button>
+<ul class="station__tags station_tags">{''.join(f'<li><a href="/us/genre/{t.replace(" ", "-")}/">{t.title()}</a></li>' for t in e['tags'])}</ul>
+<ul class="station__reference"><li class="station_reference_lang"><a href="/search?l=english">English</a></li></ul>
+<div class="station__description" itemprop="description">{e['nombre']} broadcasting from {e['ciudad']}. {'Lorem ipsum dolor sit amet. ' * (1 + e['i'] % 20)}</div></section>
+<table class="station__reference__contacts" role="complementary">
+<tr><td><span itemprop="address">{100 + e['i']} Main St.<br> {e['ciudad']}, {e['st']} {78000 + e['i'] % 999}</span></td></tr>
+<tr><td><a href="tel:+1555{e['i']:07d}" itemprop="telephone">+1 555-{e['i']:07d}</a></td></tr>
+<tr><td><a href="/cdn-cgi/l/email-protection#" itemprop="email"><span class="__cf_email__" data-cfemail="{_cf_email(f"info@{e['slug']}.example.com")}">[email&#160;protected]</span></a></td></tr>
+<tr><td><a href="https://www.{e['slug']}.example.com/" itemprop="url">{e['slug']}.example.com</a></td></tr>
+<tr><td><a href="https://www.facebook.com/{e['slug']}" rel="nofollow">Facebook</a>
+<a href="https://twitter.com/{e['slug']}" rel="nofollow">Twitter</a></td></tr></table></body></html>"""
+
+
+def _resultados(estaciones, siguiente=None):
+    lis = "".join(
+        f'<li class="stations__station"><a class="stations__station__title" href="/us/{e["slug"]}/">'
+        f'<figure><img src="//cdn.onlineradiobox.com/img/l/{e["logo"]}.png"></figure>{e["nombre"]}</a>'
+        f'<span class="stations__station__info">{e["freq_txt"]}</span></li>' for e in estaciones)
+    pie = f'<a href="{siguiente}">Next</a>' if siguiente else ""
+    return f'<!DOCTYPE html><html><body><ul class="stations-list">{lis}</ul>{pie}</body></html>'
+
+
+def _fcc(estaciones, servicio):
+    filas = []
+    for e in estaciones:
+        if e['servicio'] != servicio: continue
+        lat, lon = abs(e['lat']), abs(e['lon'])
+        dms = lambda v: (int(v), int(v * 60 % 60), round(v * 3600 % 60, 1))
+        (la_d, la_m, la_s), (lo_d, lo_m, lo_s) = dms(lat), dms(lon)
+        unidad = "MHz" if servicio == "FM" else "kHz"
+        filas.append(f"|{e['callsign']:<10}|{e['freq']}  {unidad}|{servicio} |{200 + e['i'] % 100}|ND|-|A|-|LIC|"
+                     f"{e['ciudad'].upper()}|{e['st']}|US|BLH-{e['i']}|6.0  kW|6.0  kW|100.0|100.0|{10000 + e['i']}|"
+                     f"N |{la_d} |{la_m} |{la_s}|W |{lo_d} |{lo_m} |{lo_s}|LICENSEE {e['i']}|")
+    return ("<html><body><pre>\n" + "\n".join(filas) + "\n</pre></body></html>").encode("latin-1")
+
+
+def generar(carpeta, n=1000, semilla=7, logos=200):
+    """Dataset sintético grabado en `carpeta`. Retorna la ruta de dataset.json."""
+    from config import URL_ORB_SEARCH, URL_FCC_FM, URL_FCC_AM, URL_RADIO_BROWSER
+    from limpiezaTitulo.limpiezaTitulo import clean_title_extract_freq
+
+    rnd = random.Random(semilla)
+    g = Grabacion(carpeta)
+    usados, estaciones = set(), []
+    for i in range(n):
+        while True:
+            cs = rnd.choice("KW") + "".join(rnd.choice("ABCDEFGHIJKLMNOPQRSTUVWXYZ") for _ in range(3))
+            if cs not in usados: break
+        usados.add(cs)
+        fm = rnd.random() < 0.8
+        freq = f"{rnd.randrange(881, 1080, 2) / 10:.1f}" if fm else str(rnd.randrange(530, 1700, 10))
+        ciudad, st, estado, lat, lon = rnd.choice(CIUDADES)
+        marca = rnd.choice(MARCAS)
+        nombre = f"{cs} {freq} {'FM' if fm else 'AM'} {marca}" if rnd.random() < 0.6 else f"{marca} {freq} {'FM' if fm else 'AM'}"
+        estaciones.append({
+            "i": i, "callsign": cs, "servicio": "FM" if fm else "AM", "freq": freq,
+            "freq_txt": f"{freq} {'FM' if fm else 'AM'}", "nombre": nombre, "marca": marca,
+            "slug": cs.lower(), "ciudad": ciudad, "st": st, "estado": estado,
+            "lat": lat + rnd.uniform(-0.3, 0.3), "lon": lon + rnd.uniform(-0.3, 0.3),
+            "tags": rnd.sample(TAGS, rnd.randint(1, 4)), "logo": i % logos,
+        })
+
+    html = {"Content-Type": "text/html; charset=utf-8"}
+    rb = [{
+        "stationuuid": f"00000000-0000-0000-0000-{e['i']:012d}", "changeuuid": f"c-{e['i']}",
+        "name": e["nombre"], "tags": ",".join(e["tags"]), "country": "United States Of America",
+        "state": e["estado"], "language": "english", "homepage": f"https://{e['slug']}.example.com",
+        "geo_lat": round(e["lat"], 4) if e["i"] % 2 else None, "geo_long": round(e["lon"], 4) if e["i"] % 2 else None,
+        "lastchangetime_iso8601": "2025-01-01T00:00:00Z",
+    } for e in estaciones]
+    g.agregar(clave(ruta_de(URL_RADIO_BROWSER)), 200, {"Content-Type": "application/json"},
+              json.dumps(rb).encode())
+    g.agregar(clave(ruta_de(URL_FCC_FM)), 200, html, _fcc(estaciones, "FM"))
+    g.agregar(clave(ruta_de(URL_FCC_AM)), 200, html, _fcc(estaciones, "AM"))
+
+    por_marca = {}
+    for e in estaciones:
+        por_marca.setdefault(e["marca"], []).append(e)
+    paths_logos = {}
+    for e in estaciones:
+        g.agregar(clave(f"/us/{e['slug']}/"), 200, html, _detalle(e).encode())
+        if e["logo"] not in paths_logos:
+            paths_logos[e["logo"]] = g.agregar(clave(f"/img/l/{e['logo']}.png"), 200,
+                                               {"Content-Type": "image/png"}, _png(e["logo"]))
+        # Búsquedas que hace el ETL: título limpio (la estación + 2 de la misma marca) y callsign
+        titulo, _ = clean_title_extract_freq(e["nombre"], None)
+        otras = [o for o in por_marca[e["marca"]] if o is not e][:2]
+        for q, res in ((titulo, [e] + otras), (e["callsign"], [e])):
+            g.agregar(clave(ruta_de(URL_ORB_SEARCH.format(quote_plus(q)))), 200, html, _resultados(res).encode())
+    # Listado del país (catálogo ORB) paginado de a 100, con el mismo markup que la búsqueda
+    for p in range(0, n, 100):
+        ruta = "/us/" if p == 0 else f"/us/?p={p // 100}"
+        siguiente = f"/us/?p={p // 100 + 1}" if p + 100 < n else None
+        g.agregar(clave(ruta), 200, html, _resultados(estaciones[p:p + 100], siguiente).encode())
+    g.guardar()
+
+    dataset = {"n": n, "titulos": [e["nombre"] for e in estaciones],
+               "tags": [",".join(e["tags"]) for e in estaciones],
+               "logos": [os.path.relpath(p, carpeta) for p in paths_logos.values()]}
+    path = os.path.join(carpeta, "dataset.json")
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(dataset, f)
+    return path
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("carpeta", help="carpeta de grabaciones (indice.json + cuerpos/)")
+    ap.add_argument("--generar", type=int, metavar="N", help="genera un dataset sintético de N estaciones y sale")
+    ap.add_argument("--puerto", type=int, default=8765)
+    ap.add_argument("--latencia", type=float, default=0.0, help="segundos por request")
+    ap.add_argument("--jitter", type=float, default=0.0, help="segundos extra aleatorios (0..jitter)")
+    ap.add_argument("--errores", type=float, default=0.0, help="fracción de requests con error inyectado")
+    ap.add_argument("--tipos-error", default="503", help="503, 429, 500, reset (separados por coma)")
+    ap.add_argument("--grabar", action="store_true", help="pide a los hosts reales lo que no esté grabado")
+    args = ap.parse_args()
+
+    if args.generar:
+        print(f"Dataset sintético: {generar(args.carpeta, args.generar)}")
+        return 0
+
+    mock = ServidorMock(args.carpeta, args.puerto, args.latencia, args.jitter, args.errores,
+                        args.tipos_error.split(","), grabar=args.grabar)
+    mock.iniciar()
+    print(f"Mock en {mock.base} ({len(mock.grabacion.indice)} respuestas grabadas)")
+    print(" ".join(f"{k}={v}" for k, v in mock.entorno().items()))
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        mock.detener()
+        print(mock.stats)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
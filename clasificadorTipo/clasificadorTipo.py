@@ -1,120 +1,223 @@
+import json
+import re
+import threading
+
+from config import CLASIFICADOR_TAXONOMIA
+
 # ================= CLASIFICADOR DE TIPO =================
+# Una sola regex compilada (alternación de todas las palabras clave) recorre los
+# tags una vez y suma los pesos de cada categoría. Las palabras se comparan
+# completas: 'rap' no cuenta en 'therapy' ni 'mass' en 'massachusetts'.
+# El patrón va dentro de un lookahead para contar también coincidencias que se
+# solapan ('al quran' y 'quran'). En empate gana la primera categoría de la
+# taxonomía; sin coincidencias, "Music".
+
+# Categoría -> {palabra clave: peso}. Reemplazable por un JSON con la misma
+# forma (CLASIFICADOR_TAXONOMIA); el orden de las categorías desempata.
+TAXONOMIA = {
+    # --- NEWS & TALK ---
+    'News/Talk': {
+        'news': 3, 'talk': 3, 'information': 3, 'public radio': 2,
+        'politics': 2, 'debate': 2
+    },
+    'Business News': {
+        'business': 3, 'economy': 3, 'finance': 2, 'market': 2
+    },
+    'Sports Talk': {
+        'sport': 3, 'sports': 3, 'nfl': 2, 'nba': 2, 'mlb': 2,
+        'hockey': 2, 'soccer': 2
+    },
+
+    # --- RELIGION ---
+    'Christian': {
+        'christian': 3, 'worship': 3, 'faith': 2, 'jesus': 2
+    },
+    'Catholic': {
+        'catholic': 3, 'rosary': 2, 'mass': 2
+    },
+    'Gospel': {
+        'gospel': 3, 'praise': 2
+    },
+    'Islamic': {
+        'islam': 3, 'quran': 3, 'muslim': 2, 'al quran': 2
+    },
+    'Jewish': {
+        'jewish': 3, 'hebrew': 2, 'torah': 2
+    },
+    'Hindu': {
+        'hindu': 3, 'mantra': 2, 'bhajan': 2
+    },
+
+    # --- EDUCATION ---
+    'Education': {
+        'education': 3, 'learning': 2, 'university': 3,
+        'college': 3, 'student': 2
+    },
+
+    # --- LATIN / REGIONAL ---
+    'Latin': {
+        'spanish': 3, 'latino': 3, 'reggaeton': 3, 'cumbia': 2,
+        'salsa': 2, 'bachata': 2, 'merengue': 2, 'tropical': 2
+    },
+    'Brazil/Portuguese': {
+        'brazil': 3, 'brasil': 3, 'portuguese': 3, 'forro': 2,
+        'sertanejo': 2
+    },
+    'French': {
+        'french': 3, 'francais': 3
+    },
+    'German': {
+        'german': 3, 'deutsch': 3
+    },
+    'Italian': {
+        'italian': 3, 'italiano': 3
+    },
+    'African': {
+        'africa': 3, 'african': 3, 'afrobeat': 2
+    },
+    'Asian': {
+        'asian': 3, 'japan': 2, 'korea': 2, 'china': 2,
+        'kpop': 2, 'jpop': 2
+    },
+
+    # --- MUSIC GENRES ---
+    'Pop': {'pop': 3, 'top 40': 3, 'hits': 2},
+    'Rock': {'rock': 3, 'metal': 2, 'punk': 2},
+    'Hip-Hop/Rap': {'rap': 3, 'hiphop': 3, 'hip hop': 3, 'trap': 2},
+    'Electronic/Dance': {'edm': 3, 'electronic': 3, 'dance': 2, 'house': 2},
+    'Classical': {'classical': 3, 'symphony': 2, 'orchestra': 2},
+    'Jazz/Blues': {'jazz': 3, 'blues': 2, 'swing': 2},
+    'Country': {'country': 3, 'americana': 2},
+    'R&B/Soul': {'rnb': 3, 'soul': 3, 'funk': 2},
+
+    # --- CULTURE ---
+    'Comedy': {'comedy': 3, 'funny': 2},
+    'Lifestyle': {'lifestyle': 3, 'fashion': 2},
+    'Anime/Game': {'anime': 3, 'gaming': 3, 'game': 3, 'otaku': 2},
+    'Culture/Arts': {'culture': 3, 'arts': 2},
+    'Documentary': {'documentary': 3, 'history': 2},
+
+    # --- WELLNESS ---
+    'Meditation': {'meditation': 3, 'mantra': 2},
+    'Relax': {'relax': 3, 'chill': 2},
+    'Sleep': {'sleep': 3, 'calm': 2},
+    'Wellness': {'wellness': 3, 'health': 2},
+
+    # --- PUBLIC SAFETY / UTILITIES ---
+    'Emergency': {'emergency': 3, 'alert': 2},
+    'Traffic': {'traffic': 3, 'commute': 2},
+    'Weather': {'weather': 3, 'storm': 2},
+    'Police/Scanner': {'police': 3, 'scanner': 3, 'fire dept': 2},
+}
+
+SIN_CATEGORIA = "Music"
+
+# Comas, guiones, barras, etc. valen como espacio: 'hip-hop' y 'top_40' coinciden
+SEPARADORES = re.compile(r'[\s,;/|_\-]+')
+
+
+def normalizar_tags(tags_str):
+    return SEPARADORES.sub(' ', tags_str.lower()).strip()
+
+
+def cargar_taxonomia(path):
+    """JSON {categoría: {palabra: peso}} (el orden de las categorías se conserva)."""
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+class Clasificador:
+    """Taxonomía compilada: una regex para todas las palabras y una matriz palabra x categoría de pesos."""
+
+    def __init__(self, taxonomia):
+        self.categorias = list(taxonomia)
+        palabras = {}
+        for cat, pesos in taxonomia.items():
+            for palabra, peso in pesos.items():
+                palabras.setdefault(normalizar_tags(palabra), {})[cat] = peso
+        self.palabras = list(palabras)
+        self.indice = {p: i for i, p in enumerate(self.palabras)}
+        pos = {c: j for j, c in enumerate(self.categorias)}
+        # palabra -> [(categoría, peso)]; la matriz numpy del lote se arma al primer lote
+        self.aportes = [[(pos[cat], peso) for cat, peso in palabras[p].items()] for p in self.palabras]
+        self._pesos = None
+        # Las más largas primero: en un mismo inicio gana la frase ('hip hop' antes que 'hip')
+        alternativas = "|".join(re.escape(p) for p in sorted(self.palabras, key=len, reverse=True))
+        self.regex = re.compile(rf'(?<!\w)(?=({alternativas})(?!\w))')
+
+    def clasificar(self, tags_str):
+        if not tags_str:
+            return SIN_CATEGORIA
+        # Cada palabra suma una vez por fila, aunque aparezca varias veces (como el original)
+        vistas = {self.indice[m.group(1)] for m in self.regex.finditer(normalizar_tags(tags_str))}
+        puntajes = {}
+        for i in vistas:
+            for j, peso in self.aportes[i]:
+                puntajes[j] = puntajes.get(j, 0) + peso
+        if not puntajes:
+            return SIN_CATEGORIA
+        # Mayor puntaje; en empate, la primera categoría de la taxonomía
+        j, mejor = max(puntajes.items(), key=lambda jp: (jp[1], -jp[0]))
+        return self.categorias[j] if mejor > 0 else SIN_CATEGORIA
+
+    def _matriz(self, np):
+        """Pesos palabra x categoría."""
+        if self._pesos is None:
+            pesos = np.zeros((len(self.palabras), len(self.categorias)))
+            for i, aportes in enumerate(self.aportes):
+                for j, peso in aportes:
+                    pesos[i, j] += peso
+            self._pesos = pesos
+        return self._pesos
+
+    def clasificar_lote(self, columna):
+        """
+        Clasifica una columna entera de tags (lista, Series, ...): una sola pasada
+        de la regex sobre todos los tags unidos por saltos de línea.
+        """
+        import numpy as np
+        columna = ["" if t is None or (isinstance(t, float) and t != t) else str(t) for t in columna]
+        normalizados = [normalizar_tags(t) for t in columna]
+        inicios = np.cumsum([0] + [len(t) + 1 for t in normalizados])
+        filas, palabras = [], []
+        for m in self.regex.finditer("\n".join(normalizados)):
+            filas.append(m.start())
+            palabras.append(self.indice[m.group(1)])
+        puntajes = np.zeros((len(columna), len(self.categorias)))
+        if filas:
+            # Pares (fila, palabra) sin repetir: cada palabra suma una vez por fila
+            n = len(self.palabras)
+            pares = np.unique((np.searchsorted(inicios, filas, side="right") - 1) * n + np.array(palabras))
+            filas, palabras = np.divmod(pares, n)
+            np.add.at(puntajes, filas, self._matriz(np)[palabras])
+        mejores = puntajes.argmax(axis=1)  # primera categoría con el máximo
+        hay = puntajes[np.arange(len(columna)), mejores] > 0
+        return [self.categorias[j] if h else SIN_CATEGORIA for j, h in zip(mejores.tolist(), hay.tolist())]
+
+
+_CLASIFICADOR = None
+_LOCK = threading.Lock()
+
+
+def clasificador():
+    """Clasificador compartido: se compila una vez, en el primer uso."""
+    global _CLASIFICADOR
+    if _CLASIFICADOR is None:
+        with _LOCK:
+            if _CLASIFICADOR is None:
+                taxonomia = cargar_taxonomia(CLASIFICADOR_TAXONOMIA) if CLASIFICADOR_TAXONOMIA else TAXONOMIA
+                _CLASIFICADOR = Clasificador(taxonomia)
+    return _CLASIFICADOR
+
+
 def classify_about_type(tags_str):
     """
     Clasificador avanzado para radios basado en pesos por palabra clave.
     Muy completo, escalable y de calidad profesional.
     """
-    if not tags_str:
-        return "Music"
-
-    tags = tags_str.lower().replace(",", " ")
-
-    categories = {
-        # --- NEWS & TALK ---
-        'News/Talk': {
-            'news': 3, 'talk': 3, 'information': 3, 'public radio': 2,
-            'politics': 2, 'debate': 2
-        },
-        'Business News': {
-            'business': 3, 'economy': 3, 'finance': 2, 'market': 2
-        },
-        'Sports Talk': {
-            'sport': 3, 'sports': 3, 'nfl': 2, 'nba': 2, 'mlb': 2,
-            'hockey': 2, 'soccer': 2
-        },
-
-        # --- RELIGION ---
-        'Christian': {
-            'christian': 3, 'worship': 3, 'faith': 2, 'jesus': 2
-        },
-        'Catholic': {
-            'catholic': 3, 'rosary': 2, 'mass': 2
-        },
-        'Gospel': {
-            'gospel': 3, 'praise': 2
-        },
-        'Islamic': {
-            'islam': 3, 'quran': 3, 'muslim': 2, 'al quran': 2
-        },
-        'Jewish': {
-            'jewish': 3, 'hebrew': 2, 'torah': 2
-        },
-        'Hindu': {
-            'hindu': 3, 'mantra': 2, 'bhajan': 2
-        },
-
-        # --- EDUCATION ---
-        'Education': {
-            'education': 3, 'learning': 2, 'university': 3,
-            'college': 3, 'student': 2
-        },
-
-        # --- LATIN / REGIONAL ---
-        'Latin': {
-            'spanish': 3, 'latino': 3, 'reggaeton': 3, 'cumbia': 2,
-            'salsa': 2, 'bachata': 2, 'merengue': 2, 'tropical': 2
-        },
-        'Brazil/Portuguese': {
-            'brazil': 3, 'brasil': 3, 'portuguese': 3, 'forro': 2,
-            'sertanejo': 2
-        },
-        'French': {
-            'french': 3, 'francais': 3
-        },
-        'German': {
-            'german': 3, 'deutsch': 3
-        },
-        'Italian': {
-            'italian': 3, 'italiano': 3
-        },
-        'African': {
-            'africa': 3, 'african': 3, 'afrobeat': 2
-        },
-        'Asian': {
-            'asian': 3, 'japan': 2, 'korea': 2, 'china': 2,
-            'kpop': 2, 'jpop': 2
-        },
-
-        # --- MUSIC GENRES ---
-        'Pop': {'pop': 3, 'top 40': 3, 'hits': 2},
-        'Rock': {'rock': 3, 'metal': 2, 'punk': 2},
-        'Hip-Hop/Rap': {'rap': 3, 'hiphop': 3, 'hip hop': 3, 'trap': 2},
-        'Electronic/Dance': {'edm': 3, 'electronic': 3, 'dance': 2, 'house': 2},
-        'Classical': {'classical': 3, 'symphony': 2, 'orchestra': 2},
-        'Jazz/Blues': {'jazz': 3, 'blues': 2, 'swing': 2},
-        'Country': {'country': 3, 'americana': 2},
-        'R&B/Soul': {'rnb': 3, 'soul': 3, 'funk': 2},
-
-        # --- CULTURE ---
-        'Comedy': {'comedy': 3, 'funny': 2},
-        'Lifestyle': {'lifestyle': 3, 'fashion': 2},
-        'Anime/Game': {'anime': 3, 'gaming': 3, 'game': 3, 'otaku': 2},
-        'Culture/Arts': {'culture': 3, 'arts': 2},
-        'Documentary': {'documentary': 3, 'history': 2},
-
-        # --- WELLNESS ---
-        'Meditation': {'meditation': 3, 'mantra': 2},
-        'Relax': {'relax': 3, 'chill': 2},
-        'Sleep': {'sleep': 3, 'calm': 2},
-        'Wellness': {'wellness': 3, 'health': 2},
-
-        # --- PUBLIC SAFETY / UTILITIES ---
-        'Emergency': {'emergency': 3, 'alert': 2},
-        'Traffic': {'traffic': 3, 'commute': 2},
-        'Weather': {'weather': 3, 'storm': 2},
-        'Police/Scanner': {'police': 3, 'scanner': 3, 'fire dept': 2},
-    }
-
-    scores = {cat: 0 for cat in categories}
-
-    for cat, words in categories.items():
-        for word, weight in words.items():
-            if word in tags:
-                scores[cat] += weight
-
-    best = max(scores, key=scores.get)
-
-    if scores[best] == 0:
-        return "Music"
-    
-    return best
\ No newline at end of file
+    return clasificador().clasificar(tags_str)
+
+
+def classify_about_type_lote(columna):
+    """classify_about_type para una columna de tags completa (mismo resultado, fila por fila)."""
+    return clasificador().clasificar_lote(columna)
@@ -0,0 +1,188 @@
+"""
+radio-etl: punto de entrada del ETL. `pip install -e .` instala el comando
+radio-etl (pyproject.toml); sin instalar, `python cli.py` es lo mismo.
+
+    python cli.py run [flags]           corrida completa
+    python cli.py resume [flags]        continúa: salta completas, reintenta fallidas
+    python cli.py coordinator [flags]   corrida distribuida: publica shards y exporta
+    python cli.py worker [flags]        toma shards de la cola (en uno o varios nodos)
+    python cli.py fcc-index [--reconstruir]
+    python cli.py bench [args de benchmarks/bench_suite.py]
+    python cli.py config [flags]        muestra la configuración efectiva y de dónde sale
+
+Configuración en capas (ver CAPAS DE CONFIGURACIÓN en config.py), de menor a
+mayor prioridad: valores de config.py < archivo TOML (--config / radio_etl.toml,
+con --preset) < entorno RADIO_ETL_* < flags. Ejemplo de radio_etl.toml:
+
+    concurrencia = 8
+    limite_prueba = 0
+    export_formatos = ["jsonl", "parquet"]
+
+    [preset.texas]
+    filtro_estados = ["TX"]
+    logos_activos = false
+
+Los flags se escriben en el entorno antes de importar config: los procesos
+'spawn' del pool de logos arrancan con la misma configuración.
+"""
+import argparse
+import json
+import os
+import sys
+
+RAIZ = os.path.dirname(os.path.abspath(__file__))
+
+
+def _lista(texto):
+    return [v.strip() for v in texto.split(",") if v.strip()]
+
+
+def _rate_limit(texto):
+    """'HOST=RPS[:RAFAGA]' -> (host, [rps, ráfaga])."""
+    try:
+        host, valor = texto.split("=", 1)
+        rps, _, rafaga = valor.partition(":")
+        rps = float(rps)
+        return host.strip(), [rps, int(rafaga) if rafaga else max(1, round(rps))]
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"se espera HOST=RPS[:RAFAGA], no {texto!r}")
+
+
+def _parser():
+    comun = argparse.ArgumentParser(add_help=False)
+    comun.add_argument("--config", help="archivo TOML de configuración (default: radio_etl.toml si existe)")
+    comun.add_argument("--preset", help="tabla [preset.<nombre>] del archivo de configuración")
+
+    corrida = argparse.ArgumentParser(add_help=False, parents=[comun])
+    corrida.add_argument("--concurrency", type=int, help="Estaciones procesadas en paralelo (1 = serial)")
+    corrida.add_argument("--limite", type=int,
+                         help="Tamaño del lote: primeras N estaciones de Radio-Browser (0 = todas)")
+    corrida.add_argument("--formatos", type=_lista,
+                         help="Formatos de export separados por coma: xlsx, csv, jsonl, parquet")
+    corrida.add_argument("--estados", type=_lista,
+                         help="Solo estaciones de estos estados, por nombre o código (TX,California)")
+    corrida.add_argument("--pais", help="País de Radio-Browser (default: United States of America)")
+    corrida.add_argument("--logo-workers", type=int,
+                         help="Procesos para renderizar logos (0 = en línea; por defecto todos los núcleos)")
+    corrida.add_argument("--no-images", dest="imagenes", action="store_false", default=None,
+                         help="Sin etapa de logos: no descarga ni renderiza imágenes")
+    corrida.add_argument("--catalogo", action="store_true", default=None,
+                         help="Empareja contra el catálogo de listados ORB en vez de buscar estación por estación")
+    corrida.add_argument("--incremental", action="store_true",
+                         help="Solo reprocesa estaciones nuevas, cambiadas en Radio-Browser o vencidas")
+    corrida.add_argument("--rate-limit", action="append", type=_rate_limit, default=[], metavar="HOST=RPS[:RAFAGA]",
+                         help="Límite por host (repetible); 'default=RPS' para el resto de los hosts")
+    corrida.add_argument("--no-cache", dest="cache", action="store_false", default=None,
+                         help="Sin caché HTTP en disco")
+    corrida.add_argument("--cache-dir", help="Carpeta para cachés (HTTP, índice FCC, resolución ORB, manifiesto de logos)")
+    corrida.add_argument("--perfil", choices=["cprofile", "pyinstrument"],
+                         help="Perfila la corrida (usar con --concurrency 1: solo se ve el hilo principal)")
+    corrida.add_argument("--reporte", help="Reporte JSON con tiempos por etapa y métricas ('' = no escribir)")
+
+    ap = argparse.ArgumentParser(prog="radio-etl", description=__doc__,
+                                 formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = ap.add_subparsers(dest="comando", required=True)
+    run = sub.add_parser("run", parents=[corrida], help="corrida completa")
+    run.add_argument("--resume", action="store_true", help="Igual que el comando resume")
+    sub.add_parser("resume", parents=[corrida], help="continúa desde el almacén de estado")
+    sub.add_parser("config", parents=[corrida], help="muestra la configuración efectiva")
+
+    cola = argparse.ArgumentParser(add_help=False)
+    cola.add_argument("--cola", help="Base SQLite de la cola de shards (la misma para coordinador y workers)")
+    coord = sub.add_parser("coordinator", parents=[corrida, cola],
+                           help="corrida distribuida: parte el lote en shards y espera a los workers")
+    coord.add_argument("--resume", action="store_true", help="Solo publica las estaciones no completadas")
+    coord.add_argument("--particion", choices=["hash", "estado"], help="Shards por hash de stationuuid o por estado")
+    coord.add_argument("--tamano-shard", type=int, help="Estaciones por shard")
+    coord.add_argument("--workers", type=int, default=0, help="Workers locales a lanzar (además de los remotos)")
+    worker = sub.add_parser("worker", parents=[corrida, cola], help="toma y procesa shards de la cola")
+    worker.add_argument("--nombre", help="Identificador del worker (default: host-pid)")
+    worker.add_argument("--persistente", action="store_true",
+                        help="Sigue esperando corridas nuevas cuando la cola queda vacía")
+    fcc = sub.add_parser("fcc-index", parents=[comun], help="construye o refresca el índice FCC")
+    fcc.add_argument("--reconstruir", action="store_true", help="reconstruye aunque el índice esté vigente")
+    fcc.add_argument("--cache-dir", help="Carpeta para cachés (el índice va en <cache-dir>/fcc_indice)")
+    # bench pasa sus argumentos tal cual a bench_suite.py (ver main)
+    sub.add_parser("bench", help="suite de benchmarks offline (benchmarks/bench_suite.py)", add_help=False)
+    return ap
+
+
+def _entorno(args):
+    """Variables RADIO_ETL_* equivalentes a los flags dados (los no dados no pisan las capas de abajo)."""
+    valores = {
+        "CONFIG": getattr(args, "config", None),
+        "PRESET": getattr(args, "preset", None),
+        "CONCURRENCIA": getattr(args, "concurrency", None),
+        "LIMITE_PRUEBA": getattr(args, "limite", None),
+        "EXPORT_FORMATOS": getattr(args, "formatos", None),
+        "FILTRO_ESTADOS": getattr(args, "estados", None),
+        "RB_PAIS": getattr(args, "pais", None),
+        "LOGOS_WORKERS": getattr(args, "logo_workers", None),
+        "LOGOS_ACTIVOS": getattr(args, "imagenes", None),
+        "ORB_CATALOGO_ACTIVO": getattr(args, "catalogo", None),
+        "CACHE_HTTP_ACTIVO": getattr(args, "cache", None),
+        "DIR_CACHE": getattr(args, "cache_dir", None),
+        "REPORTE_JSON": getattr(args, "reporte", None),
+        "COLA_DB": getattr(args, "cola", None),
+        "COLA_PARTICION": getattr(args, "particion", None),
+        "COLA_TAMANO_SHARD": getattr(args, "tamano_shard", None),
+    }
+    limites = dict(getattr(args, "rate_limit", []))
+    if "default" in limites:
+        valores["RATE_LIMIT_DEFAULT"] = limites.pop("default")
+    if limites:
+        valores["RATE_LIMITS"] = limites
+    entorno = {}
+    for nombre, valor in valores.items():
+        if valor is None: continue
+        entorno[f"RADIO_ETL_{nombre}"] = valor if isinstance(valor, str) else json.dumps(valor)
+    return entorno
+
+
+def mostrar_config():
+    import config
+    for nombre in config.AJUSTABLES:
+        print(f"{nombre.lower():36s} = {getattr(config, nombre)!r}  ({config.ORIGEN.get(nombre, 'default')})")
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else list(argv)
+    if argv[:1] == ["bench"]:
+        sys.path.insert(0, os.path.join(RAIZ, "benchmarks"))
+        from bench_suite import main as bench_main
+        return bench_main(argv[1:])
+
+    args = _parser().parse_args(argv)
+    os.environ.update(_entorno(args))
+    if RAIZ not in sys.path:
+        sys.path.insert(0, RAIZ)
+
+    if args.comando == "config":
+        mostrar_config()
+        return 0
+    if args.comando == "fcc-index":
+        from scrapers.indiceFcc import cargar_indice_fcc
+        indice = cargar_indice_fcc(reconstruir=args.reconstruir)
+        print(f"Índice FCC: {len(indice)} estaciones")
+        return 0
+
+    if args.comando in ("coordinator", "worker"):
+        from distribuido.nodos import coordinar, trabajar
+        from instrumentacion.tiempos import perfilado
+        with perfilado(args.perfil):
+            if args.comando == "coordinator":
+                if coordinar(resume=args.resume, incremental=args.incremental, workers_locales=args.workers) is False:
+                    return 1
+            else:
+                trabajar(nombre=args.nombre, persistente=args.persistente)
+        return 0
+
+    # Los defaults de version10.main salen de config, ya resuelto con las tres capas
+    import version10
+    version10.main(resume=args.comando == "resume" or args.resume,
+                   incremental=args.incremental, perfil=args.perfil)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,19 +1,207 @@
+import json
+import os
 import re
 
 # ================= CONFIGURACIÓN =================
-LIMITE_PRUEBA = 3 
+# Valores por defecto. Cada constante en MAYÚSCULAS de aquí hasta "CAPAS" se puede
+# reemplazar sin tocar el código (ver CAPAS DE CONFIGURACIÓN al final del bloque).
+
+# Hosts de origen (p. ej. el servidor mock de benchmarks/)
+URL_ORB_BASE = "https://onlineradiobox.com"
+URL_FCC_BASE = "https://transition.fcc.gov"
+URL_RADIO_BROWSER_BASE = "https://de1.api.radio-browser.info"
+
+LIMITE_PRUEBA = 3  # estaciones a procesar (0 / None = todas)
+RB_PAIS = "United States of America"  # país de Radio-Browser (/json/stations/bycountry/<país>)
+FILTRO_ESTADOS = []  # solo estas estaciones de RB, por nombre o código ("Texas", "CA"); vacío = todas
 CARPETA_LOGOS = "logos_emisoras_final"
+CONCURRENCIA = 1  # estaciones en vuelo (1 = modo serial)
+LOGOS_ACTIVOS = True       # False = sin etapa de logos (columna imagen vacía)
+LOGOS_WORKERS = None       # procesos de render de logos (None = todos los núcleos, 0 = en línea)
+LOGOS_COLA_MAX = 64        # renders pendientes como máximo (cola acotada)
+LOGOS_MP_CONTEXT = "spawn"
+LOGOS_MANIFIESTO_DB = "logos_manifiesto.sqlite"  # url/sha256/slug -> render
+LOGOS_REINTENTO_NEGATIVO = 7 * 24 * 3600        # 404 / imagen inválida: no reintentar antes
+ESTADO_DB = "estado_etl.sqlite"  # checkpoint por estación (--resume)
+DELTA_MAX_EDAD_DIAS = 30  # --incremental: reprocesar aunque no cambie pasado este tiempo
+SLUGS_DB = "slugs.sqlite"  # registro de slugs: estación -> slug estable entre corridas
+
+# Ejecución distribuida (cli.py coordinator / worker): cola de shards en SQLite con leases.
+# Con varios nodos, COLA_DB y SLUGS_DB van en un disco compartido por todos.
+COLA_DB = "cola_shards.sqlite"
+COLA_PARTICION = "hash"    # "hash" (de stationuuid) | "estado"
+COLA_TAMANO_SHARD = 50     # estaciones por shard (los estados grandes se parten)
+COLA_LEASE_SEG = 120       # sin renovar en este tiempo, el shard vuelve a la cola
+COLA_MAX_INTENTOS = 3      # un shard que falla (o cuyo worker muere) tantas veces queda 'fallido'
+COLA_ESPERA_SEG = 2.0      # pausa entre consultas a la cola (worker sin shard, coordinador)
+COLA_SIN_WORKERS_SEG = 600 # coordinador: tanto tiempo sin ningún lease vigente y abandona la corrida
+EXPORT_NOMBRE = "DATA_FINAL_RADIOS_USA"  # <nombre>.<formato>
+EXPORT_FORMATOS = ["xlsx"]                # xlsx, csv, jsonl, parquet
+EXPORT_CHUNK_FILAS = 500                  # filas por volcado a disco / row group Parquet
+REPORTE_JSON = "reporte_etl.json"         # tiempos por etapa + métricas de la corrida
+PERFIL_SALIDA = "perfil_etl"              # --perfil: perfil_etl.prof / perfil_etl.html
+
+# Cortesía por host (peticiones/segundo, ráfaga). Se aplica por sufijo de dominio.
+RATE_LIMITS = {
+    "onlineradiobox.com": (0.7, 2),
+}
+RATE_LIMIT_DEFAULT = (4.0, 4)  # CDNs de logos y resto de hosts
+
+# Cliente HTTP compartido (keep-alive + reintentos)
+HTTP_POOL_HOSTS = 16        # hosts con pool propio
+HTTP_POOL_MAXSIZE = 32      # conexiones keep-alive por host
+HTTP_REINTENTOS = 4         # reintentos en 429/5xx/errores de conexión
+HTTP_BACKOFF_BASE = 1.0     # segundos (exponencial + jitter)
+HTTP_BACKOFF_MAX = 60.0
+
+# Caché HTTP en disco (ORB y FCC). Las rutas relativas de cachés van bajo DIR_CACHE.
+DIR_CACHE = ""
+CACHE_HTTP_ACTIVO = True
+CACHE_HTTP_DB = "cache_http.sqlite"
+CACHE_TTL_ORB = 7 * 24 * 3600   # segundos
+CACHE_TTL_FCC = 24 * 3600
+FCC_INDICE_DIR = "fcc_indice"   # índice FCC columnar (mmap), se reconstruye pasado CACHE_TTL_FCC
+FCC_INDICE_TTL_PARCIAL = 3600  # ... o pasado este tiempo si se armó con una descarga FCC fallida
 
-# URLs
-URL_FCC_FM = "https://transition.fcc.gov/fcc-bin/fmq?state=&call=&city=&arn=&serv=FM&vac=&freq=0.0&fre2=107.9&facid=&class=&dkt=&list=2"
-URL_FCC_AM = "https://transition.fcc.gov/fcc-bin/amq?state=&call=&city=&arn=&serv=AM&vac=&freq=530&fre2=1700&facid=&class=&dkt=&list=2"
-URL_RADIO_BROWSER = "https://de1.api.radio-browser.info/json/stations/bycountry/United States of America"
-URL_ORB_SEARCH = "https://onlineradiobox.com/search?q={}&c=us"
+# Índice de resolución ORB: stationuuid/callsign -> URL de detalle (evita la búsqueda)
+ORB_RESOLUCION_ACTIVA = True
+ORB_RESOLUCION_DB = "orb_resolucion.sqlite"
+ORB_RESOLUCION_TTL = 30 * 24 * 3600      # re-verificar entradas confiables pasado este tiempo
+ORB_RESOLUCION_TTL_BAJA = 3 * 24 * 3600  # ... y las de baja confianza o "no encontrada"
+ORB_CONFIANZA_MIN = 0.8
+
+# Detalle ORB en dos etapas: el resumen del <li> de búsqueda/listado (nombre, frecuencia,
+# miniatura del logo) decide si hace falta bajar la página de detalle o alcanza con la
+# copia guardada (con datos de contacto) de una descarga anterior
+ORB_SOLO_RESUMEN = True
+ORB_RESUMEN_MAX_EDAD = 30 * 24 * 3600  # la copia guardada se vuelve a bajar pasado este tiempo
+
+# Catálogo ORB (--catalogo): crawl de listados /us/ y emparejamiento local, sin búsqueda por estación
+ORB_CATALOGO_ACTIVO = False
+ORB_CATALOGO_MAX_PAGINAS = 500
+ORB_CATALOGO_TTL = 7 * 24 * 3600
+
+# Vinculación de registros RB / FCC / ORB (vinculacion/vinculacion.py)
+VINCULACION_UMBRAL = 0.7          # puntaje mínimo para aceptar un vínculo
+VINCULACION_UMBRAL_BUSQUEDA = 0.5 # idem para elegir entre los resultados de una búsqueda ORB
+VINCULACION_MARGEN = 0.02         # si el segundo mejor está más cerca, es ambiguo
+VINCULACION_EVIDENCIA_MIN = 0.5   # peso mínimo de rasgos disponibles (solo frecuencia no alcanza)
+VINCULACION_GEO_ESCALA_KM = 50.0  # puntaje geo = exp(-km / escala)
+VINCULACION_TOKEN_MAX_FRECUENCIA = 50  # tokens más comunes que esto no se usan para bloquear
+VINCULACION_PESOS = {'callsign': 0.35, 'freq': 0.2, 'titulo': 0.25, 'geo': 0.1, 'estado': 0.1}
+
+# Parser de páginas ORB: "lxml" (un solo recorrido) o "bs4" (BeautifulSoup). Sin lxml cae a bs4.
+PARSER_ORB = "lxml"
+
+# Taxonomía de about_type: JSON {categoría: {palabra: peso}}; None = la de clasificadorTipo.py
+CLASIFICADOR_TAXONOMIA = None
 
 HEADERS = {
     "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
 }
 
+# ================= CAPAS DE CONFIGURACIÓN =================
+# De menor a mayor prioridad, sobre los valores de arriba:
+#   1. Archivo TOML: RADIO_ETL_CONFIG (o radio_etl.toml en el directorio actual).
+#      Claves = nombres de este módulo en minúsculas; la tabla [preset.<nombre>]
+#      elegida con RADIO_ETL_PRESET pisa a las claves sueltas.
+#   2. Entorno: RADIO_ETL_<NOMBRE> (RADIO_ETL_CONCURRENCIA=8, RADIO_ETL_FILTRO_ESTADOS=TX,CA,
+#      RADIO_ETL_RATE_LIMITS='{"onlineradiobox.com": [1, 2]}'). Los hosts también
+#      como RADIO_ETL_URL_ORB / _FCC / _RADIO_BROWSER.
+#   3. Flags de cli.py, que escribe el entorno (2) antes de importar este módulo:
+#      los procesos 'spawn' del pool de logos heredan la misma configuración.
+# Los dicts (RATE_LIMITS, VINCULACION_PESOS, ...) se combinan con la capa anterior.
+
+ALIAS_ENTORNO = {
+    "URL_ORB_BASE": "RADIO_ETL_URL_ORB",
+    "URL_FCC_BASE": "RADIO_ETL_URL_FCC",
+    "URL_RADIO_BROWSER_BASE": "RADIO_ETL_URL_RADIO_BROWSER",
+}
+VERDADEROS = ("1", "true", "yes", "si", "sí", "on")
+
+# Constantes ajustables: las definidas hasta aquí con un tipo simple
+AJUSTABLES = [n for n, v in list(globals().items()) if n.isupper() and n not in ("ALIAS_ENTORNO", "VERDADEROS")
+              and (v is None or isinstance(v, (bool, int, float, str, list, tuple, dict)))]
+ORIGEN = {}  # constante -> "archivo" | "preset" | "entorno" (las que no están usan el default)
+
+
+def _convertir(nombre, valor, default):
+    """Valor de una capa al tipo del default (el entorno llega como texto: JSON o lista con comas)."""
+    if isinstance(valor, str) and not isinstance(default, str):
+        if isinstance(default, bool):
+            return valor.strip().lower() in VERDADEROS
+        try:
+            valor = json.loads(valor)
+        except ValueError:
+            if isinstance(default, (list, tuple)):
+                valor = [v.strip() for v in valor.split(",") if v.strip()]
+            elif default is not None:
+                raise ValueError(f"Valor inválido para {nombre}: {valor!r}")
+    if isinstance(default, tuple) and isinstance(valor, list):
+        return tuple(valor)
+    if isinstance(default, float) and isinstance(valor, int) and not isinstance(valor, bool):
+        return float(valor)
+    return valor
+
+
+def _leer_archivo():
+    """{NOMBRE: (valor, origen)} del archivo TOML (y su preset), o {} si no hay archivo."""
+    path = os.environ.get("RADIO_ETL_CONFIG") or ("radio_etl.toml" if os.path.exists("radio_etl.toml") else None)
+    preset = os.environ.get("RADIO_ETL_PRESET")
+    if not path:
+        if preset: raise ValueError(f"Preset '{preset}' sin archivo de configuración (RADIO_ETL_CONFIG)")
+        return {}
+    try:
+        import tomllib
+    except ImportError:  # Python < 3.11
+        try:
+            import tomli as tomllib
+        except ImportError:
+            raise RuntimeError("Leer la configuración TOML requiere Python 3.11+ o tomli (pip install tomli)")
+    with open(path, "rb") as f:
+        datos = tomllib.load(f)
+    presets = datos.pop("preset", {})
+    if preset and preset not in presets:
+        raise ValueError(f"Preset '{preset}' no está en {path} (hay: {', '.join(presets) or 'ninguno'})")
+    valores = {}
+    for origen, tabla in (("archivo", datos), ("preset", presets.get(preset, {}))):
+        for clave, valor in tabla.items():
+            if clave.upper() not in AJUSTABLES:
+                raise ValueError(f"Clave desconocida en {path}: {clave}")
+            valores[clave.upper()] = (valor, origen)
+    return valores
+
+
+def _aplicar_capas():
+    archivo = _leer_archivo()
+    for nombre in AJUSTABLES:
+        for valor, origen in (archivo.get(nombre, (None, None)),
+                              (os.environ.get(ALIAS_ENTORNO.get(nombre, f"RADIO_ETL_{nombre}")), "entorno")):
+            if origen is None or valor is None: continue
+            default = globals()[nombre]
+            valor = _convertir(nombre, valor, default)
+            if isinstance(default, dict) and isinstance(valor, dict):
+                valor = {**default, **valor}
+            globals()[nombre] = valor
+            ORIGEN[nombre] = origen
+
+
+_aplicar_capas()
+
+# Rutas de caché relativas bajo DIR_CACHE
+if DIR_CACHE:
+    os.makedirs(DIR_CACHE, exist_ok=True)
+    CACHE_HTTP_DB, FCC_INDICE_DIR, ORB_RESOLUCION_DB, LOGOS_MANIFIESTO_DB = (
+        p if os.path.isabs(p) else os.path.join(DIR_CACHE, p)
+        for p in (CACHE_HTTP_DB, FCC_INDICE_DIR, ORB_RESOLUCION_DB, LOGOS_MANIFIESTO_DB))
+
+# URLs (derivadas de los hosts ya resueltos)
+URL_FCC_FM = URL_FCC_BASE + "/fcc-bin/fmq?state=&call=&city=&arn=&serv=FM&vac=&freq=0.0&fre2=107.9&facid=&class=&dkt=&list=2"
+URL_FCC_AM = URL_FCC_BASE + "/fcc-bin/amq?state=&call=&city=&arn=&serv=AM&vac=&freq=530&fre2=1700&facid=&class=&dkt=&list=2"
+URL_RADIO_BROWSER = URL_RADIO_BROWSER_BASE + "/json/stations/bycountry/" + RB_PAIS
+URL_ORB_SEARCH = URL_ORB_BASE + "/search?q={}&c=us"
+ORB_CATALOGO_RAIZ = URL_ORB_BASE + "/us/"
+
 # Regex precompilados
 REGEX_CALLSIGN = re.compile(r'\b([KW][A-Z0-9-]{2,4})\b', re.IGNORECASE)
 REGEX_FREQ_TITLE = re.compile(r'\b(\d{2,4}(\.\d)?)\b')
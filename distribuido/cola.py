@@ -0,0 +1,259 @@
+import json
+import sqlite3
+import threading
+import time
+import uuid
+import zlib
+
+from config import COLA_DB, COLA_LEASE_SEG, COLA_MAX_INTENTOS
+from estado.almacen import STATUS_ERROR
+
+# ================= COLA DE SHARDS CON LEASES (SQLite) =================
+# El coordinador parte el lote de Radio-Browser en shards y los publica; cada
+# worker toma uno con un lease (vence en COLA_LEASE_SEG salvo que lo renueve),
+# procesa sus estaciones y reporta cada fila a la tabla de resultados.
+# Un shard cuyo lease vence (worker muerto o colgado) vuelve a estar disponible
+# para otro worker, hasta COLA_MAX_INTENTOS; las estaciones ya reportadas no se
+# repiten. Las transacciones que reparten shards son BEGIN IMMEDIATE: dos
+# procesos nunca toman el mismo shard.
+# SQLite alcanza para workers en una máquina o en nodos con un disco compartido
+# con locks confiables; la interfaz (publicar/tomar/renovar/reportar/completar)
+# es la que tendría que cumplir otra cola.
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS corridas (
+    id TEXT PRIMARY KEY,
+    estado TEXT NOT NULL,          -- 'activa' | 'cerrada'
+    creada_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS shards (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    corrida TEXT NOT NULL,
+    estado TEXT NOT NULL,          -- 'pendiente' | 'tomado' | 'hecho' | 'fallido'
+    worker TEXT,
+    vence REAL,                    -- fin del lease (estado 'tomado')
+    intentos INTEGER NOT NULL DEFAULT 0,
+    estaciones TEXT NOT NULL,      -- JSON: estaciones de Radio-Browser del shard
+    error TEXT,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS shards_estado ON shards (corrida, estado);
+CREATE TABLE IF NOT EXISTS resultados (
+    corrida TEXT NOT NULL,
+    clave TEXT NOT NULL,
+    status TEXT NOT NULL,          -- como en estado.almacen: 'ok' | 'error'
+    item TEXT,
+    error TEXT,
+    firma TEXT,
+    worker TEXT,
+    updated_at REAL NOT NULL,
+    PRIMARY KEY (corrida, clave)
+);
+"""
+
+PENDIENTE = "pendiente"
+TOMADO = "tomado"
+HECHO = "hecho"
+FALLIDO = "fallido"
+
+
+def particionar(estaciones, clave, modo="hash", tamano=50):
+    """
+    Shards (listas de estaciones, en el orden de entrada) por hash de la clave
+    de estación o por estado. Un estado con más de `tamano` estaciones se parte.
+    """
+    if modo == "hash":
+        n = max(1, -(-len(estaciones) // tamano))
+        grupos = {}
+        for st in estaciones:
+            grupos.setdefault(zlib.crc32(clave(st).encode("utf-8")) % n, []).append(st)
+        return [grupos[i] for i in sorted(grupos)]
+    if modo == "estado":
+        from vinculacion.vinculacion import codigo_estado
+        grupos = {}
+        for st in estaciones:
+            estado = codigo_estado(st.get('state')) or (st.get('state') or '').strip().lower()
+            grupos.setdefault(estado, []).append(st)
+        return [g[i:i + tamano] for g in grupos.values() for i in range(0, len(g), tamano)]
+    raise ValueError(f"Partición desconocida: {modo} (hash | estado)")
+
+
+class ColaShards:
+    def __init__(self, path=COLA_DB, lease=COLA_LEASE_SEG, max_intentos=COLA_MAX_INTENTOS):
+        self.path = path
+        self.lease = lease
+        self.max_intentos = max_intentos
+        self.lock = threading.Lock()
+        # Autocommit: las transacciones se abren a mano (BEGIN IMMEDIATE) donde hacen falta
+        self.conn = sqlite3.connect(path, timeout=30, isolation_level=None, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript(_SCHEMA)
+
+    def _transaccion(self, fn):
+        with self.lock:
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                resultado = fn(self.conn)
+                self.conn.execute("COMMIT")
+                return resultado
+            except BaseException:
+                self.conn.execute("ROLLBACK")
+                raise
+
+    # ---------- coordinador ----------
+    def publicar(self, shards, corrida=None):
+        """Publica los shards de una corrida nueva; devuelve su id."""
+        corrida = corrida or time.strftime("%Y%m%d-%H%M%S-") + uuid.uuid4().hex[:6]
+        ahora = time.time()
+
+        def insertar(db):
+            db.execute("INSERT INTO corridas VALUES (?, 'activa', ?)", (corrida, ahora))
+            db.executemany(
+                "INSERT INTO shards (corrida, estado, estaciones, updated_at) VALUES (?, ?, ?, ?)",
+                [(corrida, PENDIENTE, json.dumps(s, ensure_ascii=False), ahora) for s in shards])
+        self._transaccion(insertar)
+        return corrida
+
+    def _vencer_agotados(self, db, ahora):
+        """Leases vencidos que ya agotaron sus intentos: el shard no se reparte más."""
+        db.execute("UPDATE shards SET estado = ?, error = COALESCE(error, 'lease vencido'), updated_at = ? "
+                   "WHERE estado = ? AND vence < ? AND intentos >= ?",
+                   (FALLIDO, ahora, TOMADO, ahora, self.max_intentos))
+
+    def progreso(self, corrida):
+        """
+        dict estado -> cantidad de shards de la corrida (vencidos cuentan como
+        pendientes; los que agotaron sus intentos pasan a fallidos aunque ningún
+        worker vuelva a consultar la cola).
+        """
+        with self.lock:
+            self._vencer_agotados(self.conn, time.time())
+            rows = self.conn.execute(
+                "SELECT CASE WHEN estado = ? AND vence < ? THEN ? ELSE estado END, COUNT(*) "
+                "FROM shards WHERE corrida = ? GROUP BY 1",
+                (TOMADO, time.time(), PENDIENTE, corrida)).fetchall()
+        return dict(rows)
+
+    def terminada(self, corrida):
+        progreso = self.progreso(corrida)
+        return not progreso.get(PENDIENTE) and not progreso.get(TOMADO)
+
+    def leases_vigentes(self, corrida):
+        """Shards de la corrida en manos de un worker con el lease al día (workers vivos)."""
+        with self.lock:
+            return self.conn.execute("SELECT COUNT(*) FROM shards WHERE corrida = ? AND estado = ? AND vence >= ?",
+                                     (corrida, TOMADO, time.time())).fetchone()[0]
+
+    def resultados(self, corrida):
+        """dict clave -> (status, item, error, firma) de las estaciones reportadas."""
+        with self.lock:
+            rows = self.conn.execute(
+                "SELECT clave, status, item, error, firma FROM resultados WHERE corrida = ?",
+                (corrida,)).fetchall()
+        return {clave: (status, json.loads(item) if item is not None else None, error, firma)
+                for clave, status, item, error, firma in rows}
+
+    def fallidos(self, corrida):
+        """[(id, error)] de los shards que agotaron sus intentos."""
+        with self.lock:
+            return self.conn.execute("SELECT id, error FROM shards WHERE corrida = ? AND estado = ?",
+                                     (corrida, FALLIDO)).fetchall()
+
+    def cerrar_corrida(self, corrida):
+        with self.lock:
+            self.conn.execute("UPDATE corridas SET estado = 'cerrada' WHERE id = ?", (corrida,))
+
+    # ---------- worker ----------
+    def tomar(self, worker):
+        """
+        Toma un shard pendiente (o con el lease vencido) de una corrida activa.
+        Devuelve {'id', 'corrida', 'estaciones', 'intentos'} o None si no hay.
+        """
+        def tomar_uno(db):
+            ahora = time.time()
+            self._vencer_agotados(db, ahora)
+            fila = db.execute(
+                "SELECT s.id, s.corrida, s.estaciones, s.intentos FROM shards s "
+                "JOIN corridas c ON c.id = s.corrida AND c.estado = 'activa' "
+                "WHERE s.estado = ? OR (s.estado = ? AND s.vence < ?) "
+                "ORDER BY c.creada_at, s.id LIMIT 1", (PENDIENTE, TOMADO, ahora)).fetchone()
+            if fila is None:
+                return None
+            shard_id, corrida, estaciones, intentos = fila
+            db.execute("UPDATE shards SET estado = ?, worker = ?, vence = ?, intentos = intentos + 1, "
+                       "updated_at = ? WHERE id = ?", (TOMADO, worker, ahora + self.lease, ahora, shard_id))
+            return {"id": shard_id, "corrida": corrida, "estaciones": json.loads(estaciones),
+                    "intentos": intentos + 1}
+        return self._transaccion(tomar_uno)
+
+    def quedan(self):
+        """True si alguna corrida activa tiene shards sin terminar (pendientes o en manos de un worker)."""
+        with self.lock:
+            return self.conn.execute(
+                "SELECT 1 FROM shards s JOIN corridas c ON c.id = s.corrida AND c.estado = 'activa' "
+                "WHERE s.estado IN (?, ?) LIMIT 1", (PENDIENTE, TOMADO)).fetchone() is not None
+
+    def renovar(self, shard_id, worker):
+        """Extiende el lease. False si el shard ya no es de este worker (venció y lo tomó otro)."""
+        with self.lock:
+            cur = self.conn.execute("UPDATE shards SET vence = ? WHERE id = ? AND worker = ? AND estado = ?",
+                                    (time.time() + self.lease, shard_id, worker, TOMADO))
+        return cur.rowcount == 1
+
+    def reportadas(self, corrida, claves):
+        """Claves (de `claves`) ya reportadas OK en la corrida: un shard reasignado no las repite."""
+        claves = set(claves)
+        with self.lock:
+            rows = self.conn.execute("SELECT clave FROM resultados WHERE corrida = ? AND status = 'ok'",
+                                     (corrida,)).fetchall()
+        return {c for (c,) in rows if c in claves}
+
+    def reportar(self, corrida, clave, status, item=None, error=None, firma=None, worker=None):
+        """Fila final de una estación (idempotente: la última gana)."""
+        with self.lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO resultados VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (corrida, clave, status, json.dumps(item, ensure_ascii=False) if item is not None else None,
+                 error, firma, worker, time.time()))
+
+    def completar(self, shard_id, worker):
+        """Marca el shard como hecho si sigue siendo de este worker."""
+        with self.lock:
+            cur = self.conn.execute("UPDATE shards SET estado = ?, vence = NULL, updated_at = ? "
+                                    "WHERE id = ? AND worker = ? AND estado = ?",
+                                    (HECHO, time.time(), shard_id, worker, TOMADO))
+        return cur.rowcount == 1
+
+    def liberar(self, shard_id, worker, error):
+        """Devuelve el shard a la cola tras un fallo del worker (o lo da por fallido sin intentos)."""
+        with self.lock:
+            self.conn.execute(
+                "UPDATE shards SET estado = CASE WHEN intentos >= ? THEN ? ELSE ? END, "
+                "worker = NULL, vence = NULL, error = ?, updated_at = ? WHERE id = ? AND worker = ? AND estado = ?",
+                (self.max_intentos, FALLIDO, PENDIENTE, error, time.time(), shard_id, worker, TOMADO))
+
+    def cerrar(self):
+        with self.lock:
+            self.conn.close()
+
+
+class AlmacenCola:
+    """
+    Almacén de estado de un worker: cada checkpoint (ver version10._checkpoint)
+    se reporta a la cola en vez de a un estado_etl.sqlite local.
+    """
+
+    def __init__(self, cola, corrida, worker):
+        self.cola = cola
+        self.corrida = corrida
+        self.worker = worker
+        self.al_guardar = None
+
+    def guardar(self, uuid, status, item=None, error=None, firma=None):
+        self.cola.reportar(self.corrida, uuid, status, item, error, firma, self.worker)
+        if self.al_guardar is not None:
+            self.al_guardar(uuid, item)
+
+    def guardar_fallo(self, uuid, error, item=None, firma=None):
+        """El worker no ve las filas previas: el coordinador decide qué conservar (AlmacenEstado.guardar_fallo)."""
+        self.guardar(uuid, STATUS_ERROR, item, error, firma)
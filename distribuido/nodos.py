@@ -0,0 +1,247 @@
+import os
+import sys
+import threading
+import time
+
+from config import (
+    COLA_PARTICION, COLA_TAMANO_SHARD, COLA_ESPERA_SEG, COLA_SIN_WORKERS_SEG, CONCURRENCIA, LOGOS_WORKERS, LOGOS_ACTIVOS,
+    ORB_CATALOGO_ACTIVO, EXPORT_NOMBRE, EXPORT_FORMATOS, REPORTE_JSON
+)
+
+# ================= EJECUCIÓN DISTRIBUIDA: COORDINADOR Y WORKERS =================
+# Coordinador: descarga Radio-Browser, aplica --resume/--incremental contra su
+# almacén de estado, parte las pendientes en shards y los publica en la cola.
+# Espera a que los workers los terminen y arma el export en el orden de RB.
+# Worker: toma shards con lease (renovado por un hilo mientras trabaja), los
+# procesa con el mismo pipeline que version10 y reporta cada fila a la cola.
+# Un worker que muere deja vencer su lease y el shard pasa a otro.
+# Los slugs salen del registro compartido (SLUGS_DB): únicos entre workers,
+# aunque las colisiones de nombre se numeran en el orden en que se procesan.
+# Los imports del pipeline van dentro de cada función: `cli.py worker` arranca
+# sin cargar el export ni el cliente HTTP hasta tomar su primer shard.
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class Latido:
+    """Hilo que renueva el lease del shard cada lease/3 mientras el worker lo procesa."""
+
+    def __init__(self, cola, shard_id, worker):
+        self.cola, self.shard_id, self.worker = cola, shard_id, worker
+        self._fin = threading.Event()
+        self._hilo = threading.Thread(target=self._latir, daemon=True)
+        self._hilo.start()
+
+    def _latir(self):
+        while not self._fin.wait(self.cola.lease / 3):
+            if not self.cola.renovar(self.shard_id, self.worker):
+                print(f"   [!] Lease del shard {self.shard_id} perdido (lo tomó otro worker)")
+                return
+
+    def detener(self):
+        self._fin.set()
+        self._hilo.join()
+
+
+def lanzar_worker(nombre, args=()):
+    """Worker local en un proceso aparte (`cli.py worker`), con el mismo entorno de configuración."""
+    import subprocess
+    return subprocess.Popen([sys.executable, os.path.join(RAIZ, "cli.py"), "worker", "--nombre", nombre, *args])
+
+
+def _esperar_corrida(cola, corrida, procesos, sin_workers_seg=COLA_SIN_WORKERS_SEG):
+    """
+    True cuando no quedan shards pendientes ni tomados. False si mueren todos los
+    workers locales o si pasan `sin_workers_seg` sin ningún lease vigente (los
+    workers remotos murieron o nunca llegaron): la corrida se exporta incompleta.
+    """
+    previo, con_worker = None, time.time()
+    while not cola.terminada(corrida):
+        progreso = cola.progreso(corrida)
+        if progreso != previo:
+            print("   -> Shards: " + ", ".join(f"{n} {estado}" for estado, n in sorted(progreso.items())))
+            previo = progreso
+        if procesos and all(p.poll() is not None for p in procesos):
+            print("   [!] Terminaron todos los workers locales con shards sin terminar")
+            return False
+        if cola.leases_vigentes(corrida):
+            con_worker = time.time()
+        elif time.time() - con_worker > sin_workers_seg:
+            print(f"   [!] {sin_workers_seg:g}s sin ningún worker con lease vigente: se abandona la corrida")
+            return False
+        time.sleep(COLA_ESPERA_SEG)
+    print("   -> Shards: " + ", ".join(f"{n} {estado}" for estado, n in sorted(cola.progreso(corrida).items())))
+    return True
+
+
+def coordinar(resume=False, incremental=False, particion=COLA_PARTICION, tamano=COLA_TAMANO_SHARD,
+              workers_locales=0, formatos=EXPORT_FORMATOS, reporte=REPORTE_JSON):
+    """
+    Publica la corrida en la cola, espera a los workers y exporta (ver cabecera).
+    Devuelve False si no se pudo bajar Radio-Browser o si la corrida terminó
+    incompleta (ver _esperar_corrida).
+    """
+    import socket
+    from version10 import descargar_estaciones, seleccionar_pendientes
+    from distribuido.cola import ColaShards, particionar
+    from estado.almacen import AlmacenEstado, clave_estacion, STATUS_OK, STATUS_ERROR
+    from exportacion.exportador import ExportacionOrdenada, abrir_escritores
+    from instrumentacion.tiempos import TIEMPOS
+    from slugs.slugs import REGISTRO_SLUGS
+
+    TIEMPOS.reiniciar()
+    print("=== ETL RADIO V10: COORDINADOR ===")
+    batch = descargar_estaciones()
+    if batch is None:
+        return False
+
+    almacen = AlmacenEstado()
+    pendientes, hechos = seleccionar_pendientes(batch, almacen, resume, incremental)
+    REGISTRO_SLUGS.cerrar()  # slugs reservados ya en disco, a la vista de los workers
+
+    cola = ColaShards()
+    shards = particionar(pendientes, clave_estacion, particion, tamano)
+    corrida = cola.publicar(shards)
+    print(f"3. Corrida {corrida}: {len(pendientes)} estaciones en {len(shards)} shards "
+          f"(partición por {particion}) en {cola.path}")
+
+    procesos = [lanzar_worker(f"{socket.gethostname()}-local{i}") for i in range(workers_locales)]
+    if not procesos:
+        print("   -> Esperando workers (python cli.py worker)...")
+    try:
+        with TIEMPOS.medir("distribuido"):
+            completa = _esperar_corrida(cola, corrida, procesos)
+    except BaseException:
+        for p in procesos:
+            p.terminate()
+        raise
+    cola.cerrar_corrida(corrida)
+    for p in procesos:
+        p.wait()
+
+    # Filas de los workers al almacén del coordinador (--resume / --incremental siguen
+    # funcionando) y export en el orden de Radio-Browser
+    resultados = cola.resultados(corrida)
+    archivos = ", ".join(f"{EXPORT_NOMBRE}.{f}" for f in formatos)
+    exportacion = ExportacionOrdenada(abrir_escritores(formatos), [clave_estacion(st) for st in batch])
+    for clave, item in hechos.items():
+        exportacion.listo(clave, item)
+    almacen.al_guardar = exportacion.listo
+    sin_resultado = 0
+    for st in pendientes:
+        clave = clave_estacion(st)
+        if clave in resultados:
+            status, item, error, firma = resultados[clave]
+            if status == STATUS_ERROR:
+                almacen.guardar_fallo(clave, error, item, firma)  # conserva la fila buena previa
+            else:
+                almacen.guardar(clave, status, item, error, firma)
+        else:
+            sin_resultado += 1
+            almacen.guardar_fallo(clave, "sin resultado de los workers")
+    almacen.al_guardar = None
+    escritas = exportacion.cerrar(almacen.items)
+
+    fallidos = cola.fallidos(corrida)
+    for shard_id, error in fallidos:
+        print(f"   [!] Shard {shard_id} fallido: {error}")
+    conteo = almacen.conteo()
+    print(f"   -> Estado: {conteo.get(STATUS_OK, 0)} OK, {conteo.get(STATUS_ERROR, 0)} con error "
+          f"({sin_resultado} sin resultado; reintentables con --resume)")
+    almacen.cerrar()
+    progreso = cola.progreso(corrida)
+    cola.cerrar()
+
+    print(f"4. Export: {escritas} filas en {archivos}")
+    print(TIEMPOS.resumen())
+    if reporte:
+        TIEMPOS.guardar_reporte(reporte, {
+            "parametros": {"resume": resume, "incremental": incremental, "particion": particion,
+                           "tamano_shard": tamano, "workers_locales": workers_locales, "formatos": formatos},
+            "estaciones": {"lote": len(batch), "procesadas": len(pendientes), "estado": conteo,
+                           "sin_resultado": sin_resultado},
+            "distribuido": {"corrida": corrida, "shards": progreso, "completa": completa,
+                            "fallidos": [{"shard": i, "error": e} for i, e in fallidos]},
+            "export": {"filas": escritas, "archivos": archivos},
+        })
+        print(f"   -> Reporte de la corrida en {reporte}")
+    if sin_resultado or not completa:
+        print("[!] Corrida distribuida incompleta: exportada con errores (reintentables con --resume).")
+        return False
+    print("¡MISIÓN CUMPLIDA! Corrida distribuida exportada.")
+    return True
+
+
+def procesar_shard(cola, shard, worker, fcc_db, concurrency, catalogo, imagenes, etapa_logos):
+    from version10 import procesar_lote
+    from distribuido.cola import AlmacenCola
+    from estado.almacen import clave_estacion
+    from instrumentacion.tiempos import TIEMPOS
+    reportadas = cola.reportadas(shard["corrida"], (clave_estacion(st) for st in shard["estaciones"]))
+    estaciones = [st for st in shard["estaciones"] if clave_estacion(st) not in reportadas]
+    print(f"[{worker}] Shard {shard['id']} (intento {shard['intentos']}): {len(estaciones)} estaciones"
+          + (f", {len(reportadas)} ya reportadas" if reportadas else ""))
+    latido = Latido(cola, shard["id"], worker)
+    try:
+        procesar_lote(estaciones, fcc_db, AlmacenCola(cola, shard["corrida"], worker),
+                      concurrency, catalogo, imagenes, etapa_logos)
+        if etapa_logos is not None:
+            etapa_logos.esperar()  # el shard termina cuando todas sus filas tienen logo
+    except Exception as e:
+        print(f"   [ERROR] Shard {shard['id']} falló: {e}")
+        cola.liberar(shard["id"], worker, str(e))
+        return False
+    finally:
+        latido.detener()
+    if not cola.completar(shard["id"], worker):
+        print(f"   [!] Shard {shard['id']} terminado tras perder el lease (sus filas quedan reportadas)")
+    TIEMPOS.contar("shards")
+    return True
+
+
+def trabajar(nombre=None, concurrency=CONCURRENCIA, logo_workers=LOGOS_WORKERS, catalogo=ORB_CATALOGO_ACTIVO,
+             imagenes=LOGOS_ACTIVOS, persistente=False):
+    """
+    Toma shards hasta que no quede ninguno en las corridas activas
+    (con `persistente`, sigue esperando corridas nuevas).
+    """
+    import socket
+    from version10 import crear_carpeta, etapa_de_logos, cerrar_etapa_de_logos
+    from distribuido.cola import ColaShards
+    from instrumentacion.tiempos import TIEMPOS
+    from red import cliente
+    from slugs.slugs import REGISTRO_SLUGS
+    from scrapers.indiceFcc import cargar_indice_fcc
+    from scrapers.resolucionOrb import RESOLUCION
+    from red.cache import CACHE
+
+    TIEMPOS.reiniciar()
+    worker = nombre or f"{socket.gethostname()}-{os.getpid()}"
+    print(f"=== ETL RADIO V10: WORKER {worker} ===")
+    cola = ColaShards()
+    fcc_db, etapa_logos = None, None
+    try:
+        while True:
+            shard = cola.tomar(worker)
+            if shard is None:
+                if persistente or cola.quedan():
+                    time.sleep(COLA_ESPERA_SEG)
+                    continue
+                break
+            if fcc_db is None:  # índice FCC y pool de logos recién con el primer shard
+                crear_carpeta()
+                with TIEMPOS.medir("fcc_carga"):
+                    fcc_db = cargar_indice_fcc()
+                etapa_logos = etapa_de_logos(logo_workers, imagenes)
+            procesar_shard(cola, shard, worker, fcc_db, concurrency, catalogo, imagenes, etapa_logos)
+    finally:
+        cerrar_etapa_de_logos(etapa_logos)
+        RESOLUCION.cerrar()
+        REGISTRO_SLUGS.cerrar()
+        cola.cerrar()
+
+    print(f"[{worker}] Sin shards pendientes.")
+    print(CACHE.resumen())
+    print(RESOLUCION.resumen())
+    print(cliente.METRICAS.resumen())
+    print(TIEMPOS.resumen())
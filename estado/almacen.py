@@ -0,0 +1,129 @@
+import json
+import sqlite3
+import threading
+import time
+
+from config import ESTADO_DB
+
+# ================= ALMACÉN DE ESTADO POR ESTACIÓN (SQLite) =================
+# Checkpoint durable: cada estación procesada se guarda al terminar,
+# así un crash no pierde el trabajo hecho y `--resume` continúa donde quedó.
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS estaciones (
+    stationuuid TEXT PRIMARY KEY,
+    status TEXT NOT NULL,          -- 'ok' | 'error'
+    item TEXT,                     -- fila final (JSON), si se pudo construir
+    error TEXT,
+    updated_at REAL NOT NULL,
+    firma TEXT                     -- marcador de cambio de Radio-Browser (modo incremental)
+)
+"""
+
+STATUS_OK = "ok"
+STATUS_ERROR = "error"
+
+
+def clave_estacion(st):
+    """Identidad estable de una estación de Radio-Browser."""
+    return st.get('stationuuid') or st.get('name', '').strip()
+
+
+def firma_estacion(st):
+    """Marcador de cambio de Radio-Browser: cambia cuando la estación se edita."""
+    return "|".join(str(st.get(k) or '') for k in ('changeuuid', 'lastchangetime_iso8601', 'lastchangetime'))
+
+
+class AlmacenEstado:
+    def __init__(self, path=ESTADO_DB):
+        self.path = path
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute(_SCHEMA)
+        # Almacenes creados antes del modo incremental no tienen la columna firma
+        columnas = [c[1] for c in self.conn.execute("PRAGMA table_info(estaciones)")]
+        if 'firma' not in columnas:
+            self.conn.execute("ALTER TABLE estaciones ADD COLUMN firma TEXT")
+        self.conn.commit()
+        self.al_guardar = None  # callback(stationuuid, item) tras cada checkpoint (export en streaming)
+
+    def guardar(self, uuid, status, item=None, error=None, firma=None):
+        with self.lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO estaciones (stationuuid, status, item, error, updated_at, firma) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (uuid, status, json.dumps(item, ensure_ascii=False) if item is not None else None,
+                 error, time.time(), firma))
+            self.conn.commit()
+        if self.al_guardar is not None:
+            self.al_guardar(uuid, item)
+
+    def guardar_fallo(self, uuid, error, item=None, firma=None):
+        """
+        Estación que falló (ORB por red/HTTP o una excepción). Si ya tenía una fila
+        guardada, se conserva junto con su firma y solo cambian status y error: un
+        fallo pasajero no borra el último dato bueno, y el status 'error' hace que
+        --resume / --incremental la reintenten. Si no tenía, se guarda `item`
+        (fila parcial o None).
+        """
+        with self.lock:
+            previo = self.conn.execute("SELECT item FROM estaciones WHERE stationuuid = ? AND item IS NOT NULL",
+                                       (uuid,)).fetchone()
+            if previo:
+                self.conn.execute("UPDATE estaciones SET status = ?, error = ?, updated_at = ? WHERE stationuuid = ?",
+                                  (STATUS_ERROR, error, time.time(), uuid))
+                item = json.loads(previo[0])
+            else:
+                self.conn.execute(
+                    "INSERT OR REPLACE INTO estaciones (stationuuid, status, item, error, updated_at, firma) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    (uuid, STATUS_ERROR, json.dumps(item, ensure_ascii=False) if item is not None else None,
+                     error, time.time(), firma))
+            self.conn.commit()
+        if self.al_guardar is not None:
+            self.al_guardar(uuid, item)
+
+    def completados(self):
+        """dict stationuuid -> item de las estaciones terminadas OK."""
+        with self.lock:
+            rows = self.conn.execute(
+                "SELECT stationuuid, item FROM estaciones WHERE status = ? AND item IS NOT NULL",
+                (STATUS_OK,)).fetchall()
+        return {uuid: json.loads(item) for uuid, item in rows}
+
+    def vigentes(self, batch, max_edad):
+        """
+        dict stationuuid -> item de las estaciones de `batch` que no necesitan reprocesarse:
+        terminadas OK, con la misma firma de Radio-Browser y procesadas hace menos de `max_edad` seg.
+        """
+        with self.lock:
+            rows = self.conn.execute(
+                "SELECT stationuuid, item, firma, updated_at FROM estaciones "
+                "WHERE status = ? AND item IS NOT NULL", (STATUS_OK,)).fetchall()
+        previos = {uuid: (item, firma, ts) for uuid, item, firma, ts in rows}
+        limite = time.time() - max_edad
+        vigentes = {}
+        for st in batch:
+            clave = clave_estacion(st)
+            prev = previos.get(clave)
+            if prev and prev[1] == firma_estacion(st) and prev[2] >= limite:
+                vigentes[clave] = json.loads(prev[0])
+        return vigentes
+
+    def items(self, claves):
+        """dict stationuuid -> fila guardada (OK o con error parcial) de las `claves` pedidas."""
+        claves = set(claves)
+        with self.lock:
+            rows = self.conn.execute(
+                "SELECT stationuuid, item FROM estaciones WHERE item IS NOT NULL").fetchall()
+        return {k: json.loads(item) for k, item in rows if k in claves}
+
+    def conteo(self):
+        with self.lock:
+            return dict(self.conn.execute(
+                "SELECT status, COUNT(*) FROM estaciones GROUP BY status").fetchall())
+
+    def cerrar(self):
+        with self.lock:
+            self.conn.close()
@@ -0,0 +1,281 @@
+import csv
+import json
+import re
+import threading
+
+from config import EXPORT_NOMBRE, EXPORT_CHUNK_FILAS
+from instrumentacion.tiempos import TIEMPOS
+
+# ================= EXPORTACIÓN EN STREAMING =================
+# Las filas se escriben a medida que terminan las estaciones, en el orden de
+# Radio-Browser, sin armar un DataFrame con todo el lote:
+#   - CSV y JSONL: se vuelcan a disco cada EXPORT_CHUNK_FILAS filas (parciales legibles).
+#   - XLSX: openpyxl en modo write-only (memoria constante; el archivo se cierra al final).
+#   - Parquet: un row group por chunk (el footer se escribe al cerrar), con
+#     esquema tipado (ver ESQUEMA_PARQUET): lectura sin parseo y por columnas.
+# El orden lo garantiza un buffer de reordenamiento: una fila se emite cuando
+# todas las anteriores del lote ya terminaron (o fallaron sin fila).
+
+# Esquema de salida (orden de columnas del export)
+COLUMNAS = [
+    "orb_url",
+    "title",
+    "slug",
+    "broadcastFrequency",
+    "broadcastFrequencyValue",
+    "broadcastSignalModulation",
+    "slogan",
+    "imagen",
+    "imagenurl",
+    "tags",
+    "web",
+    "address",
+    "country",
+    "state",
+    "city",
+    "postalcode",
+    "geo_lat",
+    "geo_long",
+    "geo_distance",
+    "telephone",
+    "email",
+    "facebook",
+    "instagram",
+    "red_x",
+    "tiktok",
+    "youtube",
+    "playstore",
+    "language",
+    "content",
+    "about_type",
+]
+
+
+def _valores(item, columnas):
+    return [item.get(c) for c in columnas]
+
+
+# ================= ESQUEMA PARQUET =================
+# Tipos explícitos para que los loaders no re-parseen:
+#   frecuencia float32 (null = Stream), coordenadas float64 (FCC trae float,
+#   Radio-Browser texto), modulación/about_type/estado como categóricas
+#   (dictionary) y tags como lista. El resto, texto.
+
+NUMERO_INICIAL = re.compile(r'\s*(-?\d+(?:[.,]\d+)?)')
+
+
+def _a_float(v):
+    """Número (también el inicial de "90.5 FM") o None ("Stream", "", texto no numérico)."""
+    if v is None or isinstance(v, bool): return None
+    if isinstance(v, (int, float)):
+        return None if v != v else float(v)
+    m = NUMERO_INICIAL.match(str(v))
+    return float(m.group(1).replace(',', '.')) if m else None
+
+
+def _a_lista(v):
+    """'rock, news' -> ['rock', 'news'] (None si no hay tags)."""
+    if v is None: return None
+    if isinstance(v, (list, tuple)): partes = v
+    else: partes = str(v).split(',')
+    tags = [str(t).strip() for t in partes if str(t).strip()]
+    return tags or None
+
+
+def _a_texto(v):
+    if v is None or (isinstance(v, float) and v != v): return None
+    return v if isinstance(v, str) else str(v)
+
+
+# columna -> (tipo, conversión). Las que no están son texto.
+TIPOS_PARQUET = {
+    "broadcastFrequencyValue": ("float32", _a_float),
+    "broadcastSignalModulation": ("categoria", _a_texto),
+    "state": ("categoria", _a_texto),
+    "about_type": ("categoria", _a_texto),
+    "geo_lat": ("float64", _a_float),
+    "geo_long": ("float64", _a_float),
+    "geo_distance": ("float64", _a_float),
+    "tags": ("lista", _a_lista),
+}
+
+
+def esquema_parquet(pa, columnas=COLUMNAS):
+    tipos = {
+        "float32": pa.float32(), "float64": pa.float64(),
+        "categoria": pa.dictionary(pa.int32(), pa.string()),
+        "lista": pa.list_(pa.string()), "texto": pa.string(),
+    }
+    return pa.schema([(c, tipos[TIPOS_PARQUET.get(c, ("texto",))[0]]) for c in columnas])
+
+
+# ================= ESCRITORES =================
+
+class _EscritorTexto:
+    """CSV/JSONL: una línea por fila, volcada a disco cada `chunk` filas."""
+
+    def __init__(self, path, columnas=COLUMNAS, chunk=EXPORT_CHUNK_FILAS):
+        self.f = open(path, "w", newline="", encoding="utf-8")
+        self.columnas, self.chunk, self.pendientes = columnas, chunk, 0
+        self._cabecera()
+
+    def _cabecera(self):
+        pass
+
+    def escribir(self, item):
+        self._fila(_valores(item, self.columnas))
+        self.pendientes += 1
+        if self.pendientes >= self.chunk:
+            self.f.flush()
+            self.pendientes = 0
+
+    def cerrar(self):
+        self.f.close()
+
+
+class EscritorCsv(_EscritorTexto):
+    extension = "csv"
+
+    def _cabecera(self):
+        self.w = csv.writer(self.f)
+        self.w.writerow(self.columnas)
+
+    def _fila(self, valores):
+        self.w.writerow(["" if v is None else v for v in valores])
+
+
+class EscritorJsonl(_EscritorTexto):
+    extension = "jsonl"
+
+    def _fila(self, valores):
+        self.f.write(json.dumps(dict(zip(self.columnas, valores)), ensure_ascii=False) + "\n")
+
+
+class EscritorXlsx:
+    extension = "xlsx"
+
+    def __init__(self, path, columnas=COLUMNAS, chunk=EXPORT_CHUNK_FILAS):
+        from openpyxl import Workbook
+        from openpyxl.cell.cell import ILLEGAL_CHARACTERS_RE
+        self.ilegales = ILLEGAL_CHARACTERS_RE
+        self.path, self.columnas = path, columnas
+        self.wb = Workbook(write_only=True)
+        self.ws = self.wb.create_sheet()
+        self.ws.append(columnas)
+
+    def escribir(self, item):
+        # Caracteres de control que XLSX no admite (p. ej. en descripciones de ORB)
+        self.ws.append([self.ilegales.sub("", v) if isinstance(v, str) else v
+                        for v in _valores(item, self.columnas)])
+
+    def cerrar(self):
+        self.wb.save(self.path)
+
+
+class EscritorParquet:
+    extension = "parquet"
+
+    def __init__(self, path, columnas=COLUMNAS, chunk=EXPORT_CHUNK_FILAS):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise RuntimeError("El export Parquet requiere pyarrow (pip install pyarrow)")
+        self.pa, self.columnas, self.chunk = pa, columnas, chunk
+        self.schema = esquema_parquet(pa, columnas)
+        self.w = pq.ParquetWriter(path, self.schema)
+        self.buffer = []
+
+    def escribir(self, item):
+        self.buffer.append(item)
+        if len(self.buffer) >= self.chunk:
+            self._volcar()
+
+    def _volcar(self):
+        if not self.buffer: return
+        arrays = []
+        for campo in self.schema:
+            convertir = TIPOS_PARQUET.get(campo.name, (None, _a_texto))[1]
+            valores = [convertir(it.get(campo.name)) for it in self.buffer]
+            if self.pa.types.is_dictionary(campo.type):
+                arrays.append(self.pa.array(valores, self.pa.string()).dictionary_encode().cast(campo.type))
+            else:
+                arrays.append(self.pa.array(valores, campo.type))
+        self.w.write_table(self.pa.Table.from_arrays(arrays, schema=self.schema))
+        self.buffer = []
+
+    def cerrar(self):
+        self._volcar()
+        self.w.close()
+
+
+ESCRITORES = {e.extension: e for e in (EscritorXlsx, EscritorCsv, EscritorJsonl, EscritorParquet)}
+
+
+def abrir_escritores(formatos, nombre=EXPORT_NOMBRE, columnas=COLUMNAS):
+    """Un escritor por formato ('xlsx', 'csv', 'jsonl', 'parquet') en <nombre>.<formato>."""
+    desconocidos = [f for f in formatos if f not in ESCRITORES]
+    if desconocidos:
+        raise ValueError(f"Formatos de export desconocidos: {', '.join(desconocidos)} "
+                         f"(disponibles: {', '.join(ESCRITORES)})")
+    escritores = []
+    try:
+        for f in formatos:
+            escritores.append(ESCRITORES[f](f"{nombre}.{f}", columnas))
+    except Exception:
+        for e in escritores: e.cerrar()
+        raise
+    return escritores
+
+
+# ================= EXPORT EN ORDEN =================
+
+class ExportacionOrdenada:
+    """
+    Recibe filas en cualquier orden (`listo`) y las escribe en el orden de `claves`.
+    Una clave sin fila (estación fallida) se salta al llegar su turno.
+    """
+
+    def __init__(self, escritores, claves):
+        self.escritores = escritores
+        self.claves = list(claves)
+        self.posiciones = {}  # clave -> posiciones (una estación repetida sale en cada una)
+        for i, c in enumerate(self.claves):
+            self.posiciones.setdefault(c, []).append(i)
+        self.buffer = {}   # posición -> item (o None) que espera a las anteriores
+        self.siguiente = 0
+        self.escritas = 0
+        self.lock = threading.Lock()
+
+    def listo(self, clave, item):
+        with self.lock:
+            for i in self.posiciones.get(clave, ()):
+                if i >= self.siguiente:  # las ya emitidas no se reescriben
+                    self.buffer[i] = item
+            self._emitir()
+
+    def _emitir(self):
+        while self.siguiente in self.buffer:
+            item = self.buffer.pop(self.siguiente)
+            self.siguiente += 1
+            if item is None: continue
+            with TIEMPOS.medir("export"):
+                for e in self.escritores:
+                    e.escribir(item)
+            self.escritas += 1
+
+    def cerrar(self, restantes=None):
+        """
+        Completa las posiciones que nunca se reportaron con `restantes(claves)` -> dict
+        clave -> item (p. ej. lo último guardado en el almacén) y cierra los archivos.
+        """
+        with self.lock:
+            faltan = [i for i in range(self.siguiente, len(self.claves)) if i not in self.buffer]
+            items = restantes([self.claves[i] for i in faltan]) if restantes and faltan else {}
+            for i in faltan:
+                self.buffer[i] = items.get(self.claves[i])
+            self._emitir()
+            with TIEMPOS.medir("export"):
+                for e in self.escritores:
+                    e.cerrar()
+        return self.escritas
@@ -0,0 +1,220 @@
+import hashlib
+import os
+import shutil
+import sqlite3
+import threading
+import time
+from collections import defaultdict
+from urllib.parse import urlparse
+
+from config import LOGOS_MANIFIESTO_DB, LOGOS_REINTENTO_NEGATIVO
+from red import cliente
+from instrumentacion.tiempos import TIEMPOS
+
+# ================= ALMACÉN DE LOGOS DIRECCIONADO POR CONTENIDO =================
+# Cada logo se descarga una vez por URL y se renderiza una vez por SHA-256 de sus bytes:
+#   <carpeta>/por_hash/<sha>.jpg   -> render final (único por contenido)
+#   <carpeta>/<slug>.jpg           -> symlink (o hardlink/copia) al render
+# El manifiesto (SQLite) guarda url -> sha, sha -> render, slug -> sha y los
+# resultados negativos (404/410, imagen inválida) con su fecha de reintento;
+# un 429/5xx/403 es transitorio y se vuelve a intentar en la próxima corrida.
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS urls (
+    url TEXT PRIMARY KEY,
+    sha256 TEXT,
+    error TEXT,
+    retry_after REAL,
+    updated_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS renders (
+    sha256 TEXT PRIMARY KEY,
+    path TEXT,
+    ok INTEGER NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS slugs (
+    slug TEXT PRIMARY KEY,
+    sha256 TEXT NOT NULL,
+    updated_at REAL NOT NULL
+);
+"""
+
+LISTO = "listo"      # (LISTO, path_o_None): no hace falta render
+RENDER = "render"    # (RENDER, sha, path_crudo, path_render): falta renderizar
+
+# Únicas respuestas que marcan negativo (además de la imagen inválida); el resto no se recuerda
+STATUS_NEGATIVOS = (404, 410)
+
+
+class AlmacenLogos:
+    def __init__(self, carpeta, db=LOGOS_MANIFIESTO_DB):
+        self.carpeta = carpeta
+        self.carpeta_hash = os.path.join(carpeta, "por_hash")
+        os.makedirs(self.carpeta_hash, exist_ok=True)
+        self.lock = threading.Lock()
+        self._locks = defaultdict(threading.Lock)
+        self.conn = sqlite3.connect(db, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript(_SCHEMA)
+        self.conn.commit()
+        self.stats = {"descargas": 0, "dedup": 0, "negativos": 0}
+
+    # ---------- Manifiesto ----------
+
+    def _uno(self, sql, args):
+        with self.lock:
+            return self.conn.execute(sql, args).fetchone()
+
+    def _escribir(self, sql, args):
+        with self.lock:
+            self.conn.execute(sql, args)
+            self.conn.commit()
+
+    def lock_clave(self, clave):
+        """Lock por URL/sha: dos estaciones con el mismo logo no lo bajan ni renderizan dos veces."""
+        with self.lock:
+            return self._locks[clave]
+
+    def _contar(self, clave):
+        with self.lock:
+            self.stats[clave] += 1
+
+    def render_de(self, sha):
+        """(ok, path) del render de `sha`, o None si aún no se renderizó."""
+        row = self._uno("SELECT ok, path FROM renders WHERE sha256 = ?", (sha,))
+        if row and row[0] and not os.path.exists(row[1]):
+            return None  # borraron el archivo -> re-render
+        return (bool(row[0]), row[1]) if row else None
+
+    def marcar_negativo(self, url, error):
+        self._contar("negativos")
+        self._escribir("INSERT OR REPLACE INTO urls VALUES (?, NULL, ?, ?, ?)",
+                       (url, error, time.time() + LOGOS_REINTENTO_NEGATIVO, time.time()))
+
+    def registrar_render(self, sha, path, ok):
+        self._escribir("INSERT OR REPLACE INTO renders VALUES (?, ?, ?, ?)",
+                       (sha, path if ok else None, 1 if ok else 0, time.time()))
+
+    # ---------- Slugs ----------
+
+    def path_slug(self, slug):
+        return os.path.join(self.carpeta, f"{slug}.jpg")
+
+    def enlazar(self, slug, sha):
+        """Apunta <slug>.jpg al render de `sha` (symlink relativo; si no se puede, hardlink o copia)."""
+        destino = self.path_slug(slug)
+        render = os.path.join(self.carpeta_hash, f"{sha}.jpg")
+        previo = self._uno("SELECT sha256 FROM slugs WHERE slug = ?", (slug,))
+        if previo and previo[0] == sha and os.path.exists(destino):
+            return destino
+
+        tmp = f"{destino}.tmp{threading.get_ident()}"
+        try:
+            os.symlink(os.path.relpath(render, self.carpeta), tmp)
+        except (OSError, NotImplementedError):
+            try:
+                os.link(render, tmp)
+            except OSError:
+                shutil.copyfile(render, tmp)
+        os.replace(tmp, destino)
+        self._escribir("INSERT OR REPLACE INTO slugs VALUES (?, ?, ?)", (slug, sha, time.time()))
+        return destino
+
+    # ---------- Flujo principal ----------
+
+    def preparar(self, url, slug):
+        """
+        Resuelve el logo de `slug` desde `url` sin renderizar.
+        Retorna (LISTO, path_o_None) o (RENDER, sha, path_crudo, path_render).
+        """
+        if not url:
+            return LISTO, None
+
+        with self.lock_clave(url):
+            row = self._uno("SELECT sha256, error, retry_after FROM urls WHERE url = ?", (url,))
+            if row and row[1] and row[2] and row[2] > time.time():
+                return LISTO, None  # negativo vigente (404, imagen inválida)
+
+            sha = row[0] if row else None
+            if sha is None and not row and os.path.isfile(self.path_slug(slug)) \
+                    and not os.path.islink(self.path_slug(slug)):
+                return LISTO, self.path_slug(slug)  # render previo al almacén
+
+            crudo = None
+            if sha is not None:
+                self._contar("dedup")
+                render = self.render_de(sha)
+                if render:
+                    return self._listo(url, slug, sha, render)
+                crudo = self._path_crudo(sha, url)
+                if os.path.exists(crudo):
+                    return RENDER, sha, crudo, self._path_render(sha)
+
+            # Descargar (una vez por URL)
+            try:
+                with TIEMPOS.medir("logo_descarga"):
+                    r = cliente.get(url, headers={"User-Agent": "Mozilla/5.0"}, timeout=15)
+            except Exception as e:
+                print(f"Error descarga {slug}: {e}")
+                return LISTO, None  # error transitorio: no se registra negativo
+            if r.status_code in STATUS_NEGATIVOS:
+                self.marcar_negativo(url, f"HTTP {r.status_code}")
+                return LISTO, None
+            if r.status_code != 200:
+                # 429/5xx/403 tras agotar los reintentos del cliente: transitorio, como la excepción
+                print(f"Error descarga {slug}: HTTP {r.status_code}")
+                return LISTO, None
+
+            self._contar("descargas")
+            sha = hashlib.sha256(r.content).hexdigest()
+            self._escribir("INSERT OR REPLACE INTO urls VALUES (?, ?, NULL, NULL, ?)", (url, sha, time.time()))
+
+            render = self.render_de(sha)
+            if render:  # mismo contenido ya renderizado desde otra URL
+                return self._listo(url, slug, sha, render)
+
+            crudo = self._path_crudo(sha, url)
+            if not os.path.exists(crudo):
+                with open(crudo + ".part", "wb") as f:
+                    f.write(r.content)
+                os.replace(crudo + ".part", crudo)
+            return RENDER, sha, crudo, self._path_render(sha)
+
+    def completar(self, url, slug, sha, ok):
+        """Tras el render: enlaza el slug o registra la imagen como inválida."""
+        if ok:
+            return self.enlazar(slug, sha)
+        self.marcar_negativo(url, "imagen inválida")
+        return None
+
+    def _listo(self, url, slug, sha, render):
+        ok, _ = render
+        if not ok:
+            self.marcar_negativo(url, "imagen inválida")
+            return LISTO, None
+        return LISTO, self.enlazar(slug, sha)
+
+    def _path_crudo(self, sha, url):
+        ext = os.path.splitext(urlparse(url).path)[1] or ".jpg"
+        return os.path.join(self.carpeta_hash, f"{sha}.crudo{ext}")
+
+    def _path_render(self, sha):
+        return os.path.join(self.carpeta_hash, f"{sha}.jpg")
+
+    def resumen(self):
+        s = self.stats
+        return (f"Almacén de logos: {s['descargas']} descargas, {s['dedup']} reutilizados por URL, "
+                f"{s['negativos']} negativos registrados")
+
+
+_ALMACENES = {}
+_ALMACENES_LOCK = threading.Lock()
+
+
+def almacen_para(carpeta):
+    """Almacén compartido por carpeta de salida."""
+    with _ALMACENES_LOCK:
+        if carpeta not in _ALMACENES:
+            _ALMACENES[carpeta] = AlmacenLogos(carpeta)
+        return _ALMACENES[carpeta]
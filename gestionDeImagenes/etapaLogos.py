@@ -0,0 +1,109 @@
+import multiprocessing
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from config import LOGOS_WORKERS, LOGOS_COLA_MAX, LOGOS_MP_CONTEXT
+from gestionDeImagenes.gestionImagen import renderizar_logo
+from gestionDeImagenes.almacenLogos import almacen_para, LISTO
+from instrumentacion.tiempos import TIEMPOS
+
+# ================= ETAPA DE LOGOS (PROCESS POOL) =================
+# El scraping solo descarga el logo crudo y encola (temp, final).
+# El pipeline Pillow corre en un ProcessPoolExecutor usando todos los núcleos.
+# La cola está acotada: si hay LOGOS_COLA_MAX trabajos pendientes, enviar() espera.
+# Con el almacén por contenido cada SHA se renderiza una sola vez: las estaciones
+# que comparten logo se suman como espera del render en vuelo.
+
+
+def _renderizar_cronometrado(path_crudo, path_render):
+    """renderizar_logo en el proceso hijo + su duración (sin la espera en la cola del pool)."""
+    t0 = time.perf_counter()
+    return renderizar_logo(path_crudo, path_render), time.perf_counter() - t0
+
+
+class EtapaLogos:
+    def __init__(self, output_folder, workers=LOGOS_WORKERS, max_pendientes=LOGOS_COLA_MAX):
+        self.output_folder = output_folder
+        self.almacen = almacen_para(output_folder)
+        self.en_vuelo = {}  # sha -> [(url, slug, al_terminar)]
+        # 'spawn' evita forkear un proceso con hilos de red vivos
+        self.pool = ProcessPoolExecutor(max_workers=workers,
+                                        mp_context=multiprocessing.get_context(LOGOS_MP_CONTEXT))
+        self.cupo = threading.BoundedSemaphore(max_pendientes)
+        self.lock = threading.Lock()
+        self.sin_pendientes = threading.Condition(self.lock)
+        self.pendientes = 0  # renders encolados cuyo callback no terminó
+        self.stats = {"encolados": 0, "ok": 0, "fallidos": 0, "cache": 0}
+
+    def _contar(self, clave):
+        with self.lock:
+            self.stats[clave] += 1
+
+    def enviar(self, url, slug, al_terminar):
+        """
+        Descarga el logo (en el hilo que llama) y encola el render.
+        `al_terminar(path_o_None)` se llama cuando el logo está listo (o falló).
+        """
+        res = self.almacen.preparar(url, slug)
+        if res[0] == LISTO:
+            self._contar("cache" if res[1] else "fallidos")
+            al_terminar(res[1])
+            return
+        _, sha, path_crudo, path_render = res
+
+        with self.lock:
+            esperando = self.en_vuelo.get(sha)
+            if esperando is not None:  # mismo contenido ya en el pool
+                esperando.append((url, slug, al_terminar))
+                return
+            render = self.almacen.render_de(sha)
+            if render is None:
+                self.en_vuelo[sha] = [(url, slug, al_terminar)]
+        if render is not None:  # terminó justo antes de tomar el lock
+            self._contar("cache")
+            al_terminar(self.almacen.completar(url, slug, sha, render[0]))
+            return
+
+        self.cupo.acquire()  # cola acotada -> memoria y temporales planos
+        self._contar("encolados")
+        with self.lock:
+            self.pendientes += 1
+        futuro = self.pool.submit(_renderizar_cronometrado, path_crudo, path_render)
+
+        def listo(f):
+            self.cupo.release()
+            try:
+                res, segundos = f.result()
+                TIEMPOS.registrar("logo_render", segundos)
+                ok = res is not None
+            except Exception as e:
+                print(f"Error procesando imagen {slug}: {e}")
+                ok = False
+            self._contar("ok" if ok else "fallidos")
+            self.almacen.registrar_render(sha, path_render, ok)
+            with self.lock:
+                esperando = self.en_vuelo.pop(sha)
+            try:
+                for w_url, w_slug, w_cb in esperando:
+                    w_cb(self.almacen.completar(w_url, w_slug, sha, ok))
+            finally:
+                with self.lock:
+                    self.pendientes -= 1
+                    self.sin_pendientes.notify_all()
+
+        futuro.add_done_callback(listo)
+
+    def esperar(self):
+        """Espera a que terminen los renders encolados (y sus callbacks); el pool sigue abierto."""
+        with self.lock:
+            self.sin_pendientes.wait_for(lambda: self.pendientes == 0)
+
+    def cerrar(self):
+        """Espera a que terminen todos los renders pendientes."""
+        self.pool.shutdown(wait=True)
+
+    def resumen(self):
+        s = self.stats
+        return (f"Logos: {s['encolados']} renderizados en pool ({s['ok']} OK), "
+                f"{s['cache']} ya existentes, {s['fallidos']} fallidos | {self.almacen.resumen()}")
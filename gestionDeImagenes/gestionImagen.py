@@ -1,9 +1,9 @@
 import os
-import requests
-import math
-from urllib.parse import urlparse
+import numpy as np
 from PIL import Image, ImageFilter, ImageEnhance, ImageOps, ImageStat, ImageDraw
 
+from instrumentacion.tiempos import TIEMPOS
+
 # ================= CONFIGURACIÓN DE ESTILO =================
 TARGET_SIZE = (500, 500)
 SCALE_UP_LIMIT = 1.5
@@ -17,49 +17,53 @@ BG_REQUIRED_RATIO = 0.86
 
 # ================= HERRAMIENTAS DE PROCESAMIENTO =================
 
+def _muestras_borde(arr, sample_pixels):
+    """Pixeles de borde en el mismo orden que el muestreo original:
+    por cada x (arriba, abajo) y luego por cada y (izquierda, derecha)."""
+    h, w = arr.shape[:2]
+    step_x = max(1, w // 20)
+    step_y = max(1, h // 20)
+    xs = np.arange(0, w, step_x)
+    ys = np.arange(0, h, step_y)
+    horiz = np.stack([arr[0, xs], arr[h - 1, xs]], axis=1).reshape(-1, 4)
+    vert = np.stack([arr[ys, 0], arr[ys, w - 1]], axis=1).reshape(-1, 4)
+    return np.concatenate([horiz, vert])[:sample_pixels]
+
+
 def is_solid_background(img, sample_pixels=200, tolerance=BG_DETECTION_TOLERANCE, required_ratio=BG_REQUIRED_RATIO):
     """Detecta si el fondo es sólido analizando los bordes.
     Retorna (bool, (r,g,b)) — si se detecta fondo sólido y color representativo.
     Mantiene misma firma que tu versión original."""
-    img_conv = img.convert("RGBA")
-    w, h = img_conv.size
-    pixels = img_conv.load()
-    samples = []
+    arr = np.asarray(img.convert("RGBA"))
+    samples = _muestras_borde(arr, sample_pixels)
 
-    # Muestrear bordes
-    step_x = max(1, w // 20)
-    step_y = max(1, h // 20)
-    for x in range(0, w, step_x):
-        samples.append(pixels[x, 0])
-        samples.append(pixels[x, h - 1])
-    for y in range(0, h, step_y):
-        samples.append(pixels[0, y])
-        samples.append(pixels[w - 1, y])
-
-    if len(samples) > sample_pixels:
-        samples = samples[:sample_pixels]
-
-    opaque_samples = [s for s in samples if s[3] > 10]
-    if not opaque_samples:
+    opaque = samples[samples[:, 3] > 10, :3].astype(np.int32)
+    if not len(opaque):
         return False, None  # todo transparente o sin información de borde
 
-    def rgb_no_alpha(c):
-        return (c[0], c[1], c[2])
+    # Color más común: conteo con np.unique sobre el RGB empaquetado
+    packed = (opaque[:, 0] << 16) | (opaque[:, 1] << 8) | opaque[:, 2]
+    valores, conteos = np.unique(packed, return_counts=True)
+    empatados = valores[conteos == conteos.max()]
+    if len(empatados) == 1:
+        v = int(empatados[0])
+        rep = (v >> 16, (v >> 8) & 255, v & 255)
+    else:
+        # Empate: mismo desempate que max(set(...)) -> primer empatado en el orden del set
+        candidatos = {(int(v) >> 16, (int(v) >> 8) & 255, int(v) & 255) for v in empatados}
+        rep = next(c for c in set(map(tuple, opaque.tolist())) if c in candidatos)
 
-    # Encuentra color más común
-    try:
-        rep = max(set([rgb_no_alpha(s) for s in opaque_samples]),
-                  key=lambda x: sum(1 for s in opaque_samples if rgb_no_alpha(s) == x))
-    except ValueError:
-        return False, None
+    within = np.count_nonzero(_distancia_color(opaque, rep) <= tolerance)
+    ratio = within / max(1, len(opaque))
 
-    def color_dist(a, b):
-        return math.sqrt(sum((a[i] - b[i]) ** 2 for i in range(3)))
+    return (ratio >= required_ratio), rep if (ratio >= required_ratio) else None
 
-    within = sum(1 for s in opaque_samples if color_dist(rgb_no_alpha(s), rep) <= tolerance)
-    ratio = within / max(1, len(opaque_samples))
 
-    return (ratio >= required_ratio), rep if (ratio >= required_ratio) else None
+def _distancia_color(rgb, color):
+    """Distancia euclídea por pixel. Se parte de la distancia al cuadrado (entera) y la raíz
+    es IEEE correctamente redondeada, igual que math.sqrt -> mismo resultado que la versión escalar."""
+    diff = rgb - np.asarray(color[:3], dtype=np.int32)
+    return np.sqrt((diff * diff).sum(axis=-1))
 
 
 def _replace_solid_bg_with_white(img, bg_color, tolerance=BG_DETECTION_TOLERANCE, aa_blur=AA_BLUR_ALPHA):
@@ -67,28 +71,12 @@ def _replace_solid_bg_with_white(img, bg_color, tolerance=BG_DETECTION_TOLERANCE
     preservando el antialias en los bordes (devuelve RGBA con fondo blanco)."""
     img = img.convert("RGBA")
     w, h = img.size
-    px = img.load()
-
-    # Construimos máscara basada en distancia de color al bg_color
-    mask = Image.new("L", (w, h), 255)
-    mask_px = mask.load()
-
-    def color_dist(a, b):
-        return math.sqrt(sum((a[i] - b[i]) ** 2 for i in range(3)))
-
-    for y in range(h):
-        for x in range(w):
-            r, g, b, a = px[x, y]
-            if a < 12:
-                # transparente -> no es fondo sólido visible, mantener como 'no-fondo'
-                mask_px[x, y] = 0
-            else:
-                d = color_dist((r, g, b), bg_color)
-                if d <= tolerance:
-                    # cercano al color del fondo -> marcar como fondo (255)
-                    mask_px[x, y] = 255
-                else:
-                    mask_px[x, y] = 0
+    arr = np.asarray(img)
+
+    # Máscara: 255 = fondo (cercano a bg_color), 0 = logo o transparente (alpha < 12)
+    cercano = _distancia_color(arr[..., :3].astype(np.int32), bg_color) <= tolerance
+    fondo = cercano & (arr[..., 3] >= 12)
+    mask = Image.fromarray(np.where(fondo, 255, 0).astype(np.uint8), "L")
 
     # Suavizar la máscara para preservar antialias
     mask = mask.filter(ImageFilter.GaussianBlur(radius=aa_blur))
@@ -285,53 +273,45 @@ def process_pipeline(img_path_in, img_path_out):
 
 # ================= FUNCIÓN MAESTRA PARA EL MAIN (misma firma) =================
 
-def download_and_process(url, slug, output_folder):
-    """
-    Función ÚNICA que el Main necesita llamar.
-    1. Descarga a temporal.
-    2. Procesa y guarda final.
-    3. Limpia temporal.
-    Mantiene firma y comportamiento general anterior.
-    """
-    if not url:
-        return None
+def _borrar_temp(path_temp):
+    if path_temp and os.path.exists(path_temp):
+        try:
+            os.remove(path_temp)
+        except Exception:
+            pass
 
-    # 1. Definir rutas
-    filename_final = f"{slug}.jpg"
-    path_final = os.path.join(output_folder, filename_final)
-
-    # Si ya existe la final procesada, saltar (caché)
-    if os.path.exists(path_final):
-        return path_final
-
-    # 2. Descargar archivo "crudo" (temporal)
-    parsed = urlparse(url)
-    ext = os.path.splitext(parsed.path)[1] or ".jpg"
-    path_temp = os.path.join(output_folder, f"temp_{slug}{ext}")
 
+def renderizar_logo(path_temp, path_final):
+    """Etapa de CPU: procesa el temporal y lo limpia. Se puede correr en otro proceso."""
     try:
-        r = requests.get(url, headers={"User-Agent": "Mozilla/5.0"}, timeout=15)
-        if r.status_code == 200:
-            with open(path_temp, 'wb') as f:
-                f.write(r.content)
-
-            # 3. Procesar (La magia)
-            success = process_pipeline(path_temp, path_final)
+        # 3. Procesar (La magia)
+        success = process_pipeline(path_temp, path_final)
+    finally:
+        # 4. Limpieza
+        _borrar_temp(path_temp)
+    return path_final if success else None
 
-            # 4. Limpieza
-            if os.path.exists(path_temp):
-                try:
-                    os.remove(path_temp)
-                except Exception:
-                    pass
 
-            return path_final if success else None
-
-    except Exception as e:
-        print(f"Error descarga/proceso {slug}: {e}")
-        if os.path.exists(path_temp):
-            try:
-                os.remove(path_temp)
-            except Exception:
-                pass
-        return None
+def download_and_process(url, slug, output_folder):
+    """
+    Función ÚNICA que el Main necesita llamar (modo en línea, sin pool).
+    1. Resuelve el logo en el almacén por contenido (descarga una vez por URL).
+    2. Procesa una vez por contenido (SHA-256) y enlaza {slug}.jpg.
+    Mantiene firma y comportamiento general anterior.
+    """
+    from gestionDeImagenes.almacenLogos import almacen_para, LISTO
+
+    almacen = almacen_para(output_folder)
+    res = almacen.preparar(url, slug)
+    if res[0] == LISTO:
+        return res[1]
+
+    _, sha, path_crudo, path_render = res
+    with almacen.lock_clave(sha):
+        render = almacen.render_de(sha)
+        if render is None:
+            with TIEMPOS.medir("logo_render"):
+                ok = renderizar_logo(path_crudo, path_render) is not None
+            almacen.registrar_render(sha, path_render, ok)
+            render = (ok, path_render)
+    return almacen.completar(url, slug, sha, render[0])
@@ -0,0 +1,133 @@
+import json
+import threading
+import time
+from contextlib import contextmanager
+
+from config import PERFIL_SALIDA
+
+# ================= TIEMPOS POR ETAPA =================
+# Timers y contadores livianos (thread-safe) alrededor de cada etapa del ETL:
+# carga FCC, descarga RB, limpieza de título, búsqueda/detalle ORB, parseo,
+# descarga y render de logos, clasificación y export. Al final de la corrida
+# se imprime un resumen con p50/p95/p99 por etapa y se escribe un reporte JSON.
+# Las etapas de red incluyen la espera de cortesía y el backoff, que además
+# se informan por separado ('cortesia', 'backoff').
+
+ORDEN_ETAPAS = [
+    "fcc_carga", "rb_descarga", "fcc_vinculo", "catalogo_orb", "titulo_limpieza",
+    "orb_busqueda", "orb_detalle", "orb_parseo", "cortesia", "backoff",
+    "logo_descarga", "logo_render", "clasificacion", "export",
+]
+
+
+def percentil(ordenados, p):
+    """Percentil por rango más cercano sobre una lista ya ordenada (0.0 si está vacía)."""
+    if not ordenados: return 0.0
+    idx = min(len(ordenados) - 1, int(round(p / 100 * (len(ordenados) - 1))))
+    return ordenados[idx]
+
+
+class MetricasEtapas:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.duraciones = {}   # etapa -> [segundos]
+        self.contadores = {}   # nombre -> n
+        self.inicio = time.time()
+
+    def registrar(self, etapa, segundos):
+        with self.lock:
+            self.duraciones.setdefault(etapa, []).append(segundos)
+
+    @contextmanager
+    def medir(self, etapa):
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.registrar(etapa, time.perf_counter() - t0)
+
+    def contar(self, nombre, n=1):
+        with self.lock:
+            self.contadores[nombre] = self.contadores.get(nombre, 0) + n
+
+    def reiniciar(self):
+        with self.lock:
+            self.duraciones, self.contadores = {}, {}
+            self.inicio = time.time()
+
+    def _etapas(self):
+        with self.lock:
+            copia = {e: sorted(v) for e, v in self.duraciones.items()}
+        orden = [e for e in ORDEN_ETAPAS if e in copia] + sorted(e for e in copia if e not in ORDEN_ETAPAS)
+        return [(e, copia[e]) for e in orden]
+
+    def reporte(self):
+        """dict serializable: por etapa n, total y percentiles (segundos), más los contadores."""
+        etapas = {}
+        for etapa, v in self._etapas():
+            etapas[etapa] = {
+                "n": len(v), "total": round(sum(v), 6), "media": round(sum(v) / len(v), 6),
+                "p50": round(percentil(v, 50), 6), "p95": round(percentil(v, 95), 6),
+                "p99": round(percentil(v, 99), 6), "max": round(v[-1], 6),
+            }
+        with self.lock:
+            contadores = dict(self.contadores)
+        return {"inicio": self.inicio, "duracion": round(time.time() - self.inicio, 3),
+                "etapas": etapas, "contadores": contadores}
+
+    def resumen(self):
+        lineas = [f"Tiempos por etapa ({time.time() - self.inicio:.1f}s de corrida):",
+                  f"   {'etapa':16s} {'n':>6s} {'total':>9s} {'p50':>8s} {'p95':>8s} {'p99':>8s}"]
+        for etapa, d in self.reporte()["etapas"].items():
+            lineas.append(f"   {etapa:16s} {d['n']:6d} {d['total']:8.2f}s {d['p50'] * 1e3:6.1f}ms "
+                          f"{d['p95'] * 1e3:6.1f}ms {d['p99'] * 1e3:6.1f}ms")
+        return "\n".join(lineas)
+
+    def guardar_reporte(self, path, extra=None):
+        """Escribe el reporte JSON de la corrida (`extra`: secciones adicionales, p. ej. HTTP)."""
+        datos = self.reporte()
+        datos.update(extra or {})
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(datos, f, ensure_ascii=False, indent=2)
+
+
+TIEMPOS = MetricasEtapas()
+
+
+# ================= PERFILADO (OPCIONAL) =================
+# --perfil cprofile|pyinstrument. Ambos perfilan el hilo principal: con
+# --concurrency > 1 el trabajo de los hilos del pool no aparece (usar 1).
+
+@contextmanager
+def perfilado(modo, salida=PERFIL_SALIDA):
+    if not modo:
+        yield
+        return
+    if modo == "cprofile":
+        import cProfile
+        import pstats
+        perfil = cProfile.Profile()
+        perfil.enable()
+        try:
+            yield
+        finally:
+            perfil.disable()
+            perfil.dump_stats(f"{salida}.prof")
+            print(f"   -> Perfil cProfile en {salida}.prof (top 20 por tiempo acumulado):")
+            pstats.Stats(perfil).sort_stats("cumulative").print_stats(20)
+    elif modo == "pyinstrument":
+        try:
+            from pyinstrument import Profiler
+        except ImportError:
+            raise RuntimeError("--perfil pyinstrument requiere pyinstrument (pip install pyinstrument)")
+        perfil = Profiler()
+        perfil.start()
+        try:
+            yield
+        finally:
+            perfil.stop()
+            with open(f"{salida}.html", "w", encoding="utf-8") as f:
+                f.write(perfil.output_html())
+            print(f"   -> Perfil pyinstrument en {salida}.html")
+    else:
+        raise ValueError(f"Perfilador desconocido: {modo} (cprofile | pyinstrument)")
@@ -1,63 +1,122 @@
-import requests
-import pandas as pd
 import re
-from bs4 import BeautifulSoup
-import time
-import unicodedata
-from urllib.parse import quote_plus, urljoin, urlparse
-from PIL import Image, ImageOps, ImageFilter, ImageChops, ImageEnhance
-import os, math
+from functools import lru_cache
 
 # ================= Limpieza DE Titulo =================
+# Reglas compiladas una sola vez. normalizar_titulo() obtiene de un título de
+# Radio-Browser todo lo que el ETL usa de él (título limpio, frecuencia, banda,
+# callsign y la frecuencia de respaldo para resolver la modulación) y memoiza
+# el resultado: los nombres se repiten entre RB, el vínculo FCC/ORB y el export.
 
 REGEX_FREQ_TITLE = re.compile(
     r'\b((?:\d{2,3}\.\d{1})|\d{3,4})(?=\s?(?:fm|am|mhz|khz|$))',
     re.IGNORECASE
 )
+# La quita de FM/AM tras la frecuencia queda incluida en la de unidades
+REGEX_UNIDADES = re.compile(r'\b(FM|AM|MHz|kHz)\b', re.IGNORECASE)
+REGEX_ESPACIOS = re.compile(r'\s{2,}')
+REGEX_SIMBOLOS_FINAL = re.compile(r'[^\w\s\-:]+$')
+REGEX_CALLSIGN = re.compile(r'\b([KW][A-Z0-9-]{2,4})\b', re.IGNORECASE)
+REGEX_FREQ_RESPALDO = re.compile(r'([0-9]{2,4}(?:\.[0-9]+)?)')  # primer número del título
 
-def clean_title_extract_freq(title, current_freq):
+CACHE_TITULOS = 1 << 16
+
+
+class TituloNormalizado:
     """
-    Limpia títulos de radios y extrae frecuencias AM/FM reales.
-    Compatible con miles de estaciones sin LLM.
+    titulo: limpio (sin frecuencia ni unidades); freq / banda: extraídas del título
+    ('101.1' / 'FM') o None; callsign: en mayúsculas o None; freq_respaldo:
+    (texto, 'FM'|'AM') del primer número del título en rango, o None.
     """
-    if not title:
-        return "", current_freq
+    __slots__ = ('titulo', 'freq', 'banda', 'callsign', 'freq_respaldo')
+
+    def __init__(self, titulo, freq, banda, callsign, freq_respaldo):
+        self.titulo, self.freq, self.banda = titulo, freq, banda
+        self.callsign, self.freq_respaldo = callsign, freq_respaldo
 
+    def __repr__(self):
+        return (f"TituloNormalizado(titulo={self.titulo!r}, freq={self.freq!r}, banda={self.banda!r}, "
+                f"callsign={self.callsign!r}, freq_respaldo={self.freq_respaldo!r})")
+
+
+def _limpiar(title, extraer):
+    """(título limpio, frecuencia, banda). Sin `extraer` solo se limpian unidades y bordes."""
     original_title = title
     title = title.strip()
-    new_freq = current_freq
+    new_freq = banda = None
 
     # SI NO TENEMOS FRECUENCIA — EXTRAER DESDE EL TÍTULO
-    if not new_freq or str(new_freq) == "0":
+    if extraer:
         m = REGEX_FREQ_TITLE.search(title)
         if m:
-            freq_str = m.group(1)
-
-            # Convertir y clasificar
-            try:
-                val = float(freq_str)
-
-                if 87.5 <= val <= 108.0:          # FM real
-                    new_freq = f"{val}"
-                    title = REGEX_FREQ_TITLE.sub("", title)
-                    title = re.sub(r'\bFM\b', '', title, flags=re.I)
-
-                elif 530 <= val <= 1710:         # AM real
-                    new_freq = f"{int(val)}"
-                    title = REGEX_FREQ_TITLE.sub("", title)
-                    title = re.sub(r'\bAM\b', '', title, flags=re.I)
-
-            except:
-                pass
+            val = float(m.group(1))
+            if 87.5 <= val <= 108.0:          # FM real
+                new_freq, banda = f"{val}", 'FM'
+            elif 530 <= val <= 1710:         # AM real
+                new_freq, banda = f"{int(val)}", 'AM'
+            if banda:
+                title = REGEX_FREQ_TITLE.sub("", title)
 
     # LIMPIEZA PROFESIONAL DEL TÍTULO
-    title = re.sub(r'\b(FM|AM|MHz|kHz)\b', '', title, flags=re.I)
-    title = re.sub(r'\s{2,}', ' ', title)               # espacios dobles
-    title = re.sub(r'[^\w\s\-:]+$', '', title)          # símbolos al final
+    title = REGEX_UNIDADES.sub('', title)
+    title = REGEX_ESPACIOS.sub(' ', title)              # espacios dobles
+    title = REGEX_SIMBOLOS_FINAL.sub('', title)         # símbolos al final
     title = title.strip(" -_:/\\")                      # limpiar bordes
 
     # Si quedó vacío, restauramos
     if not title:
         title = original_title
 
-    return title.strip(), new_freq
+    return title.strip(), new_freq, banda
+
+
+def _freq_respaldo(title):
+    m = REGEX_FREQ_RESPALDO.search(title)
+    if m:
+        val = float(m.group(1))
+        if 87.5 <= val <= 108: return m.group(1), 'FM'
+        if 530 <= val <= 1700: return m.group(1), 'AM'
+    return None
+
+
+@lru_cache(maxsize=CACHE_TITULOS)
+def normalizar_titulo(raw_title):
+    """TituloNormalizado de un nombre de estación (memoizado; no modificar el resultado)."""
+    raw_title = raw_title or ""
+    if not raw_title:
+        return TituloNormalizado("", None, None, None, None)
+    titulo, freq, banda = _limpiar(raw_title, True)
+    call_match = REGEX_CALLSIGN.search(raw_title)
+    return TituloNormalizado(titulo, freq, banda, call_match.group(1).upper() if call_match else None,
+                             _freq_respaldo(raw_title))
+
+
+def normalizar_titulos(nombres):
+    """
+    normalizar_titulo sobre una Series (o lista) de nombres: cada nombre distinto
+    se procesa una vez y el resultado se expande por códigos. Retorna un DataFrame
+    con columnas titulo, freq, banda, callsign (mismo índice que `nombres`).
+    """
+    import numpy as np
+    import pandas as pd
+    serie = nombres if isinstance(nombres, pd.Series) else pd.Series(list(nombres), dtype=object)
+    codigos, unicos = pd.factorize(serie.fillna("").astype(str).str.strip())
+    res = [normalizar_titulo(n) for n in unicos]
+    columnas = {}
+    for campo in ('titulo', 'freq', 'banda', 'callsign'):
+        valores = np.empty(len(res), dtype=object)
+        valores[:] = [getattr(r, campo) for r in res]
+        columnas[campo] = valores[codigos]
+    return pd.DataFrame(columnas, index=serie.index, dtype=object)
+
+
+def clean_title_extract_freq(title, current_freq):
+    """
+    Limpia títulos de radios y extrae frecuencias AM/FM reales.
+    Compatible con miles de estaciones sin LLM.
+    """
+    if not title:
+        return "", current_freq
+    if not current_freq or str(current_freq) == "0":
+        r = normalizar_titulo(title)
+        return r.titulo, r.freq if r.freq is not None else current_freq
+    return _limpiar(title, False)[0], current_freq
@@ -0,0 +1,245 @@
+import sqlite3
+import tempfile
+import threading
+import time
+
+from config import CACHE_HTTP_DB, CACHE_HTTP_ACTIVO, HEADERS
+from red import cliente
+
+# ================= CACHÉ HTTP EN DISCO (SQLite) =================
+
+CHUNK = 64 * 1024
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS respuestas (
+    url TEXT PRIMARY KEY,
+    status INTEGER NOT NULL,
+    body BLOB NOT NULL,
+    encoding TEXT,
+    etag TEXT,
+    last_modified TEXT,
+    fetched_at REAL NOT NULL
+)
+"""
+
+
+class RespuestaCacheada:
+    """Respuesta mínima compatible con lo que usan los scrapers de `requests.Response`."""
+
+    def __init__(self, status_code, content, encoding=None, headers=None, from_cache=False):
+        self.status_code = status_code
+        self.content = content
+        self.encoding = encoding or "utf-8"
+        self.headers = headers or {}
+        self.from_cache = from_cache
+
+    @property
+    def text(self):
+        return self.content.decode(self.encoding, errors="replace")
+
+
+class CacheHTTP:
+    """
+    Caché de contenido por URL con TTL y revalidación condicional
+    (ETag / Last-Modified). Solo guarda respuestas 200.
+    Si la red falla y hay copia vencida, se sirve la copia (stale).
+    """
+
+    def __init__(self, path=CACHE_HTTP_DB, activo=CACHE_HTTP_ACTIVO):
+        self.path = path
+        self.activo = activo
+        self.lock = threading.Lock()
+        self.stats = {"hit": 0, "miss": 0, "revalidado": 0, "stale": 0}
+        self._conn = None
+
+    def _db(self):
+        if self._conn is None:
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(_SCHEMA)
+            self._conn.commit()
+        return self._conn
+
+    def _leer(self, url):
+        with self.lock:
+            return self._db().execute(
+                "SELECT status, body, encoding, etag, last_modified, fetched_at FROM respuestas WHERE url = ?",
+                (url,)).fetchone()
+
+    def _guardar(self, url, r, encoding):
+        with self.lock:
+            self._db().execute(
+                "INSERT OR REPLACE INTO respuestas VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (url, r.status_code, r.content, encoding,
+                 r.headers.get("ETag"), r.headers.get("Last-Modified"), time.time()))
+            self._db().commit()
+
+    def _tocar(self, url):
+        with self.lock:
+            self._db().execute("UPDATE respuestas SET fetched_at = ? WHERE url = ?", (time.time(), url))
+            self._db().commit()
+
+    def _contar(self, clave):
+        with self.lock:
+            self.stats[clave] += 1
+
+    def get(self, url, ttl, headers=HEADERS, timeout=10):
+        """GET con caché. Retorna RespuestaCacheada (o lanza la excepción de red si no hay copia)."""
+        if not self.activo:
+            r = cliente.get(url, headers=headers, timeout=timeout)
+            self._contar("miss")
+            return RespuestaCacheada(r.status_code, r.content, r.encoding or r.apparent_encoding, r.headers)
+
+        row = self._leer(url)
+        if row and time.time() - row[5] < ttl:
+            self._contar("hit")
+            return RespuestaCacheada(row[0], row[1], row[2], from_cache=True)
+
+        # Vencida o inexistente -> red (condicional si tenemos validadores)
+        req_headers = dict(headers or {})
+        if row and row[3]: req_headers["If-None-Match"] = row[3]
+        if row and row[4]: req_headers["If-Modified-Since"] = row[4]
+
+        try:
+            r = cliente.get(url, headers=req_headers, timeout=timeout)
+        except Exception:
+            if row:
+                self._contar("stale")
+                return RespuestaCacheada(row[0], row[1], row[2], from_cache=True)
+            raise
+
+        if r.status_code == 304 and row:
+            self._tocar(url)
+            self._contar("revalidado")
+            return RespuestaCacheada(row[0], row[1], row[2], from_cache=True)
+
+        self._contar("miss")
+        encoding = r.encoding or r.apparent_encoding
+        if r.status_code == 200:
+            self._guardar(url, r, encoding)
+        return RespuestaCacheada(r.status_code, r.content, encoding, r.headers)
+
+    # ---------- Modo streaming (respuestas grandes, ej: listados FCC) ----------
+
+    def _rowid(self, url):
+        with self.lock:
+            row = self._db().execute("SELECT rowid FROM respuestas WHERE url = ?", (url,)).fetchone()
+        return row[0] if row else None
+
+    def _iter_blob(self, url):
+        """Lee el cuerpo guardado por bloques (sin cargarlo entero en memoria)."""
+        rowid = self._rowid(url)
+        with self.lock:
+            blob = self._db().blobopen("respuestas", "body", rowid, readonly=True)
+        try:
+            while True:
+                with self.lock:
+                    chunk = blob.read(CHUNK)
+                if not chunk: break
+                yield chunk
+        finally:
+            with self.lock:
+                blob.close()
+
+    def _guardar_spool(self, url, r, encoding, spool, size):
+        """Guarda un cuerpo descargado a disco temporal escribiendo el blob por bloques."""
+        spool.seek(0)
+        with self.lock:
+            cur = self._db().execute(
+                "INSERT OR REPLACE INTO respuestas VALUES (?, ?, zeroblob(?), ?, ?, ?, ?)",
+                (url, r.status_code, size, encoding,
+                 r.headers.get("ETag"), r.headers.get("Last-Modified"), time.time()))
+            with self._db().blobopen("respuestas", "body", cur.lastrowid) as blob:
+                for chunk in iter(lambda: spool.read(CHUNK), b""):
+                    blob.write(chunk)
+            self._db().commit()
+
+    def iter_lines(self, url, ttl, headers=HEADERS, timeout=60):
+        """
+        Como get() pero entrega el cuerpo línea a línea (bytes) con memoria plana.
+        En un miss descarga con stream=True, va entregando líneas y a la vez
+        vuelca el cuerpo a un temporal que se guarda en la caché al terminar.
+        """
+        row = self._leer_meta(url) if self.activo else None
+        if row and time.time() - row[4] < ttl:
+            self._contar("hit")
+            yield from _lineas(self._iter_blob(url))
+            return
+
+        req_headers = dict(headers or {})
+        if row and row[2]: req_headers["If-None-Match"] = row[2]
+        if row and row[3]: req_headers["If-Modified-Since"] = row[3]
+
+        try:
+            r = cliente.get(url, headers=req_headers, timeout=timeout, stream=True)
+        except Exception:
+            if row:
+                self._contar("stale")
+                yield from _lineas(self._iter_blob(url))
+                return
+            raise
+
+        if r.status_code == 304 and row:
+            r.close()
+            self._tocar(url)
+            self._contar("revalidado")
+            yield from _lineas(self._iter_blob(url))
+            return
+
+        self._contar("miss")
+        if r.status_code != 200:
+            r.close()
+            return
+
+        with tempfile.TemporaryFile() as spool:
+            size = 0
+            def chunks():
+                nonlocal size
+                for chunk in r.iter_content(CHUNK):
+                    spool.write(chunk)
+                    size += len(chunk)
+                    yield chunk
+            yield from _lineas(chunks())
+            r.close()
+            cliente.METRICAS.sumar_bytes(size)
+            if self.activo:
+                self._guardar_spool(url, r, r.encoding or "utf-8", spool, size)
+
+    def _leer_meta(self, url):
+        with self.lock:
+            return self._db().execute(
+                "SELECT status, encoding, etag, last_modified, fetched_at FROM respuestas WHERE url = ?",
+                (url,)).fetchone()
+
+    def resumen(self):
+        s = self.stats
+        total = sum(s.values())
+        servidas = s["hit"] + s["revalidado"] + s["stale"]
+        ratio = (servidas / total * 100) if total else 0.0
+        return (f"Caché HTTP: {s['hit']} hits, {s['revalidado']} revalidados (304), "
+                f"{s['stale']} stale, {s['miss']} misses ({ratio:.1f}% desde caché)")
+
+
+# Instancia compartida por todos los scrapers
+CACHE = CacheHTTP()
+
+
+def _lineas(chunks):
+    """Parte un flujo de bloques de bytes en líneas (sin el salto de línea)."""
+    pendiente = b""
+    for chunk in chunks:
+        pendiente += chunk
+        lineas = pendiente.splitlines(keepends=True)
+        pendiente = lineas.pop() if lineas and not lineas[-1].endswith((b"\n", b"\r")) else b""
+        for linea in lineas:
+            yield linea.rstrip(b"\r\n")
+    if pendiente:
+        yield pendiente
+
+
+def get_cacheado(url, ttl, headers=HEADERS, timeout=10):
+    return CACHE.get(url, ttl, headers=headers, timeout=timeout)
+
+
+def iter_lines_cacheado(url, ttl, headers=HEADERS, timeout=60):
+    return CACHE.iter_lines(url, ttl, headers=headers, timeout=timeout)
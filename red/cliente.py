@@ -0,0 +1,153 @@
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+
+from config import (
+    HEADERS, HTTP_POOL_HOSTS, HTTP_POOL_MAXSIZE, HTTP_REINTENTOS,
+    HTTP_BACKOFF_BASE, HTTP_BACKOFF_MAX
+)
+from red.limitador import esperar_turno
+from instrumentacion.tiempos import TIEMPOS
+
+# ================= CLIENTE HTTP COMPARTIDO =================
+# Una sola Session con pool por host (keep-alive) para todos los fetchers.
+# requests se importa al crear la Session: importar el módulo no la carga.
+
+STATUS_REINTENTABLES = {429, 500, 502, 503, 504}
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def session():
+    """Session compartida (creada una vez) con pools por host."""
+    global _session
+    with _session_lock:
+        if _session is None:
+            import requests
+            from requests.adapters import HTTPAdapter
+            s = requests.Session()
+            adapter = HTTPAdapter(pool_connections=HTTP_POOL_HOSTS, pool_maxsize=HTTP_POOL_MAXSIZE)
+            s.mount("https://", adapter)
+            s.mount("http://", adapter)
+            s.headers.update(HEADERS)
+            _session = s
+        return _session
+
+
+# ================= MÉTRICAS =================
+
+class MetricasHTTP:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.reintentos = 0
+        self.errores = 0
+        self.bytes = 0
+        self.latencias = []
+
+    def registrar(self, latencia, nbytes):
+        with self.lock:
+            self.requests += 1
+            self.bytes += nbytes
+            self.latencias.append(latencia)
+
+    def sumar_bytes(self, nbytes):
+        """Bytes de respuestas leídas en streaming (no se conocen al registrar la request)."""
+        with self.lock:
+            self.bytes += nbytes
+
+    def reintento(self):
+        with self.lock:
+            self.reintentos += 1
+
+    def error(self):
+        with self.lock:
+            self.errores += 1
+
+    def percentil(self, p):
+        with self.lock:
+            lat = sorted(self.latencias)
+        if not lat: return 0.0
+        idx = min(len(lat) - 1, int(round(p / 100 * (len(lat) - 1))))
+        return lat[idx]
+
+    def reporte(self):
+        return {"requests": self.requests, "reintentos": self.reintentos, "errores": self.errores,
+                "bytes": self.bytes, "latencia_p50": self.percentil(50),
+                "latencia_p95": self.percentil(95), "latencia_p99": self.percentil(99)}
+
+    def resumen(self):
+        return (f"HTTP: {self.requests} requests, {self.reintentos} reintentos, {self.errores} errores, "
+                f"{self.bytes / 1e6:.1f} MB | latencia p50={self.percentil(50):.2f}s "
+                f"p95={self.percentil(95):.2f}s p99={self.percentil(99):.2f}s")
+
+
+METRICAS = MetricasHTTP()
+
+
+# ================= GET CON REINTENTOS =================
+
+def _retry_after(r):
+    """Segundos indicados por Retry-After (número o fecha HTTP), o None."""
+    val = r.headers.get("Retry-After") if r is not None else None
+    if not val: return None
+    try:
+        return max(0.0, float(val))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(val).timestamp() - time.time())
+    except Exception:
+        return None
+
+
+def _backoff(intento):
+    """Backoff exponencial con jitter completo."""
+    return random.uniform(0, min(HTTP_BACKOFF_MAX, HTTP_BACKOFF_BASE * (2 ** intento)))
+
+
+def get(url, headers=None, timeout=10, reintentos=HTTP_REINTENTOS, **kwargs):
+    """
+    GET por la Session compartida. Aplica el token bucket del host en cada intento
+    y reintenta 429/5xx y errores de conexión con backoff + jitter (respeta Retry-After;
+    si pide esperar más de HTTP_BACKOFF_MAX, devuelve esa respuesta sin reintentar).
+    Retorna la última respuesta o lanza la última excepción si nunca hubo respuesta.
+    """
+    import requests
+    s = session()
+    for intento in range(reintentos + 1):
+        r, exc = None, None
+        TIEMPOS.registrar("cortesia", esperar_turno(url))
+        t0 = time.monotonic()
+        try:
+            r = s.get(url, headers=headers, timeout=timeout, **kwargs)
+            METRICAS.registrar(time.monotonic() - t0, len(r.content) if not kwargs.get("stream") else 0)
+        except (requests.ConnectionError, requests.Timeout) as e:
+            exc = e
+            METRICAS.error()
+
+        if r is not None and r.status_code not in STATUS_REINTENTABLES:
+            return r
+        if intento == reintentos:
+            break
+
+        espera = _retry_after(r)
+        if espera is not None and espera > HTTP_BACKOFF_MAX:
+            # Reintentar antes de lo pedido gasta los reintentos y alarga el throttling:
+            # la request se da por fallida con la respuesta del servidor
+            print(f"   [!] HTTP {r.status_code} en {url}: Retry-After de {espera:.0f}s "
+                  f"(más de {HTTP_BACKOFF_MAX:g}s), sin reintentar")
+            return r
+        if espera is None: espera = _backoff(intento)
+        if r is not None: r.close()
+        METRICAS.reintento()
+        motivo = f"HTTP {r.status_code}" if r is not None else type(exc).__name__
+        print(f"   [RETRY] {motivo} en {url} -> reintento {intento + 1}/{reintentos} en {espera:.1f}s")
+        time.sleep(espera)
+        TIEMPOS.registrar("backoff", espera)
+
+    if r is None:
+        raise exc
+    return r
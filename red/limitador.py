@@ -0,0 +1,63 @@
+import threading
+import time
+from urllib.parse import urlparse
+
+from config import RATE_LIMITS, RATE_LIMIT_DEFAULT
+
+# ================= TOKEN BUCKET POR HOST =================
+
+class TokenBucket:
+    """Token bucket thread-safe: `rate` tokens por segundo, ráfaga máxima `capacity`."""
+
+    def __init__(self, rate, capacity):
+        self.rate = float(rate)
+        self.capacity = float(capacity)
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def acquire(self):
+        """Bloquea hasta obtener un token. Retorna segundos esperados."""
+        waited = 0.0
+        while True:
+            with self.lock:
+                self._refill()
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return waited
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+            waited += wait
+
+
+_BUCKETS = {}
+_BUCKETS_LOCK = threading.Lock()
+
+
+def _limite_para_host(host):
+    """Busca el límite configurado por sufijo (cdn.onlineradiobox.com -> onlineradiobox.com)."""
+    for dominio, limite in RATE_LIMITS.items():
+        if host == dominio or host.endswith("." + dominio):
+            return dominio, limite
+    return host, RATE_LIMIT_DEFAULT
+
+
+def bucket_para(url):
+    """Retorna el TokenBucket compartido del host de la URL."""
+    host = (urlparse(url).hostname or "").lower()
+    clave, (rate, capacity) = _limite_para_host(host)
+    with _BUCKETS_LOCK:
+        bucket = _BUCKETS.get(clave)
+        if bucket is None:
+            bucket = _BUCKETS[clave] = TokenBucket(rate, capacity)
+        return bucket
+
+
+def esperar_turno(url):
+    """Cortesía por host: espera un token antes de pedir `url`."""
+    return bucket_para(url).acquire()
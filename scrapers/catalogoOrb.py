@@ -0,0 +1,162 @@
+import re
+import sqlite3
+import threading
+import time
+from collections import deque
+from urllib.parse import urljoin, urlparse, parse_qs
+
+from config import (
+    ORB_RESOLUCION_DB, ORB_CATALOGO_RAIZ, ORB_CATALOGO_MAX_PAGINAS, ORB_CATALOGO_TTL,
+    CACHE_TTL_ORB, HEADERS, REGEX_CALLSIGN
+)
+from red.cache import get_cacheado
+from scrapers.indiceFcc import base_callsign
+from scrapers.orbParser import parsear_listado, es_href_estacion
+
+# ================= CATÁLOGO ORB (CRAWL DE LISTADOS) =================
+# En vez de una búsqueda por estación, recorre los listados /us/ de ORB
+# (país, estados ?cs=us.<estado>, géneros /us/genre/<g>/ y su paginación ?p=N)
+# y arma un catálogo local URL -> nombre/frecuencia/callsign.
+# Las estaciones de Radio-Browser se emparejan contra el catálogo en memoria
+# (vinculacion): O(páginas de listado) requests en lugar de O(estaciones) búsquedas.
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS catalogo (
+    orb_url TEXT PRIMARY KEY,
+    nombre TEXT NOT NULL,
+    freq TEXT,
+    callsign TEXT,
+    listado TEXT,                  -- primera página de listado donde apareció
+    visto_at REAL NOT NULL,
+    logo TEXT                      -- miniatura del listado (resumen para saltar el detalle)
+)
+"""
+
+REGEX_SLUG_CALLSIGN = re.compile(r'^([kw][a-z]{2,3})(?:fm|am)?$')
+FILTROS_LISTADO = {'cs', 'p'}
+
+
+def callsign_de(nombre, orb_url):
+    """Callsign del nombre del listado o, si no trae, del slug de la URL (/us/kabc/)."""
+    m = REGEX_CALLSIGN.search(nombre or '')
+    if m: return base_callsign(m.group(1))
+    slug = urlparse(orb_url).path.strip('/').split('/')[-1]
+    m = REGEX_SLUG_CALLSIGN.match(slug)
+    return m.group(1).upper() if m else None
+
+
+def es_listado(href):
+    """Páginas de listado que recorre el crawl: /us/, /us/?cs=..., /us/genre/<g>/ (+ ?p=N)."""
+    if not href or not href.startswith('/us/') or es_href_estacion(href.split('#')[0]):
+        return False
+    u = urlparse(href)
+    filtros = set(parse_qs(u.query))
+    if not filtros <= FILTROS_LISTADO:
+        return False
+    # Género x estado multiplica las páginas sin sumar estaciones nuevas
+    return not ('/genre/' in u.path and 'cs' in filtros)
+
+
+class CatalogoOrb:
+    def __init__(self, path=ORB_RESOLUCION_DB):
+        self.path = path
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute(_SCHEMA)
+        # Catálogos anteriores al resumen de listado no tienen la columna logo
+        columnas = [c[1] for c in self.conn.execute("PRAGMA table_info(catalogo)")]
+        if 'logo' not in columnas:
+            self.conn.execute("ALTER TABLE catalogo ADD COLUMN logo TEXT")
+        self.conn.commit()
+
+    # ---------- Crawl ----------
+
+    def crawl(self, raiz=ORB_CATALOGO_RAIZ, max_paginas=ORB_CATALOGO_MAX_PAGINAS):
+        """Recorre los listados en anchura desde `raiz`. Retorna (páginas, estaciones nuevas)."""
+        cola, vistos = deque([raiz]), {raiz}
+        paginas, nuevas = 0, 0
+        conocidas = set(r[0] for r in self.conn.execute("SELECT orb_url FROM catalogo"))
+        while cola and paginas < max_paginas:
+            url = cola.popleft()
+            try:
+                r = get_cacheado(url, CACHE_TTL_ORB, headers=HEADERS, timeout=10)
+            except Exception as e:
+                print(f"   [!] Listado ORB falló ({url}): {e}")
+                continue
+            paginas += 1
+            if r.status_code != 200:
+                print(f"   [!] Error HTTP {r.status_code} en listado {url}")
+                continue
+
+            estaciones, enlaces = parsear_listado(r.text)
+            filas = []
+            for e in estaciones:
+                orb_url = urljoin(raiz, e['orb_url'])
+                if orb_url not in conocidas:
+                    nuevas += 1
+                    conocidas.add(orb_url)
+                filas.append((orb_url, e['nombre'], e['freq'], callsign_de(e['nombre'], orb_url), url, e['logo']))
+            self._guardar(filas)
+
+            for href in enlaces:
+                if not es_listado(href): continue
+                siguiente = urljoin(raiz, href)
+                if siguiente not in vistos:
+                    vistos.add(siguiente)
+                    cola.append(siguiente)
+
+            if paginas % 25 == 0:
+                print(f"   -> Catálogo ORB: {paginas} páginas, {len(conocidas)} estaciones")
+        return paginas, nuevas
+
+    def _guardar(self, filas):
+        if not filas: return
+        ahora = time.time()
+        with self.lock:
+            # El listado de origen se conserva: una estación aparece en varios listados
+            self.conn.executemany(
+                "INSERT INTO catalogo (orb_url, nombre, freq, callsign, listado, logo, visto_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?) ON CONFLICT(orb_url) DO UPDATE SET "
+                "nombre = excluded.nombre, freq = excluded.freq, callsign = excluded.callsign, "
+                "logo = excluded.logo, visto_at = excluded.visto_at",
+                [f + (ahora,) for f in filas])
+            self.conn.commit()
+
+    def actualizado_at(self):
+        with self.lock:
+            return self.conn.execute("SELECT MAX(visto_at) FROM catalogo").fetchone()[0]
+
+    def __len__(self):
+        with self.lock:
+            return self.conn.execute("SELECT COUNT(*) FROM catalogo").fetchone()[0]
+
+    # ---------- Entradas ----------
+
+    def entradas(self):
+        """
+        Entradas del catálogo (orb_url, nombre, freq, callsign) para vinculacion; con
+        logo y visto_at también son el resumen de listado de cada estación (ver scrapers.orb).
+        """
+        with self.lock:
+            rows = self.conn.execute(
+                "SELECT orb_url, nombre, freq, callsign, logo, visto_at FROM catalogo ORDER BY orb_url").fetchall()
+        return [{'orb_url': u, 'nombre': n, 'freq': f, 'callsign': c, 'logo': l, 'visto_at': v}
+                for u, n, f, c, l, v in rows]
+
+    def cerrar(self):
+        with self.lock:
+            self.conn.close()
+
+
+def cargar_catalogo_orb(max_edad=ORB_CATALOGO_TTL, reconstruir=False):
+    """Catálogo local; se vuelve a recorrer si está vacío o vencido."""
+    catalogo = CatalogoOrb()
+    actualizado = catalogo.actualizado_at()
+    if reconstruir or not actualizado or time.time() - actualizado > max_edad:
+        print("   -> Recorriendo listados ORB para armar el catálogo...")
+        paginas, nuevas = catalogo.crawl()
+        print(f"   -> Catálogo ORB: {paginas} páginas, {nuevas} estaciones nuevas, {len(catalogo)} en total")
+    else:
+        print(f"   -> Catálogo ORB cargado ({len(catalogo)} estaciones)")
+    return catalogo
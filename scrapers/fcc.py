@@ -1,33 +1,115 @@
-import requests
+import html
 import re
-from bs4 import BeautifulSoup
-from config import HEADERS, REGEX_CALLSIGN
+from config import HEADERS, REGEX_CALLSIGN, CACHE_TTL_FCC
+from red.cache import iter_lines_cacheado
 from utils import dms_to_decimal
 
+# ================= PARSER FCC EN STREAMING =================
+# El listado de la FCC es texto delimitado por '|' (a veces envuelto en <pre>).
+# Se lee línea a línea sin construir DOM y se separan los campos por posición.
+
+REGEX_TAG = re.compile(r'<[^>]+>')
+REGEX_NUM = re.compile(r'(\d{2,4}\.?\d*)')
+REGEX_COORDS = re.compile(r'([NS])\s+(\d+)\s+(\d+)\s+(\d+\.?\d*).*?([EW])\s+(\d+)\s+(\d+)\s+(\d+\.?\d*)')
+
+# Posición de cada columna (FM y AM comparten el layout del listado delimitado)
+CAMPOS_FCC = {
+    'call': 0, 'freq': 1, 'service': 2, 'channel': 3, 'antenna': 4, 'hours': 5,
+    'station_class': 6, 'intl_class': 7, 'status': 8, 'city': 9, 'state': 10,
+    'country': 11, 'file_number': 12, 'power': 13, 'erp_v': 14, 'haat_h': 15,
+    'haat_v': 16, 'facility_id': 17,
+    'lat_dir': 18, 'lat_deg': 19, 'lat_min': 20, 'lat_sec': 21,
+    'lon_dir': 22, 'lon_deg': 23, 'lon_min': 24, 'lon_sec': 25,
+    'licensee': 26,
+}
+
+
+def _campo(fields, nombre):
+    idx = CAMPOS_FCC[nombre]
+    val = fields[idx] if idx < len(fields) else ''
+    return '' if val == '-' else val
+
+
+def _num(texto):
+    m = REGEX_NUM.search(texto or '')
+    return m.group(1) if m else ''
+
+
+def _parse_delimitada(line, type_label):
+    """Registro completo desde una línea '|CALL |88.1 MHz|FM |...|'."""
+    fields = [f.strip() for f in line.split('|')]
+    if fields and fields[0] == '': fields = fields[1:]
+    if len(fields) <= CAMPOS_FCC['status']: return None
+
+    callsign = _campo(fields, 'call').upper()
+    if not callsign: return None
+
+    lat_dec, lon_dec = None, None
+    if len(fields) > CAMPOS_FCC['lon_sec']:
+        lat_dec = dms_to_decimal(_campo(fields, 'lat_dir'), _campo(fields, 'lat_deg'),
+                                 _campo(fields, 'lat_min'), _campo(fields, 'lat_sec'))
+        lon_dec = dms_to_decimal(_campo(fields, 'lon_dir'), _campo(fields, 'lon_deg'),
+                                 _campo(fields, 'lon_min'), _campo(fields, 'lon_sec'))
+
+    return {
+        'callsign': callsign,
+        'freq': _num(_campo(fields, 'freq')),
+        'service': _campo(fields, 'service') or type_label,
+        'status': _campo(fields, 'status'),
+        'city': _campo(fields, 'city'),
+        'state': _campo(fields, 'state'),
+        'country': _campo(fields, 'country'),
+        'facility_id': _campo(fields, 'facility_id'),
+        'lat': lat_dec,
+        'lon': lon_dec,
+        'channel': _campo(fields, 'channel'),
+        'station_class': _campo(fields, 'station_class'),
+        'file_number': _campo(fields, 'file_number'),
+        'power': _campo(fields, 'power'),
+        'licensee': _campo(fields, 'licensee'),
+    }
+
+
+def _parse_texto(line, type_label):
+    """Fallback para líneas sin delimitador: heurística por regex (formato visual)."""
+    if "LIC" not in line: return None
+    call_match = REGEX_CALLSIGN.search(line)
+    if not call_match: return None
+
+    lat_dec, lon_dec = None, None
+    c_match = REGEX_COORDS.search(line)
+    if c_match:
+        lat_dec = dms_to_decimal(c_match.group(1), c_match.group(2), c_match.group(3), c_match.group(4))
+        lon_dec = dms_to_decimal(c_match.group(5), c_match.group(6), c_match.group(7), c_match.group(8))
+
+    return {'callsign': call_match.group(1).upper(), 'freq': _num(line), 'service': type_label,
+            'status': 'LIC', 'lat': lat_dec, 'lon': lon_dec}
+
+
+def iter_fcc_records(url, type_label):
+    """Genera registros FCC (dicts) leyendo la respuesta en streaming, sin DOM."""
+    for raw in iter_lines_cacheado(url, CACHE_TTL_FCC, headers=HEADERS, timeout=60):
+        line = raw.decode('latin-1')
+        if '<' in line: line = REGEX_TAG.sub(' ', line)
+        if '&' in line: line = html.unescape(line)
+        line = line.strip()
+        if not line: continue
+        rec = _parse_delimitada(line, type_label) if '|' in line else _parse_texto(line, type_label)
+        if rec: yield rec
+
+
 def parse_fcc_visual(url, type_label):
+    """dict callsign -> registro, solo estaciones con licencia (LIC). Misma firma de siempre."""
     print(f"   -> Cargando FCC {type_label}...")
     stations = {}
     try:
-        r = requests.get(url, headers=HEADERS, timeout=60)
-        soup = BeautifulSoup(r.text, 'html.parser')
-        lines = soup.get_text(separator=' ').splitlines()
-        for line in lines:
-            line = line.strip()
-            if "LIC" not in line: continue
-            call_match = REGEX_CALLSIGN.search(line)
+        for rec in iter_fcc_records(url, type_label):
+            if rec['status'] != 'LIC': continue
+            # Misma clave que usa el main al buscar el callsign en el título
+            call_match = REGEX_CALLSIGN.search(rec['callsign'])
             if not call_match: continue
-            callsign = call_match.group(1).upper()
-            
-            # Frecuencia visual
-            match_freq = re.search(r'(\d{2,4}\.?\d*)', line)
-            freq_val = match_freq.group(1) if match_freq else ""
-            
-            lat_dec, lon_dec = None, None
-            c_match = re.search(r'([NS])\s+(\d+)\s+(\d+)\s+(\d+\.?\d*).*?([EW])\s+(\d+)\s+(\d+)\s+(\d+\.?\d*)', line)
-            if c_match:
-                lat_dec = dms_to_decimal(c_match.group(1), c_match.group(2), c_match.group(3), c_match.group(4))
-                lon_dec = dms_to_decimal(c_match.group(5), c_match.group(6), c_match.group(7), c_match.group(8))
-            
-            stations[callsign] = {'freq': freq_val, 'service': type_label, 'lat': lat_dec, 'lon': lon_dec}
+            stations[call_match.group(1).upper()] = rec
+        return stations
+    except Exception as e:
+        print(f"   [ERROR] FCC {type_label}: {e}")
         return stations
-    except: return {}
\ No newline at end of file
@@ -0,0 +1,305 @@
+import json
+import math
+import os
+import re
+import time
+
+import numpy as np
+
+from config import URL_FCC_FM, URL_FCC_AM, FCC_INDICE_DIR, CACHE_TTL_FCC, FCC_INDICE_TTL_PARCIAL
+from scrapers.fcc import iter_fcc_records
+
+# ================= ÍNDICE FCC COLUMNAR =================
+# Columnas NumPy (una por campo) + órdenes precalculados para búsquedas:
+#   - callsign exacto / base sin sufijo (-FM, -AM, -LP...) con searchsorted
+#   - callsign casi igual (distancia de edición 1, mismo prefijo K/W): variantes
+#     generadas y buscadas de una sola vez con searchsorted
+#   - (frecuencia, servicio) con máscara vectorizada
+#   - estación más cercana con una grilla de 1° (celdas ordenadas)
+# Se guarda como un .npy por columna y se carga con mmap (milisegundos).
+
+INDICE_VERSION = 1
+REGEX_SUFIJO = re.compile(r'-(FM|AM|LP|TV|FX)$')
+LETRAS_CALLSIGN = "ABCDEFGHIJKLMNOPQRSTUVWXYZ"
+RADIO_TIERRA_KM = 6371.0
+KM_POR_GRADO = 111.0
+
+COLUMNAS = {
+    'callsign': '<U12', 'base': '<U12', 'freq': np.float32, 'service': '<U2',
+    'lat': np.float64, 'lon': np.float64, 'facility_id': np.int32,
+    'city': '<U32', 'state': '<U2',
+}
+# Órdenes y columnas ya ordenadas: searchsorted directo sobre el mmap
+DERIVADAS = ('orden_call', 'call_ordenado', 'orden_base', 'base_ordenada',
+             'orden_celda', 'celda_ordenada')
+
+
+def base_callsign(callsign):
+    """'WBZ-FM' -> 'WBZ', 'KXYZ-' -> 'KXYZ'."""
+    c = (callsign or '').strip().upper()
+    return REGEX_SUFIJO.sub('', c).rstrip('-')
+
+
+def variantes_edicion(base):
+    """
+    Callsigns a distancia de edición 1 de `base` (borrado, cambio o inserción de
+    una letra) que conservan el prefijo: K y W son bloques distintos de la FCC.
+    """
+    if len(base) < 2: return []
+    prefijo, resto = base[0], base[1:]
+    variantes = set()
+    for i in range(len(resto) + 1):
+        if i < len(resto):
+            variantes.add(resto[:i] + resto[i + 1:])
+            variantes.update(resto[:i] + c + resto[i + 1:] for c in LETRAS_CALLSIGN)
+        variantes.update(resto[:i] + c + resto[i:] for c in LETRAS_CALLSIGN)
+    variantes.discard(resto)
+    return sorted(prefijo + v for v in variantes if v)
+
+
+def _celda(lat, lon):
+    return (np.floor(lat) + 90).astype(np.int32) * 360 + (np.floor(lon) + 180).astype(np.int32)
+
+
+def _haversine_km(lat1, lon1, lat2, lon2):
+    lat1, lon1, lat2, lon2 = map(np.radians, (lat1, lon1, lat2, lon2))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * RADIO_TIERRA_KM * np.arcsin(np.sqrt(a))
+
+
+class IndiceFCC:
+    def __init__(self, cols):
+        self.cols = cols
+        self.n = len(cols['callsign'])
+        self.vinculos = {}
+
+    # ---------- Construcción ----------
+
+    @classmethod
+    def desde_registros(cls, registros):
+        """Construye el índice desde registros de iter_fcc_records (FM y AM conviven)."""
+        datos = {k: [] for k in COLUMNAS}
+        for rec in registros:
+            try:
+                freq = float(rec.get('freq') or 'nan')
+            except ValueError:
+                freq = float('nan')
+            datos['callsign'].append(rec['callsign'].upper())
+            datos['base'].append(base_callsign(rec['callsign']))
+            datos['freq'].append(freq)
+            datos['service'].append(rec.get('service') or '')
+            datos['lat'].append(rec['lat'] if rec.get('lat') is not None else float('nan'))
+            datos['lon'].append(rec['lon'] if rec.get('lon') is not None else float('nan'))
+            fid = rec.get('facility_id') or ''
+            datos['facility_id'].append(int(fid) if str(fid).isdigit() else -1)
+            datos['city'].append((rec.get('city') or '')[:32])
+            datos['state'].append((rec.get('state') or '')[:2])
+
+        cols = {k: np.array(v, dtype=COLUMNAS[k]) for k, v in datos.items()}
+        cols['orden_call'] = np.argsort(cols['callsign'], kind='stable')
+        cols['call_ordenado'] = cols['callsign'][cols['orden_call']]
+        cols['orden_base'] = np.argsort(cols['base'], kind='stable')
+        cols['base_ordenada'] = cols['base'][cols['orden_base']]
+
+        con_geo = ~(np.isnan(cols['lat']) | np.isnan(cols['lon']))
+        celda = np.full(len(cols['lat']), -1, dtype=np.int32)
+        celda[con_geo] = _celda(cols['lat'][con_geo], cols['lon'][con_geo])
+        cols['orden_celda'] = np.argsort(celda, kind='stable')
+        cols['celda_ordenada'] = celda[cols['orden_celda']]
+        return cls(cols)
+
+    # ---------- Persistencia (mmap) ----------
+
+    def guardar(self, carpeta=FCC_INDICE_DIR, completo=True):
+        os.makedirs(carpeta, exist_ok=True)
+        for nombre, arr in self.cols.items():
+            np.save(os.path.join(carpeta, f"{nombre}.npy"), arr)
+        with open(os.path.join(carpeta, "meta.json"), "w") as f:
+            json.dump({'version': INDICE_VERSION, 'n': self.n, 'creado': time.time(), 'completo': completo}, f)
+
+    @classmethod
+    def cargar(cls, carpeta=FCC_INDICE_DIR):
+        cols = {nombre: np.load(os.path.join(carpeta, f"{nombre}.npy"), mmap_mode='r')
+                for nombre in list(COLUMNAS) + list(DERIVADAS)}
+        return cls(cols)
+
+    # ---------- Registros ----------
+
+    def registro(self, i):
+        """Registro en el formato de parse_fcc_visual (freq como texto)."""
+        c = self.cols
+        freq = float(c['freq'][i])
+        lat, lon = float(c['lat'][i]), float(c['lon'][i])
+        return {
+            'callsign': str(c['callsign'][i]),
+            'freq': '' if math.isnan(freq) else format(freq, 'g'),
+            'service': str(c['service'][i]),
+            'lat': None if math.isnan(lat) else lat,
+            'lon': None if math.isnan(lon) else lon,
+            'facility_id': int(c['facility_id'][i]),
+            'city': str(c['city'][i]),
+            'state': str(c['state'][i]),
+        }
+
+    def _rango(self, ordenada, orden, valor):
+        lo = np.searchsorted(self.cols[ordenada], valor, side='left')
+        hi = np.searchsorted(self.cols[ordenada], valor, side='right')
+        return self.cols[orden][lo:hi].tolist()
+
+    # ---------- Búsquedas ----------
+
+    def por_callsign(self, callsign, service=None):
+        """Índices con callsign exacto."""
+        idx = self._rango('call_ordenado', 'orden_call', (callsign or '').strip().upper())
+        return self._filtrar_servicio(idx, service)
+
+    def por_callsign_sufijos(self, callsign, service=None):
+        """
+        Índices por callsign tolerando sufijos: 'WBZ' encuentra 'WBZ' y 'WBZ-FM',
+        'WBZ-FM' (o el recorte 'WBZ-' del regex del título) encuentra ambos.
+        Primero los exactos, luego las variantes.
+        """
+        exactos = list(self.por_callsign(callsign, service))
+        variantes = self._rango('base_ordenada', 'orden_base', base_callsign(callsign))
+        variantes = [i for i in self._filtrar_servicio(variantes, service) if i not in exactos]
+        return exactos + variantes
+
+    def por_callsign_cercano(self, callsign, service=None):
+        """
+        Índices cuya base está a distancia de edición 1 de la del callsign, con el
+        mismo prefijo (K/W): 'KXZY' o 'KXYZZ' encuentran 'KXYZ'. Para títulos con
+        el callsign mal escrito; no incluye los exactos (ver por_callsign_sufijos).
+        """
+        variantes = np.array(variantes_edicion(base_callsign(callsign)), dtype=COLUMNAS['base'])
+        if not len(variantes): return []
+        ordenada = self.cols['base_ordenada']
+        lo = np.searchsorted(ordenada, variantes, side='left')
+        hi = np.searchsorted(ordenada, variantes, side='right')
+        orden = self.cols['orden_base']
+        idx = [i for a, b in zip(lo.tolist(), hi.tolist()) if b > a for i in orden[a:b].tolist()]
+        return self._filtrar_servicio(idx, service)
+
+    def por_frecuencia(self, freq, service, tolerancia=0.05):
+        """Índices con (frecuencia, servicio) dentro de la tolerancia."""
+        c = self.cols
+        mask = (c['service'] == service) & (np.abs(c['freq'] - np.float32(freq)) <= tolerancia)
+        return np.nonzero(mask)[0]
+
+    def mas_cercanas(self, lat, lon, k=1, service=None, max_anillo=20):
+        """k estaciones más cercanas a (lat, lon) como [(índice, km)], usando la grilla."""
+        c = self.cols
+        clat, clon = int(math.floor(lat)) + 90, int(math.floor(lon)) + 180
+        km_por_grado_lon = max(1.0, KM_POR_GRADO * math.cos(math.radians(abs(lat) + 1)))
+
+        vistos, candidatos = set(), []
+        for r in range(max_anillo + 1):
+            for dlat in range(-r, r + 1):
+                for dlon in range(-r, r + 1):
+                    if max(abs(dlat), abs(dlon)) != r: continue  # solo el borde del anillo
+                    celda = (clat + dlat) * 360 + (clon + dlon) % 360
+                    if celda in vistos: continue
+                    vistos.add(celda)
+                    candidatos.extend(self._rango('celda_ordenada', 'orden_celda', celda))
+            idx = np.array(self._filtrar_servicio(candidatos, service), dtype=np.int64)
+            if len(idx) >= k:
+                dist = _haversine_km(lat, lon, c['lat'][idx], c['lon'][idx])
+                top = np.argsort(dist)[:k]
+                # Nada fuera del anillo r puede estar más cerca que r celdas
+                if dist[top[-1]] <= r * min(KM_POR_GRADO, km_por_grado_lon):
+                    return [(int(idx[j]), float(dist[j])) for j in top]
+        if not candidatos: return []
+        idx = np.array(self._filtrar_servicio(candidatos, service), dtype=np.int64)
+        if not len(idx): return []
+        dist = _haversine_km(lat, lon, c['lat'][idx], c['lon'][idx])
+        return [(int(idx[j]), float(dist[j])) for j in np.argsort(dist)[:k]]
+
+    def _filtrar_servicio(self, idx, service):
+        if not service: return list(idx)
+        serv = self.cols['service']
+        return [i for i in idx if serv[i] == service]
+
+    def buscar(self, callsign, freq_hint=None):
+        """
+        Mejor registro para un callsign (o None). Desempata FM/AM con la frecuencia
+        del título si la hay; si no, prefiere el callsign exacto.
+        """
+        if not callsign: return None
+        idx = self.por_callsign_sufijos(callsign)
+        if idx:
+            con_freq, mismo_servicio = self._por_frecuencia_titulo(idx, freq_hint)
+            return self.registro((con_freq or mismo_servicio or idx)[0])
+
+        # Sin coincidencia exacta: callsign a una letra de distancia. Solo si la
+        # frecuencia del título lo confirma o si no hay más de un candidato
+        cercanos = self.por_callsign_cercano(callsign)
+        if not cercanos: return None
+        con_freq, _ = self._por_frecuencia_titulo(cercanos, freq_hint)
+        if con_freq:
+            return self.registro(con_freq[0])
+        if not freq_hint and len({str(self.cols['base'][i]) for i in cercanos}) == 1:
+            return self.registro(cercanos[0])
+        return None
+
+    def _por_frecuencia_titulo(self, idx, freq_hint):
+        """(con la frecuencia del título, del mismo servicio FM/AM) dentro de idx."""
+        if not freq_hint: return [], []
+        try:
+            f = float(freq_hint)
+        except ValueError:
+            return [], []
+        service = 'FM' if 87.5 <= f <= 108 else 'AM'
+        mismo_servicio = [i for i in idx if self.cols['service'][i] == service]
+        con_freq = [i for i in mismo_servicio if abs(float(self.cols['freq'][i]) - f) <= 0.05]
+        return con_freq, mismo_servicio
+
+    def fijar_vinculos(self, vinculos):
+        """Vínculos precalculados por lote (clave de estación -> índice), ver vinculacion."""
+        self.vinculos = dict(vinculos)
+
+    def buscar_estacion(self, clave, callsign, freq_hint=None):
+        """Registro de la estación: vínculo precalculado si lo hay; si no, por callsign."""
+        i = self.vinculos.get(clave)
+        if i is not None:
+            return self.registro(i)
+        return self.buscar(callsign, freq_hint)
+
+    def get(self, callsign, default=None):
+        """Compatibilidad con el dict fcc_db (callsign -> registro)."""
+        return self.buscar(callsign) or default
+
+    def __len__(self):
+        return self.n
+
+
+def cargar_indice_fcc(carpeta=FCC_INDICE_DIR, max_edad=CACHE_TTL_FCC, reconstruir=False):
+    """
+    Carga el índice mmap si está vigente; si no, lo construye desde la FCC y lo guarda.
+    Un índice armado con alguna descarga fallida (parcial) vence en FCC_INDICE_TTL_PARCIAL.
+    """
+    meta_path = os.path.join(carpeta, "meta.json")
+    if not reconstruir and os.path.exists(meta_path):
+        try:
+            with open(meta_path) as f:
+                meta = json.load(f)
+            edad_max = max_edad if meta.get('completo', True) else min(max_edad, FCC_INDICE_TTL_PARCIAL)
+            if meta.get('version') == INDICE_VERSION and time.time() - meta['creado'] < edad_max:
+                indice = IndiceFCC.cargar(carpeta)
+                print(f"   -> Índice FCC cargado ({len(indice)} estaciones, mmap)")
+                return indice
+        except Exception as e:
+            print(f"   [!] Índice FCC inválido, reconstruyendo: {e}")
+
+    registros, completo = [], True
+    for url, label in ((URL_FCC_FM, "FM"), (URL_FCC_AM, "AM")):
+        print(f"   -> Cargando FCC {label}...")
+        try:
+            registros.extend(r for r in iter_fcc_records(url, label) if r['status'] == 'LIC')
+        except Exception as e:
+            completo = False
+            print(f"   [ERROR] FCC {label}: {e}")
+    indice = IndiceFCC.desde_registros(registros)
+    if len(indice):
+        indice.guardar(carpeta, completo)
+    print(f"   -> Índice FCC construido ({len(indice)} estaciones"
+          + ("" if completo else f", parcial: se reconstruye en {FCC_INDICE_TTL_PARCIAL // 60} min") + ")")
+    return indice
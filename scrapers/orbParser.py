@@ -0,0 +1,421 @@
+import re
+from config import PARSER_ORB
+from utils import fix_image_url, cf_decode_email
+
+try:
+    import lxml.html
+except ImportError:  # lxml es opcional: sin él se usa BeautifulSoup
+    lxml = None
+
+# ================= PARSER DE PÁGINAS ORB =================
+# Dos backends con el mismo resultado:
+#   - "bs4":  BeautifulSoup + html.parser (selectores CSS, una búsqueda por campo)
+#   - "lxml": un solo recorrido del árbol lxml que resuelve todos los campos a la vez
+# Ambos llenan el mismo dict `data` de scrape_orb_v10 en el orden A..G, así un
+# error a mitad de la extracción deja los campos anteriores igual en los dos.
+
+# ================= REGEX & UTILIDADES =================
+
+# Regex para frecuencia robusta
+REGEX_FREQ_STRICT = re.compile(r'\b(\d{2,4}(?:\.\d{1,2})?)\s?(MHz|kHz|AM|FM)\b', re.IGNORECASE)
+REGEX_FREQ_LOOSE = re.compile(r'\b(8[7-9]\.\d|9\d\.\d|10\d\.\d|5[3-9]0|[6-9]\d0|1\d{3}0|1[0-6]\d0|1700)\b')
+
+def extract_freq_robust(text):
+    """Extrae frecuencia ignorando teléfonos y años."""
+    if not text: return None
+    match = REGEX_FREQ_STRICT.search(text)
+    if match: return f"{match.group(1)} {match.group(2).upper()}"
+
+    match_loose = REGEX_FREQ_LOOSE.search(text)
+    if match_loose:
+        val = float(match_loose.group(1))
+        if 87.5 <= val <= 108: return f"{val} FM"
+        if 530 <= val <= 1700: return f"{int(val)} AM"
+    return None
+
+def _email_desde(cf_token, href, text):
+    """Núcleo de la estrategia nuclear (igual para bs4 y lxml)."""
+    # 3. Buscar token en href (redirección)
+    if not cf_token and "/cdn-cgi/l/email-protection#" in href:
+        cf_token = href.split('#')[-1]
+
+    # DECODIFICAR SI HAY TOKEN
+    if cf_token:
+        return cf_decode_email(cf_token)
+
+    # 4. Mailto clásico
+    if 'mailto:' in href:
+        return href.replace('mailto:', '').split('?')[0].strip()
+
+    # 5. Texto plano (último recurso)
+    if '@' in text and '.' in text:
+        return text
+
+    return None
+
+def extract_email_power(soup_element):
+    """
+    Estrategia nuclear para encontrar el email:
+    1. Busca data-cfemail en el propio link.
+    2. Busca data-cfemail en hijos (spans).
+    3. Busca en el href si es una redirección de Cloudflare.
+    4. Busca mailto simple.
+    5. Busca texto plano con @.
+    """
+    if not soup_element: return None
+
+    # 1. Buscar token en atributo
+    cf_token = soup_element.get('data-cfemail')
+
+    # 2. Buscar token en hijos (spans)
+    if not cf_token:
+        child_span = soup_element.find(attrs={"data-cfemail": True})
+        if child_span: cf_token = child_span.get('data-cfemail')
+
+    return _email_desde(cf_token, soup_element.get('href', ''), soup_element.get_text(strip=True))
+
+def _asignar_tags(data, seen_tags, tags_fallback):
+    if seen_tags:
+        data['tags'] = ", ".join(seen_tags)
+    elif tags_fallback:
+        # Fallback clásico
+        data['tags'] = ", ".join(tags_fallback)
+
+def _asignar_redes(data, hrefs):
+    for href in hrefs:
+        h = href.lower()
+        if 'wa.me' in h: data['whatsapp'] = href
+        elif 'facebook.com' in h: data['fb'] = href
+        elif 'twitter.com' in h or 'x.com' in h: data['tw'] = href
+        elif 'instagram.com' in h: data['insta'] = href
+        elif 'youtube.com' in h: data['yt'] = href
+        elif 'tiktok.com' in h: data['tiktok'] = href
+
+def es_href_estacion(href):
+    """'/us/wxyz/' es una estación; '/us/genre/rock/' o '/us/?cs=...' son listados."""
+    return href.startswith('/us/') and '?' not in href and '/genre/' not in href and href.strip('/') != 'us'
+
+def _estacion_listado(href, nombre, info, logo=None):
+    """
+    Resumen de una estación desde un <li> de listado o de búsqueda: URL, nombre,
+    frecuencia (del nombre o de la línea de info) y miniatura del logo.
+    """
+    return {'orb_url': href, 'nombre': nombre,
+            'freq': extract_freq_robust(nombre) or extract_freq_robust(info),
+            'logo': fix_image_url(logo)}
+
+def _asignar_freq(data, h1_text):
+    freq_found = extract_freq_robust(h1_text)
+    if not freq_found and data['description']:
+        freq_found = extract_freq_robust(data['description'])
+    data['orb_freq'] = freq_found
+
+# ================= BACKEND BS4 =================
+# BeautifulSoup se importa al usar este backend (con lxml no se carga).
+
+def _sopa(html):
+    from bs4 import BeautifulSoup
+    return BeautifulSoup(html, 'html.parser')
+
+def _busqueda_bs4(html):
+    soup = _sopa(html)
+    res = soup.select_one('ul.stations-list li a[href^="/us/"]')
+    return res['href'] if res else None
+
+def _detalle_bs4(html, data):
+    soup_page = _sopa(html)
+
+    # A. LOGO (Intento doble)
+    fig = soup_page.select_one('figure.station_logo img')
+    if fig: data['logo'] = fix_image_url(fig.get('src'))
+    elif soup_page.find('img', attrs={'itemprop': 'image'}):
+         data['logo'] = fix_image_url(soup_page.find('img', attrs={'itemprop': 'image'}).get('src'))
+
+    # B. LOCATION (Separada y Lista)
+    bc_items = soup_page.select('ul.breadcrumbs li[itemprop="itemListElement"] span[itemprop="name"]')
+    _asignar_location(data, [x.get_text(strip=True) for x in bc_items])
+
+    # C. TAGS (Estrategia agresiva por URL /genre/)
+    # dict como set ordenado: tags sin repetir, en el orden del documento
+    seen_tags = dict.fromkeys(link.get_text(strip=True) for link in soup_page.select('a[href*="/genre/"]'))
+    tags_list = [] if seen_tags else soup_page.select('ul.station_tags li a')
+    _asignar_tags(data, seen_tags, [t.get_text(strip=True) for t in tags_list])
+
+    # D. IDIOMA (Estrategia Triple)
+    lang_val = None
+    lang_li = soup_page.select_one('li.station_reference_lang') # 1. Clase específica
+    if lang_li:
+        lang_val = lang_li.get_text(strip=True)
+
+    if not lang_val:
+        lang_link = soup_page.select_one('a[href*="/search?l="]') # 2. Link de búsqueda de idioma
+        if lang_link:
+            lang_val = lang_link.get_text(strip=True)
+
+    data['language'] = lang_val
+
+    # E. STREAM Y DESCRIPCIÓN
+    btn_play = soup_page.select_one('button.station_play')
+    if btn_play and btn_play.get('stream'):
+        data['stream_url'] = btn_play.get('stream')
+
+    desc_div = soup_page.find('div', attrs={'itemprop': 'description'})
+    if desc_div:
+        data['description'] = desc_div.get_text(separator=' ', strip=True)
+
+    # F. CONTACTOS (TABLA)
+    table = soup_page.find('table', attrs={'role': 'complementary'})
+    if table:
+        # Dirección
+        addr = table.find('span', attrs={'itemprop': 'address'})
+        if addr: data['address'] = addr.get_text(separator=' ', strip=True)
+
+        # Teléfono
+        tel = table.find('a', attrs={'itemprop': 'telephone'})
+        if tel: data['phone'] = tel.get_text().strip()
+
+        # Email (USANDO ESTRATEGIA NUCLEAR)
+        mail_link = table.find('a', attrs={'itemprop': 'email'})
+        data['email'] = extract_email_power(mail_link)
+
+        # Sitio Web
+        site = table.find('a', attrs={'itemprop': 'url'})
+        if site: data['site'] = site['href']
+
+        # Redes Sociales
+        _asignar_redes(data, [l['href'] for l in table.find_all('a', href=True)])
+
+    # G. FRECUENCIA
+    h1 = soup_page.find('h1', attrs={'itemprop': 'name'})
+    _asignar_freq(data, h1.get_text() if h1 else "")
+
+def _listado_bs4(html):
+    soup = _sopa(html)
+    estaciones = []
+    for li in soup.select('ul.stations-list > li'):
+        link = next((a for a in li.find_all('a', href=True) if es_href_estacion(a['href'])), None)
+        if not link: continue
+        info = li.select_one('.stations__station__info')
+        img = li.find('img')
+        estaciones.append(_estacion_listado(
+            link['href'], link.get_text(separator=' ', strip=True),
+            info.get_text(separator=' ', strip=True) if info else '',
+            (img.get('src') or img.get('data-src')) if img else None))
+    enlaces = [a['href'] for a in soup.find_all('a', href=True)]
+    return estaciones, enlaces
+
+def _asignar_location(data, locs):
+    data['location_parts'] = locs # Para compatibilidad
+
+    if len(locs) > 0: data['country'] = locs[0]
+    if len(locs) > 1: data['state'] = locs[1]
+    if len(locs) > 2: data['city'] = locs[2]
+
+# ================= BACKEND LXML =================
+# Reproduce la semántica de BeautifulSoup que usa el scraper:
+#   - get_text() no incluye comentarios ni el texto de <script>/<style>/<template>/<rt>/<rp>
+#   - find/select_one devuelven la primera coincidencia en orden de documento
+#   - los selectores con descendientes se resuelven mirando los ancestros del nodo
+
+_SIN_TEXTO = frozenset(('script', 'style', 'template', 'rt', 'rp'))
+
+def _strings(el):
+    if el.text: yield el.text
+    for hijo in el:
+        if isinstance(hijo.tag, str) and hijo.tag not in _SIN_TEXTO:
+            yield from _strings(hijo)
+        if hijo.tail: yield hijo.tail
+
+def _texto(el, separator='', strip=False):
+    if not strip:
+        return separator.join(_strings(el))
+    return separator.join(s for s in (s.strip() for s in _strings(el)) if s)
+
+def _clases(el):
+    return (el.get('class') or '').split()
+
+def _ancestros(el):
+    el = el.getparent()
+    while el is not None:
+        yield el
+        el = el.getparent()
+
+def _dentro_de(el, *pasos):
+    """
+    True si `el` está dentro de una cadena de ancestros que cumple `pasos`
+    (de adentro hacia afuera), como el combinador descendiente de CSS.
+    """
+    ancestros = _ancestros(el)
+    for paso in pasos:
+        if not any(paso(a) for a in ancestros):
+            return False
+    return True
+
+def _elementos(raiz):
+    return (el for el in raiz.iter() if isinstance(el.tag, str))
+
+def _raiz(html):
+    if not html or not html.strip():
+        return None
+    return lxml.html.document_fromstring(html)
+
+def _es_li(a): return a.tag == 'li'
+def _es_stations_list(a): return a.tag == 'ul' and 'stations-list' in _clases(a)
+def _es_li_breadcrumb(a): return a.tag == 'li' and a.get('itemprop') == 'itemListElement'
+def _es_breadcrumbs(a): return a.tag == 'ul' and 'breadcrumbs' in _clases(a)
+def _es_station_tags(a): return a.tag == 'ul' and 'station_tags' in _clases(a)
+def _es_station_logo(a): return a.tag == 'figure' and 'station_logo' in _clases(a)
+
+def _busqueda_lxml(html):
+    raiz = _raiz(html)
+    if raiz is None: return None
+    for el in raiz.iter('a'):
+        if (el.get('href') or '').startswith('/us/') and _dentro_de(el, _es_li, _es_stations_list):
+            return el.get('href')
+    return None
+
+def _es_stations_list_padre(li):
+    padre = li.getparent()
+    return padre is not None and _es_stations_list(padre)
+
+def _listado_lxml(html):
+    raiz = _raiz(html)
+    if raiz is None: return [], []
+    estaciones, enlaces = [], []
+    for el in raiz.iter('li', 'a'):
+        if el.tag == 'a':
+            if el.get('href') is not None: enlaces.append(el.get('href'))
+            continue
+        if not _es_stations_list_padre(el): continue
+        link = next((a for a in el.iter('a') if es_href_estacion(a.get('href') or '')), None)
+        if link is None: continue
+        info = next((x for x in el.iter() if isinstance(x.tag, str) and x is not el
+                     and 'stations__station__info' in _clases(x)), None)
+        img = next(el.iter('img'), None)
+        estaciones.append(_estacion_listado(
+            link.get('href'), _texto(link, separator=' ', strip=True),
+            _texto(info, separator=' ', strip=True) if info is not None else '',
+            (img.get('src') or img.get('data-src')) if img is not None else None))
+    return estaciones, enlaces
+
+def _email_lxml(el):
+    if el is None: return None
+    cf_token = el.get('data-cfemail')
+    if not cf_token:
+        for d in el.iterdescendants():
+            if isinstance(d.tag, str) and d.get('data-cfemail') is not None:
+                cf_token = d.get('data-cfemail')
+                break
+    return _email_desde(cf_token, el.get('href', ''), _texto(el, strip=True))
+
+def _detalle_lxml(html, data):
+    raiz = _raiz(html)
+    if raiz is None:
+        _asignar_location(data, [])
+        _asignar_freq(data, "")
+        return
+
+    # Un solo recorrido: primera coincidencia (o todas) de cada selector
+    fig = img_itemprop = lang_li = lang_link = btn_play = desc_div = table = h1 = None
+    bc_items, genre_links, tags_list = [], [], []
+    for el in _elementos(raiz):
+        tag = el.tag
+        if tag == 'a':
+            href = el.get('href')
+            if href is not None:
+                if '/genre/' in href: genre_links.append(el)
+                if lang_link is None and '/search?l=' in href: lang_link = el
+            if _dentro_de(el, _es_li, _es_station_tags): tags_list.append(el)
+        elif tag == 'span':
+            if el.get('itemprop') == 'name' and _dentro_de(el, _es_li_breadcrumb, _es_breadcrumbs):
+                bc_items.append(el)
+        elif tag == 'img':
+            if fig is None and _dentro_de(el, _es_station_logo): fig = el
+            if img_itemprop is None and el.get('itemprop') == 'image': img_itemprop = el
+        elif tag == 'li':
+            if lang_li is None and 'station_reference_lang' in _clases(el): lang_li = el
+        elif tag == 'button':
+            if btn_play is None and 'station_play' in _clases(el): btn_play = el
+        elif tag == 'div':
+            if desc_div is None and el.get('itemprop') == 'description': desc_div = el
+        elif tag == 'table':
+            if table is None and el.get('role') == 'complementary': table = el
+        elif tag == 'h1':
+            if h1 is None and el.get('itemprop') == 'name': h1 = el
+
+    # A. LOGO
+    if fig is not None: data['logo'] = fix_image_url(fig.get('src'))
+    elif img_itemprop is not None: data['logo'] = fix_image_url(img_itemprop.get('src'))
+
+    # B. LOCATION
+    _asignar_location(data, [_texto(x, strip=True) for x in bc_items])
+
+    # C. TAGS
+    seen_tags = dict.fromkeys(_texto(link, strip=True) for link in genre_links)
+    _asignar_tags(data, seen_tags, [] if seen_tags else [_texto(t, strip=True) for t in tags_list])
+
+    # D. IDIOMA
+    lang_val = _texto(lang_li, strip=True) if lang_li is not None else None
+    if not lang_val and lang_link is not None:
+        lang_val = _texto(lang_link, strip=True)
+    data['language'] = lang_val
+
+    # E. STREAM Y DESCRIPCIÓN
+    if btn_play is not None and btn_play.get('stream'):
+        data['stream_url'] = btn_play.get('stream')
+    if desc_div is not None:
+        data['description'] = _texto(desc_div, separator=' ', strip=True)
+
+    # F. CONTACTOS (TABLA)
+    if table is not None:
+        addr = tel = mail_link = site = None
+        hrefs = []
+        for el in _elementos(table):
+            if el is table: continue
+            if el.tag == 'span':
+                if addr is None and el.get('itemprop') == 'address': addr = el
+            elif el.tag == 'a':
+                prop = el.get('itemprop')
+                if tel is None and prop == 'telephone': tel = el
+                elif mail_link is None and prop == 'email': mail_link = el
+                elif site is None and prop == 'url': site = el
+                if el.get('href') is not None: hrefs.append(el.get('href'))
+
+        if addr is not None: data['address'] = _texto(addr, separator=' ', strip=True)
+        if tel is not None: data['phone'] = _texto(tel).strip()
+        data['email'] = _email_lxml(mail_link)
+        if site is not None: data['site'] = site.attrib['href']
+        _asignar_redes(data, hrefs)
+
+    # G. FRECUENCIA
+    _asignar_freq(data, _texto(h1) if h1 is not None else "")
+
+# ================= SELECCIÓN DE BACKEND =================
+
+BACKENDS = {
+    "bs4": (_busqueda_bs4, _detalle_bs4, _listado_bs4),
+    "lxml": (_busqueda_lxml, _detalle_lxml, _listado_lxml),
+}
+
+def backend(nombre=None):
+    """(parsear_busqueda, parsear_detalle, parsear_listado) del backend pedido; sin lxml cae a bs4."""
+    nombre = nombre or PARSER_ORB
+    if nombre == "lxml" and lxml is None:
+        nombre = "bs4"
+    return BACKENDS[nombre]
+
+def parsear_busqueda(html, nombre=None):
+    """href ('/us/...') del primer resultado de la búsqueda ORB, o None."""
+    return backend(nombre)[0](html)
+
+def parsear_detalle(html, data, nombre=None):
+    """Llena `data` (dict de scrape_orb_v10) con los campos de la página de detalle."""
+    backend(nombre)[1](html, data)
+    return data
+
+def parsear_listado(html, nombre=None):
+    """
+    Página de listado o de búsqueda ORB: ([{orb_url, nombre, freq, logo}], [hrefs]).
+    Los hrefs sirven para descubrir otros listados y la paginación.
+    """
+    return backend(nombre)[2](html)
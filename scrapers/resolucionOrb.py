@@ -0,0 +1,386 @@
+import json
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse
+
+from config import (
+    ORB_RESOLUCION_ACTIVA, ORB_RESOLUCION_DB, ORB_RESOLUCION_TTL, ORB_RESOLUCION_TTL_BAJA,
+    ORB_CONFIANZA_MIN, ORB_SOLO_RESUMEN, ORB_RESUMEN_MAX_EDAD
+)
+from scrapers.indiceFcc import base_callsign
+from scrapers.orb import data_vacia, buscar_resumen_orb, scrape_orb_v10, scrape_orb_url, firma_resumen
+
+# ================= ÍNDICE DE RESOLUCIÓN ORB =================
+# stationuuid / callsign -> URL de detalle ORB, con confianza y fecha de verificación.
+# Con una entrada conocida se va directo a la página de detalle (sin búsqueda).
+# Las entradas vencidas o de baja confianza se usan igual (es lo que devolvió la
+# última búsqueda) y se re-verifican en segundo plano para la próxima corrida.
+# También se recuerda "no está en ORB" (orb_url NULL).
+# La clave por callsign guarda lo que devuelve la búsqueda por callsign y solo
+# se usa para saltar esa búsqueda en el fallback.
+#
+# Detalles guardados (fetch en dos etapas): cada página de detalle bajada con un
+# resumen de búsqueda o de listado (nombre, frecuencia, miniatura del <li>) queda
+# guardada ya parseada junto a la firma de ese resumen. La próxima vez que aparezca
+# el mismo resumen, visto después de la descarga, no se baja el detalle si la
+# copia tiene datos de contacto y no superó ORB_RESUMEN_MAX_EDAD.
+# Cada URL guarda además el último resumen visto (búsquedas, re-verificaciones,
+# crawls del catálogo): el camino directo, que no ve ningún <li>, lo compara con
+# el de la descarga y baja el detalle solo si cambió.
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS resoluciones (
+    clave TEXT PRIMARY KEY,        -- 'uuid:<stationuuid>' | 'call:<CALLSIGN>'
+    orb_url TEXT,                  -- NULL = ninguna búsqueda encontró la estación
+    confianza REAL NOT NULL,
+    fuente TEXT NOT NULL,          -- 'titulo' | 'callsign' | 'catalogo'
+    verificado_at REAL NOT NULL
+)
+"""
+
+_SCHEMA_DETALLES = """
+CREATE TABLE IF NOT EXISTS detalles (
+    orb_url TEXT PRIMARY KEY,
+    firma TEXT NOT NULL,           -- firma_resumen del <li> con el que se bajó el detalle
+    data TEXT NOT NULL,            -- campos de la página de detalle (JSON)
+    guardado_at REAL NOT NULL,
+    resumen TEXT,                  -- último resumen visto de la URL (JSON: nombre, freq, logo)
+    visto_at REAL                  -- cuándo se vio ese resumen
+)
+"""
+
+CAMPOS_CONTACTO = ('email', 'phone')
+
+FUENTE_TITULO = "titulo"
+FUENTE_CALLSIGN = "callsign"
+FUENTE_CATALOGO = "catalogo"
+
+
+def confianza_resolucion(fuente, orb_url, callsign=None, freq_hint=None, orb_freq=None):
+    """
+    0..1: qué tan seguro es que `orb_url` sea la estación.
+    Base por búsqueda (título > callsign) + callsign en la URL + frecuencia coincidente.
+    """
+    if not orb_url:
+        return 0.0
+    c = 0.6 if fuente == FUENTE_TITULO else 0.5
+    ruta = urlparse(orb_url).path.lower()
+    if callsign and base_callsign(callsign).lower() in ruta:
+        c += 0.3
+    try:
+        if freq_hint and orb_freq and abs(float(freq_hint) - float(str(orb_freq).split()[0])) <= 0.05:
+            c += 0.3
+    except ValueError:
+        pass
+    return round(min(1.0, c), 2)
+
+
+class IndiceResolucionOrb:
+    def __init__(self, path=ORB_RESOLUCION_DB, activo=ORB_RESOLUCION_ACTIVA, solo_resumen=ORB_SOLO_RESUMEN):
+        self.path = path
+        self.activo = activo
+        self.solo_resumen = solo_resumen
+        self.resumenes = {}  # orb_url -> resumen de listado (catálogo cargado en esta corrida)
+        self.lock = threading.Lock()
+        self.stats = {"directas": 0, "busquedas": 0, "invalidadas": 0, "reverificadas": 0, "solo_resumen": 0}
+        self._conn = None
+        self._pool = None
+        self._en_verificacion = set()
+
+    def _db(self):
+        if self._conn is None:
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(_SCHEMA)
+            self._conn.execute(_SCHEMA_DETALLES)
+            # Detalles guardados antes del último resumen visto no tienen sus columnas
+            columnas = [c[1] for c in self._conn.execute("PRAGMA table_info(detalles)")]
+            for columna, tipo in (("resumen", "TEXT"), ("visto_at", "REAL")):
+                if columna not in columnas:
+                    self._conn.execute(f"ALTER TABLE detalles ADD COLUMN {columna} {tipo}")
+            self._conn.commit()
+        return self._conn
+
+    def _contar(self, clave):
+        with self.lock:
+            self.stats[clave] += 1
+
+    # ---------- Entradas ----------
+
+    def buscar(self, claves):
+        """Primera entrada existente entre `claves`: (clave, orb_url, confianza, fuente, verificado_at)."""
+        with self.lock:
+            for clave in claves:
+                row = self._db().execute(
+                    "SELECT clave, orb_url, confianza, fuente, verificado_at FROM resoluciones WHERE clave = ?",
+                    (clave,)).fetchone()
+                if row: return row
+        return None
+
+    def guardar(self, claves, orb_url, confianza, fuente):
+        ahora = time.time()
+        with self.lock:
+            self._db().executemany(
+                "INSERT OR REPLACE INTO resoluciones VALUES (?, ?, ?, ?, ?)",
+                [(c, orb_url, confianza, fuente, ahora) for c in claves])
+            self._db().commit()
+
+    def borrar(self, claves):
+        with self.lock:
+            self._db().executemany("DELETE FROM resoluciones WHERE clave = ?", [(c,) for c in claves])
+            self._db().commit()
+
+    @staticmethod
+    def vencida(entrada, ahora=None):
+        _, _, confianza, _, verificado_at = entrada
+        ttl = ORB_RESOLUCION_TTL if confianza >= ORB_CONFIANZA_MIN else ORB_RESOLUCION_TTL_BAJA
+        return (ahora or time.time()) - verificado_at > ttl
+
+    # ---------- Detalles guardados (fetch en dos etapas) ----------
+
+    def detalle_guardado(self, orb_url, resumen=None, ahora=None):
+        """
+        Campos de detalle guardados de `orb_url` si alcanza con `resumen` (ver cabecera);
+        si no, None. Sin `resumen` (URL ya resuelta) vale el último resumen visto de la URL.
+        """
+        if not self.solo_resumen:
+            return None
+        with self.lock:
+            row = self._db().execute("SELECT firma, data, guardado_at, resumen FROM detalles WHERE orb_url = ?",
+                                     (orb_url,)).fetchone()
+        if row is None:
+            return None
+        firma_previa, data, guardado_at, ultimo = row
+        ahora = ahora or time.time()
+        if resumen is None:
+            resumen = json.loads(ultimo) if ultimo else None
+        elif resumen.get('visto_at', ahora) < guardado_at:
+            return None
+        if firma_resumen(resumen) != firma_previa or ahora - guardado_at > ORB_RESUMEN_MAX_EDAD:
+            return None
+        data = json.loads(data)
+        if not any(data.get(c) for c in CAMPOS_CONTACTO):
+            return None  # sin contacto conocido vale la pena volver a mirar la página
+        self._contar("solo_resumen")
+        return data
+
+    def guardar_detalle(self, orb_url, resumen, data):
+        """Guarda el detalle bajado con `resumen` (None: con el último resumen visto de la URL)."""
+        if not self.solo_resumen:
+            return
+        ahora = time.time()
+        with self.lock:
+            if resumen is None:
+                row = self._db().execute("SELECT resumen, visto_at FROM detalles WHERE orb_url = ?",
+                                         (orb_url,)).fetchone()
+                if row is None or row[0] is None:
+                    return  # ningún resumen conocido con el que comparar la próxima vez
+                resumen, visto_at = json.loads(row[0]), row[1]
+            else:
+                visto_at = resumen.get('visto_at', ahora)
+            firma = firma_resumen(resumen)
+            if firma is None:
+                return
+            campos = {k: v for k, v in data.items() if k not in ('orb_url', 'error')}
+            self._db().execute(
+                "INSERT OR REPLACE INTO detalles (orb_url, firma, data, guardado_at, resumen, visto_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (orb_url, firma, json.dumps(campos, ensure_ascii=False), ahora, _resumen_json(resumen), visto_at))
+            self._db().commit()
+
+    def actualizar_resumenes(self, resumenes):
+        """Último resumen visto de cada URL con detalle guardado (los más viejos que el guardado se ignoran)."""
+        ahora = time.time()
+        filas = [(_resumen_json(r), r.get('visto_at', ahora), r['orb_url'], r.get('visto_at', ahora))
+                 for r in resumenes if r and r.get('orb_url') and firma_resumen(r) is not None]
+        if not filas:
+            return
+        with self.lock:
+            self._db().executemany("UPDATE detalles SET resumen = ?, visto_at = ? "
+                                   "WHERE orb_url = ? AND (visto_at IS NULL OR visto_at < ?)", filas)
+            self._db().commit()
+
+    # ---------- Re-verificación en segundo plano ----------
+
+    def reverificar(self, clave, referencia):
+        """Encola una búsqueda (título, luego callsign) que actualiza la entrada. Una por clave."""
+        with self.lock:
+            if clave in self._en_verificacion: return
+            self._en_verificacion.add(clave)
+            if self._pool is None:
+                self._pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="reverificar-orb")
+        self._pool.submit(self._reverificar, clave, referencia)
+
+    def _reverificar(self, clave, referencia):
+        titulo, callsign = referencia['titulo'], referencia['callsign']
+        try:
+            resumen, fuente, error = _buscar(titulo, callsign, referencia)
+            if error: return  # fallo de red: se reintenta en otra corrida
+            orb_url = resumen['orb_url'] if resumen else None
+            if resumen:
+                self.actualizar_resumenes([resumen])  # el camino directo compara contra este
+            previa = self.buscar([clave])
+            confianza = confianza_resolucion(fuente, orb_url, callsign)
+            if previa and previa[1] == orb_url:
+                confianza = max(confianza, previa[2])  # ya confirmada por frecuencia
+            self.guardar([clave], orb_url, confianza, fuente)
+            self._contar("reverificadas")
+        except Exception as e:
+            print(f"   [!] Re-verificación ORB falló ({titulo}): {e}")
+        finally:
+            with self.lock:
+                self._en_verificacion.discard(clave)
+
+    def cerrar(self):
+        """Termina las re-verificaciones en curso; las que no empezaron quedan para la próxima corrida."""
+        if self._pool is not None:
+            self._pool.shutdown(wait=True, cancel_futures=True)
+            self._pool = None
+        with self.lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    def resumen(self):
+        s = self.stats
+        return (f"Resolución ORB: {s['directas']} directas (sin búsqueda), {s['busquedas']} con búsqueda, "
+                f"{s['invalidadas']} invalidadas, {s['reverificadas']} re-verificadas, "
+                f"{s['solo_resumen']} detalles no descargados (resumen sin cambios)")
+
+
+RESOLUCION = IndiceResolucionOrb()
+
+
+def _clave_uuid(clave_estacion):
+    return f"uuid:{clave_estacion}"
+
+
+def _clave_call(callsign):
+    return f"call:{callsign.upper()}"
+
+
+def sembrable(clave_estacion, indice=None):
+    """True si la estación no tiene entrada o la tiene del catálogo (se refresca con cada crawl)."""
+    entrada = (indice or RESOLUCION).buscar([_clave_uuid(clave_estacion)])
+    return entrada is None or entrada[3] == FUENTE_CATALOGO
+
+
+def sembrar(clave_estacion, orb_url, confianza, fuente=FUENTE_CATALOGO, indice=None):
+    """Registra una resolución obtenida fuera de la búsqueda (p. ej. del catálogo de listados)."""
+    (indice or RESOLUCION).guardar([_clave_uuid(clave_estacion)], orb_url, confianza, fuente)
+
+
+def registrar_resumenes(entradas, indice=None):
+    """
+    Resúmenes de listado (entradas del catálogo) para las estaciones con URL ya
+    resuelta: en memoria para esta corrida y como último resumen visto de cada URL.
+    """
+    indice = indice or RESOLUCION
+    indice.resumenes.update((e['orb_url'], e) for e in entradas)
+    indice.actualizar_resumenes(entradas)
+
+
+def _resumen_json(resumen):
+    return json.dumps({k: resumen.get(k) for k in ('nombre', 'freq', 'logo')}, ensure_ascii=False)
+
+
+def _referencia(titulo, callsign, freq_hint):
+    """Datos de la estación para elegir entre los resultados de la búsqueda (vinculacion)."""
+    return {'titulo': titulo, 'callsign': callsign, 'freq': freq_hint}
+
+
+def _buscar(titulo, callsign, referencia):
+    """Búsqueda por título y, si no hay resultado, por callsign: (resumen, fuente, error)."""
+    data = data_vacia()
+    resumen = buscar_resumen_orb(titulo, data, referencia)
+    if resumen: return resumen, FUENTE_TITULO, None
+    error_previo = data['error']
+    if callsign:
+        data = data_vacia()
+        resumen = buscar_resumen_orb(callsign, data, referencia)
+        if resumen: return resumen, FUENTE_CALLSIGN, None
+    return None, FUENTE_CALLSIGN if callsign else FUENTE_TITULO, data['error'] or error_previo
+
+
+def _respondio(orb):
+    """La búsqueda respondió (encontrada o no): un 429 o un timeout no es "no encontrada"."""
+    return bool(orb.get('orb_url')) or not orb.get('error')
+
+
+def _scrape_callsign(callsign, indice, referencia):
+    """Fallback con callsign: usa la resolución por callsign si está vigente."""
+    entrada = indice.buscar([_clave_call(callsign)])
+    if entrada and not indice.vencida(entrada):
+        if entrada[1] is None:
+            indice._contar("directas")
+            return data_vacia()
+        orb = scrape_orb_url(entrada[1], indice.resumenes.get(entrada[1]), indice)
+        if orb['error'] != "HTTP 404":
+            indice._contar("directas")
+            return orb
+        indice._contar("invalidadas")
+
+    orb = scrape_orb_v10(callsign, referencia, indice)
+    if _respondio(orb):
+        confianza = confianza_resolucion(FUENTE_CALLSIGN, orb.get('orb_url'), callsign)
+        indice.guardar([_clave_call(callsign)], orb.get('orb_url'), confianza, FUENTE_CALLSIGN)
+    return orb
+
+
+def _scrape_con_busqueda(titulo, callsign, indice, referencia):
+    """Flujo original: búsqueda por título y fallback con callsign."""
+    orb = scrape_orb_v10(titulo, referencia, indice)
+    fuente = FUENTE_TITULO
+
+    # Fallback con callsign
+    if not orb.get('orb_url') and callsign:
+         print(f"   -> Reintentando con Callsign: {callsign}")
+         error_previo = orb.get('error')
+         if indice.activo:
+             orb = _scrape_callsign(callsign, indice, referencia)
+         else:
+             orb = scrape_orb_v10(callsign, referencia, indice)
+         fuente = FUENTE_CALLSIGN
+         # Si la búsqueda por título falló por red, no darla por "no encontrada"
+         if not orb.get('orb_url') and error_previo and not orb.get('error'):
+             orb['error'] = error_previo
+    return orb, fuente
+
+
+def resolver_y_scrapear(clave_estacion, titulo, callsign=None, freq_hint=None, indice=None):
+    """
+    Datos ORB de una estación. Con el índice: URL conocida -> detalle directo;
+    si no, búsqueda (título, luego callsign) y se registra la resolución.
+    """
+    indice = indice or RESOLUCION
+    referencia = _referencia(titulo, callsign, freq_hint)
+    if not indice.activo or not clave_estacion:
+        return _scrape_con_busqueda(titulo, callsign, indice, referencia)[0]
+
+    clave = _clave_uuid(clave_estacion)
+    entrada = indice.buscar([clave])
+    if entrada:
+        orb_url = entrada[1]
+        if indice.vencida(entrada):
+            indice.reverificar(clave, referencia)
+        if orb_url is None:
+            indice._contar("directas")
+            return data_vacia()  # ninguna búsqueda la encontró (se re-verifica al vencer)
+
+        orb = scrape_orb_url(orb_url, indice.resumenes.get(orb_url), indice)
+        if orb['error'] != "HTTP 404":
+            indice._contar("directas")
+            return orb
+        # La página ya no existe: se olvida la resolución y se busca de nuevo
+        print(f"   -> URL ORB obsoleta, buscando de nuevo: {orb_url}")
+        indice._contar("invalidadas")
+        indice.borrar([clave])
+
+    indice._contar("busquedas")
+    orb, fuente = _scrape_con_busqueda(titulo, callsign, indice, referencia)
+    if _respondio(orb):
+        confianza = confianza_resolucion(fuente, orb.get('orb_url'), callsign, freq_hint, orb.get('orb_freq'))
+        indice.guardar([clave], orb.get('orb_url'), confianza, fuente)
+    return orb
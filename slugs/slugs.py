@@ -1,20 +1,16 @@
-import requests
-import pandas as pd
 import re
-from bs4 import BeautifulSoup
+import sqlite3
+import threading
 import time
 import unicodedata
-from urllib.parse import quote_plus, urljoin, urlparse
-from PIL import Image, ImageOps, ImageFilter, ImageChops, ImageEnhance
-import os, math
+
+from config import SLUGS_DB
 # ================= UTILIDADES DE TRANSFORMACIÓN =================
 # Regex
 REGEX_CALLSIGN = re.compile(r'\b([KW][A-Z0-9-]{2,4})\b', re.IGNORECASE)
 REGEX_FREQ_TITLE = re.compile(r'\b(\d{2,4}(\.\d)?)\b') # Busca números flotantes
 REGEX_ZIPCODE = re.compile(r'\b\d{5}(?:-\d{4})?\b') # Busca Codigo Postal USA
 
-# Cache para slugs únicos
-USED_SLUGS = []
 def to_slug(text):
     """
     Port exacto de tu función JS utils/slugify.js a Python
@@ -40,20 +36,137 @@ def to_slug(text):
     
     return text
 
-def generate_unique_slug(title, location_part=""):
-    """Genera slug único, agregando contador si ya existe."""
+# ================= REGISTRO DE SLUGS =================
+# Asignación O(1): conjunto de slugs usados + próximo contador por base
+# ("radio-station" -> 3 significa que ya se dieron radio-station-1 y -2).
+# Persistido en SQLite y ligado a la identidad de la estación (stationuuid):
+# una estación conserva su slug entre corridas mientras no cambie su base.
+# Los slugs no se liberan: una URL publicada no pasa a otra estación.
+# Varios procesos pueden compartir el archivo (workers distribuidos): un slug
+# nuevo se inserta sin pisar y, si otro proceso ya lo tomó, se prueba el siguiente.
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS slugs (
+    slug TEXT PRIMARY KEY,
+    base TEXT NOT NULL,            -- slug sin contador
+    clave TEXT,                    -- estación dueña (NULL = reservado sin dueño)
+    creado_at REAL NOT NULL
+)
+"""
+
+
+class RegistroSlugs:
+    def __init__(self, path=SLUGS_DB):
+        self.path = path
+        self.lock = threading.Lock()
+        self._conn = None
+        self.usados = set()
+        self.siguiente = {}     # base -> próximo contador a probar
+        self.por_clave = {}     # clave de estación -> slug
+
+    def _db(self):
+        """Conexión perezosa; al abrir carga el registro en memoria."""
+        if self._conn is None:
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(_SCHEMA)
+            self._conn.commit()
+            for slug, base, clave in self._conn.execute(
+                    "SELECT slug, base, clave FROM slugs ORDER BY creado_at"):
+                self._marcar(slug, base, clave)
+        return self._conn
+
+    @staticmethod
+    def _contador(slug, base):
+        """N si `slug` es base-N, 0 si es la base misma, None si no es de esa base."""
+        if slug == base: return 0
+        sufijo = slug[len(base) + 1:] if slug.startswith(base + "-") else ""
+        return int(sufijo) if sufijo.isdigit() else None
+
+    def _marcar(self, slug, base, clave):
+        self.usados.add(slug)
+        n = self._contador(slug, base)
+        if n:
+            self.siguiente[base] = max(self.siguiente.get(base, 1), n + 1)
+        if clave:
+            self.por_clave[clave] = slug
+
+    def _registrar(self, slug, base, clave, reemplazar=True):
+        """Persiste el slug; con reemplazar=False, IntegrityError si otro proceso ya lo registró."""
+        db = self._db()
+        try:
+            if clave:
+                # Una estación tiene un único slug vigente; los anteriores quedan reservados
+                db.execute("UPDATE slugs SET clave = NULL WHERE clave = ? AND slug != ?", (clave, slug))
+            db.execute(f"INSERT {'OR REPLACE ' if reemplazar else ''}INTO slugs VALUES (?, ?, ?, ?)",
+                       (slug, base, clave, time.time()))
+            db.commit()
+        except sqlite3.IntegrityError:
+            db.rollback()
+            raise
+        self._marcar(slug, base, clave)
+
+    def asignar(self, base, clave=None):
+        """Slug único para `base` (base, base-1, base-2, ...); estable por `clave`."""
+        with self.lock:
+            self._db()
+            previo = self.por_clave.get(clave) if clave else None
+            if previo and self._contador(previo, base) is not None:
+                return previo
+
+            while True:
+                slug = base
+                if slug in self.usados:
+                    n = self.siguiente.get(base, 1)
+                    # Solo se salta lo que ya existe con ese nombre (p. ej. una base "radio-1")
+                    while f"{base}-{n}" in self.usados:
+                        n += 1
+                    slug = f"{base}-{n}"
+                    self.siguiente[base] = n + 1
+                try:
+                    self._registrar(slug, base, clave, reemplazar=False)
+                    return slug
+                except sqlite3.IntegrityError:
+                    # Lo registró otro proceso con el mismo archivo: queda usado y se prueba el siguiente
+                    self._marcar(slug, base, None)
+
+    def reservar(self, slug, clave=None):
+        """Registra un slug ya asignado (p. ej. estaciones completas del almacén de estado)."""
+        if not slug: return
+        with self.lock:
+            self._db()
+            if slug in self.usados and (not clave or self.por_clave.get(clave) == slug):
+                return
+            base = re.sub(r'-\d+$', '', slug)
+            if base == slug or base not in self.usados:
+                base = slug  # sin contador propio (la base real también puede terminar en número)
+            self._registrar(slug, base, clave)
+
+    def __len__(self):
+        with self.lock:
+            self._db()
+            return len(self.usados)
+
+    def cerrar(self):
+        with self.lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+REGISTRO_SLUGS = RegistroSlugs()
+
+
+def generate_unique_slug(title, location_part="", clave=None, registro=None):
+    """Genera slug único, agregando contador si ya existe. Con `clave`, estable entre corridas."""
     base = title
     if location_part: base = f"{title}-{location_part}"
     
     slug = to_slug(base)
     if not slug: slug = "radio-station" # Fallback
-    
-    original_slug = slug
-    count = 1
-    
-    while slug in USED_SLUGS:
-        slug = f"{original_slug}-{count}"
-        count += 1
-    
-    USED_SLUGS.append(slug)
-    return slug
+
+    return (registro or REGISTRO_SLUGS).asignar(slug, clave)
+
+def reservar_slug(slug, clave=None, registro=None):
+    """Marca como usado un slug ya asignado (ej: estaciones completas en --resume)."""
+    (registro or REGISTRO_SLUGS).reservar(slug, clave)
@@ -0,0 +1,63 @@
+"""
+Parsers ORB contra la salida fijada del scrape_orb_v10 original (BeautifulSoup, previo a orbParser).
+
+benchmarks/fixtures/orb/esperado_v10.json guarda lo que devolvía el scrape_orb_v10 original
+sobre cada fixture: la orb_url de las búsquedas y los campos de las páginas de detalle
+(más si el parseo cortaba con una excepción; los campos llenados antes del error cuentan).
+El original armaba los tags con un set; se fijan en el orden del documento, como los emite
+orbParser. 'error' no existía en el original: se compara aparte.
+
+    python -m pytest -q tests/
+"""
+import json
+import os
+import sys
+from urllib.parse import urljoin
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scrapers import orbParser
+from scrapers.orb import data_vacia
+
+FIXTURES = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                        "benchmarks", "fixtures", "orb")
+
+with open(os.path.join(FIXTURES, "esperado_v10.json"), encoding="utf-8") as f:
+    ESPERADO = json.load(f)
+
+BACKENDS = [pytest.param(nombre, marks=pytest.mark.skipif(nombre == "lxml" and orbParser.lxml is None,
+                                                          reason="lxml no instalado"))
+            for nombre in orbParser.BACKENDS]
+
+
+def _html(archivo):
+    with open(os.path.join(FIXTURES, archivo), encoding="utf-8") as f:
+        return f.read()
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+@pytest.mark.parametrize("archivo", sorted(ESPERADO["busqueda"]))
+def test_busqueda(backend, archivo):
+    href = orbParser.BACKENDS[backend][0](_html(archivo))
+    orb_url = urljoin("https://onlineradiobox.com", href) if href else None
+    assert orb_url == ESPERADO["busqueda"][archivo]
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+@pytest.mark.parametrize("archivo", sorted(ESPERADO["detalle"]))
+def test_detalle(backend, archivo):
+    esperado = ESPERADO["detalle"][archivo]
+    data = data_vacia()
+    excepcion = False
+    try:
+        orbParser.BACKENDS[backend][1](_html(archivo), data)
+    except Exception:
+        excepcion = True
+
+    assert excepcion == esperado["excepcion"]
+    # orb_url la fija la búsqueda, no la página de detalle
+    assert {k: data[k] for k in esperado["campos"]} == esperado["campos"]
+    assert set(data) == set(esperado["campos"]) | {"orb_url", "error"}
+    assert data["orb_url"] is None and data["error"] is None
@@ -1,24 +1,31 @@
 import os
-import requests
-import pandas as pd
-import re
-import time
-   
+import sys
+
+if __name__ == "__main__":
+    # `python version10.py [flags]` = `python cli.py run [flags]`: la CLI fija la
+    # configuración (archivo + entorno + flags) antes de que se importe config
+    from cli import main as cli_main
+    sys.exit(cli_main(["run", *sys.argv[1:]]))
+
 # Importar Configuración
 from config import (
-    LIMITE_PRUEBA, CARPETA_LOGOS, URL_FCC_FM, URL_FCC_AM,
-    URL_RADIO_BROWSER, HEADERS, REGEX_CALLSIGN, REGEX_ZIPCODE
+    LIMITE_PRUEBA, CARPETA_LOGOS, CONCURRENCIA, DELTA_MAX_EDAD_DIAS, LOGOS_WORKERS,
+    URL_RADIO_BROWSER, HEADERS, REGEX_ZIPCODE, EXPORT_NOMBRE, EXPORT_FORMATOS,
+    REPORTE_JSON, FILTRO_ESTADOS, LOGOS_ACTIVOS, ORB_CATALOGO_ACTIVO
 )
    
-# Scrapers
-from scrapers.fcc import parse_fcc_visual
-from scrapers.orb import scrape_orb_v10
-
-# Módulos personalizados
+# Módulos personalizados (livianos). Los que cargan numpy, lxml, requests o Pillow
+# (índice FCC, vinculación, scrapers ORB, logos) se importan dentro de la etapa
+# que los usa: importar version10 (o re-importarlo en cada proceso 'spawn' del
+# pool de logos) no paga su arranque.
 from clasificadorTipo.clasificadorTipo import classify_about_type
-from limpiezaTitulo.limpiezaTitulo import clean_title_extract_freq
-from slugs.slugs import generate_unique_slug
-from gestionDeImagenes.gestionImagen import download_and_process
+from limpiezaTitulo.limpiezaTitulo import normalizar_titulo, REGEX_FREQ_RESPALDO
+from slugs.slugs import REGISTRO_SLUGS, generate_unique_slug, reservar_slug
+from red import cliente
+from red.cache import CACHE
+from estado.almacen import AlmacenEstado, clave_estacion, firma_estacion, STATUS_OK, STATUS_ERROR
+from exportacion.exportador import ExportacionOrdenada, abrir_escritores
+from instrumentacion.tiempos import TIEMPOS, perfilado
 
 
 def crear_carpeta():
@@ -33,7 +40,7 @@ def _normalize_freq_str(freq_raw):
     if not freq_raw:
         return None, None
     s = str(freq_raw).strip().replace(',', '.')
-    m = re.search(r'([0-9]{2,4}(?:\.[0-9]+)?)', s)
+    m = REGEX_FREQ_RESPALDO.search(s)
     if not m:
         return None, None
     try:
@@ -68,205 +75,449 @@ def resolve_frequency_and_modulation_prefer_orb(fcc_entry, orb_entry, raw_title,
             mod = fcc_entry.get('service') or ('FM' if 87.5 <= val <= 108 else 'AM')
             return f, mod
 
-    # 3) Título
-    m = re.search(r'([0-9]{2,4}(?:\.[0-9]+)?)', raw_title)
-    if m:
-        try:
-            val = float(m.group(1))
-            if 87.5 <= val <= 108: return m.group(1), 'FM'
-            if 530 <= val <= 1700: return m.group(1), 'AM'
-        except: pass
+    # 3) Título (ya resuelto al normalizarlo)
+    respaldo = normalizar_titulo(raw_title).freq_respaldo
+    if respaldo:
+        return respaldo
 
     # 4) Fallback
     return None, 'STREAM'
 
 
+# -------------------------------
+# ETAPAS POR ESTACIÓN
+# -------------------------------
+def identificar_estacion(st):
+    """(título crudo, título limpio, frecuencia del título, callsign) de una estación RB."""
+    raw_title = st.get('name', '').strip()
+
+    # 1. LIMPIAR TÍTULO PRIMERO (Mejor búsqueda) + CALLSIGN
+    with TIEMPOS.medir("titulo_limpieza"):
+        t = normalizar_titulo(raw_title)
+    return raw_title, t.titulo, t.freq, t.callsign
+
+
+def preparar_estacion(st, fcc_db):
+    """Etapa de red: limpia título, resuelve callsign/FCC y scrapea ORB."""
+    from scrapers.resolucionOrb import resolver_y_scrapear
+    raw_title, clean_title, extracted_freq, callsign = identificar_estacion(st)
+    # Vínculo precalculado (callsign, frecuencia, estado, geo); si no hay, por callsign.
+    # FM y AM con el mismo callsign conviven en el índice: desempata la frecuencia del título
+    fcc = fcc_db.buscar_estacion(clave_estacion(st), callsign, freq_hint=extracted_freq)
+
+    # 2. SCRAPING ORB (Usando título limpio; con URL ya resuelta se salta la búsqueda)
+    orb = resolver_y_scrapear(clave_estacion(st), clean_title, callsign, extracted_freq)
+
+    # Debug
+    if orb.get('email'):
+         print(f"   [INFO] Contacto encontrado: {orb.get('email')}")
+
+    return {'st': st, 'raw_title': raw_title, 'clean_title': clean_title,
+            'callsign': callsign, 'fcc': fcc, 'orb': orb}
+
+
+def sembrar_desde_catalogo(batch):
+    """
+    Modo catálogo: recorre los listados ORB una vez y empareja localmente las
+    estaciones sin resolución conocida. Las emparejadas van directo al detalle;
+    el resto sigue usando la búsqueda.
+    """
+    from scrapers.catalogoOrb import cargar_catalogo_orb
+    from scrapers.resolucionOrb import sembrable, sembrar, registrar_resumenes
+    from vinculacion.vinculacion import vincular_con_orb
+    catalogo = cargar_catalogo_orb()
+    entradas = catalogo.entradas()
+    candidatas = [st for st in batch if sembrable(clave_estacion(st))]
+    vinculos = vincular_con_orb(candidatas, entradas, clave_estacion)
+    for clave, (orb_url, puntaje) in vinculos.items():
+        sembrar(clave, orb_url, puntaje)
+    # El listado también resume cada estación: con él se decide si bajar su detalle
+    registrar_resumenes(entradas)
+    catalogo.cerrar()
+    print(f"   -> Catálogo ORB: {len(vinculos)} estaciones emparejadas sin búsqueda")
+
+
+def asignar_ubicacion_y_slug(ctx):
+    """Etapa secuencial: ubicación y slug único (orden de llegada; estable por estación entre corridas)."""
+    st, orb = ctx['st'], ctx['orb']
+
+    # --- AQUI ESTÁ EL CAMBIO DE UBICACIÓN ---
+    # Priorizamos los campos separados que ahora devuelve tu nuevo orb.py
+    country = orb.get('country')
+    state = orb.get('state')
+    city = orb.get('city')
+
+    # Fallback a Radio-Browser si ORB no trajo nada
+    if not country: country = st.get('country', '')
+    if not state: state = st.get('state', '')
+    # Si la ciudad viene vacía de ORB, a veces RB la tiene
+    if not city: city = st.get('state', '') # RB a veces pone ciudad en state, cuidado aqui.
+
+    # Slug
+    slug_base = city if city else (state if state else "station")
+    ctx.update(country=country, state=state, city=city,
+               slug=generate_unique_slug(ctx['clean_title'], slug_base, clave=clave_estacion(st)))
+    return ctx
+
+
+def procesar_logo(ctx):
+    """Etapa de imagen: descarga y procesa el logo de ORB (si existe)."""
+    from gestionDeImagenes.gestionImagen import download_and_process
+    orb = ctx['orb']
+    if orb and orb.get('logo'):
+        try:
+            return download_and_process(orb['logo'], ctx['slug'], CARPETA_LOGOS)
+        except Exception as e:
+            return None
+    return None
+
+
+def construir_item(ctx, local_img):
+    """Mapea el contexto de la estación a la fila final del Excel."""
+    st, orb, fcc = ctx['st'], ctx['orb'], ctx['fcc']
+    raw_title, clean_title = ctx['raw_title'], ctx['clean_title']
+
+    # Resolver frecuencia
+    final_freq, mod = resolve_frequency_and_modulation_prefer_orb(fcc, orb, raw_title, st)
+
+    if mod == "STREAM" or not final_freq:
+        broadcast_freq = "Stream"
+        broadcast_freq_value = "Stream"
+        mod = "STREAM"
+    else:
+        broadcast_freq = f"{final_freq} {mod}" if not str(final_freq).lower().endswith(mod.lower()) else str(final_freq)
+        broadcast_freq_value = final_freq
+
+    # Postal Code
+    postal = None
+    if orb and orb.get('address'):
+        mzip = REGEX_ZIPCODE.search(orb['address'])
+        if mzip: postal = mzip.group(0)
+
+    # Tags & Tipo
+    tags_final = orb.get('tags') if orb and orb.get('tags') else st.get('tags', '')
+    with TIEMPOS.medir("clasificacion"):
+        about_type = classify_about_type(tags_final)
+
+    # Geo
+    geo_lat = fcc.get('lat') if (fcc and fcc.get('lat')) else st.get('geo_lat')
+    geo_long = fcc.get('lon') if (fcc and fcc.get('lon')) else st.get('geo_long')
+
+    # --- MAPEO DEFINITIVO ---
+    return {
+        "orb_url": orb.get('orb_url'),
+        "title": clean_title,
+        "slug": ctx['slug'],
+        "broadcastFrequency": broadcast_freq,
+        "broadcastFrequencyValue": broadcast_freq_value,
+        "broadcastSignalModulation": mod,
+        "slogan": None,
+        "imagen": local_img,
+        "imagenurl": orb.get('logo'),
+        "tags": tags_final,
+        "web": orb.get('web') if orb.get('web') else st.get('homepage'), # Ojo: orb devuelve 'web' en contacts
+        "address": orb.get('address'),
+        "country": ctx['country'],  # NUEVA COLUMNA
+        "state": ctx['state'],      # SEPARADO
+        "city": ctx['city'],        # SEPARADO
+        "postalcode": postal,
+        "geo_lat": geo_lat,
+        "geo_long": geo_long,
+        "geo_distance": None,
+        "telephone": orb.get('phone'),
+        "email": orb.get('email'),
+        "facebook": orb.get('fb'),
+        "instagram": orb.get('insta'),
+        "red_x": orb.get('tw'),
+        "tiktok": orb.get('tiktok'),
+        "playstore": None,
+          "language": orb.get('language') if orb.get('language') else st.get('language', ''),
+        # --- DATOS EXTRA ---
+        "content": orb.get('description'),
+        "about_type": about_type,
+        # --- CONTACTOS Extra---
+        "whatsapp": orb.get('whatsapp'),
+        "youtube": orb.get('yt')
+        
+    }
+
+
+def _log_progreso(i, item):
+    if (i + 1) % 5 == 0:
+        print(f"[{i+1}] Procesado: {item['slug']}")
+
+
+def _checkpoint(almacen, st, ctx, item):
+    """
+    Guarda la fila en el almacén. Si ORB falló por red/HTTP queda como 'error' para
+    reintentar, conservando la fila buena de una corrida anterior si la había.
+    """
+    error = ctx['orb'].get('error')
+    TIEMPOS.contar("estaciones_error_orb" if error else "estaciones_ok")
+    if error:
+        almacen.guardar_fallo(clave_estacion(st), error, item, firma_estacion(st))
+    else:
+        almacen.guardar(clave_estacion(st), STATUS_OK, item, None, firma_estacion(st))
+
+
+def _registrar_error(almacen, st, e):
+    print(f"   [ERROR] Estación '{st.get('name', '')}' falló: {e}")
+    TIEMPOS.contar("estaciones_fallidas")
+    almacen.guardar_fallo(clave_estacion(st), str(e))
+
+
+def finalizar_estacion(i, st, ctx, almacen, etapa_logos, imagenes=True):
+    """
+    Arma la fila y la guarda. Con etapa de logos, el logo se encola y la fila
+    se completa (imagen + checkpoint) cuando termina su render en el pool.
+    Con imagenes=False (--no-images) la fila sale sin logo.
+    """
+    item = construir_item(ctx, None)
+
+    def con_logo(local_img):
+        item["imagen"] = local_img
+        _checkpoint(almacen, st, ctx, item)
+        _log_progreso(i, item)
+
+    orb = ctx['orb']
+    if not imagenes:
+        con_logo(None)
+    elif etapa_logos is None:
+        con_logo(procesar_logo(ctx))
+    elif orb and orb.get('logo'):
+        etapa_logos.enviar(orb['logo'], ctx['slug'], con_logo)
+    else:
+        con_logo(None)
+
+
+# -------------------------------
+# MODO SERIAL
+# -------------------------------
+def procesar_serial(batch, fcc_db, almacen, etapa_logos=None, imagenes=True):
+    for i, st in enumerate(batch):
+        try:
+            ctx = asignar_ubicacion_y_slug(preparar_estacion(st, fcc_db))
+            finalizar_estacion(i, st, ctx, almacen, etapa_logos, imagenes)
+        except Exception as e:
+            _registrar_error(almacen, st, e)
+
+
+# -------------------------------
+# MODO CONCURRENTE (asyncio)
+# -------------------------------
+async def _procesar_concurrente(batch, fcc_db, concurrency, almacen, etapa_logos=None, imagenes=True):
+    """
+    Pipeline asyncio: como mucho `concurrency` etapas en vuelo (red o imagen).
+    El slug se asigna en orden de entrada encadenando cada estación con la
+    anterior, así la salida es idéntica a la del modo serial.
+    La cortesía por host la aplica el token bucket (red.limitador).
+    """
+    import asyncio
+    from concurrent.futures import ThreadPoolExecutor
+    loop = asyncio.get_running_loop()
+    pool = ThreadPoolExecutor(max_workers=concurrency)
+    sem = asyncio.Semaphore(concurrency)
+
+    async def en_pool(fn, *args):
+        async with sem:
+            return await loop.run_in_executor(pool, fn, *args)
+
+    async def estacion(i, st, turno_anterior, mi_turno):
+        ctx, error = None, None
+        try:
+            ctx = await en_pool(preparar_estacion, st, fcc_db)
+        except Exception as e:
+            error = e
+        # Slug en orden estable (no se retiene el semáforo mientras se espera).
+        # El turno se libera siempre, incluso si la estación falló.
+        if turno_anterior is not None:
+            await turno_anterior.wait()
+        try:
+            if ctx is not None:
+                asignar_ubicacion_y_slug(ctx)
+        except Exception as e:
+            error = e
+        finally:
+            mi_turno.set()
+        if error is not None:
+            _registrar_error(almacen, st, error)
+            return
+
+        try:
+            await en_pool(finalizar_estacion, i, st, ctx, almacen, etapa_logos, imagenes)
+        except Exception as e:
+            _registrar_error(almacen, st, e)
+
+    try:
+        tasks, anterior = [], None
+        for i, st in enumerate(batch):
+            turno = asyncio.Event()
+            tasks.append(asyncio.create_task(estacion(i, st, anterior, turno)))
+            anterior = turno
+        await asyncio.gather(*tasks)
+    finally:
+        pool.shutdown(wait=False)
+
+
 # -------------------------------
 # ETL PRINCIPAL (MAIN)
 # -------------------------------
-def main():
-    print("=== ETL RADIO V10 (DATA COMPLETA & UBICACIÓN SEPARADA) ===")
-    crear_carpeta()
+def filtrar_por_estado(stations, estados):
+    """Estaciones de RB cuyo 'state' está en `estados` (nombres o códigos: 'Texas', 'tx', 'CA')."""
+    from vinculacion.vinculacion import codigo_estado
+    buscados = {codigo_estado(e) or e.strip().lower() for e in estados}
+    return [st for st in stations
+            if (codigo_estado(st.get('state')) or (st.get('state') or '').strip().lower()) in buscados]
+
+
+def main(concurrency=CONCURRENCIA, resume=False, incremental=False, logo_workers=LOGOS_WORKERS,
+         catalogo=ORB_CATALOGO_ACTIVO, formatos=EXPORT_FORMATOS, perfil=None, reporte=REPORTE_JSON,
+         imagenes=LOGOS_ACTIVOS):
+    """Corrida completa. `perfil` ('cprofile' | 'pyinstrument') la perfila entera."""
+    TIEMPOS.reiniciar()
+    with perfilado(perfil):
+        ejecutar(concurrency, resume, incremental, logo_workers, catalogo, formatos, reporte, imagenes)
 
-    print("1. Cargando FCC (FM/AM)...")
-    fcc_db = {}
-    fcc_db.update(parse_fcc_visual(URL_FCC_FM, "FM"))
-    fcc_db.update(parse_fcc_visual(URL_FCC_AM, "AM"))
 
+def descargar_estaciones():
+    """Estaciones de Radio-Browser del lote (filtro de estados y LIMITE_PRUEBA aplicados); None si falla."""
     print("2. Descargando Radio-Browser...")
     try:
-        stations = requests.get(URL_RADIO_BROWSER, headers=HEADERS, timeout=15).json()
+        with TIEMPOS.medir("rb_descarga"):
+            stations = cliente.get(URL_RADIO_BROWSER, headers=HEADERS, timeout=15).json()
     except Exception as e:
         print(f"[ERROR] No pude descargar Radio-Browser: {e}")
-        return
+        return None
 
-    batch = stations[:LIMITE_PRUEBA] if LIMITE_PRUEBA else stations
-    final_data = []
+    if FILTRO_ESTADOS:
+        stations = filtrar_por_estado(stations, FILTRO_ESTADOS)
+        print(f"   -> Filtro de estados ({', '.join(FILTRO_ESTADOS)}): {len(stations)} estaciones")
+    return stations[:LIMITE_PRUEBA] if LIMITE_PRUEBA else stations
 
-    print(f"3. Procesando {len(batch)} registros...")
 
-    for i, st in enumerate(batch):
-        raw_title = st.get('name', '').strip()
+def seleccionar_pendientes(batch, almacen, resume, incremental):
+    """
+    (pendientes, hechos). En --resume se saltan las completas y se reintentan las fallidas;
+    en --incremental solo se reprocesan nuevas, cambiadas (firma RB) o vencidas.
+    """
+    if not (resume or incremental):
+        return batch, {}
+    if incremental:
+        hechos = almacen.vigentes(batch, DELTA_MAX_EDAD_DIAS * 86400)
+    else:
+        hechos = almacen.completados()
+    # Almacenes previos al registro de slugs: sus slugs quedan ligados a la estación
+    for clave, item in hechos.items():
+        reservar_slug(item.get('slug'), clave)
+    pendientes = [st for st in batch if clave_estacion(st) not in hechos]
+    modo = "Incremental" if incremental else "Resume"
+    print(f"   -> {modo}: {len(batch) - len(pendientes)} sin cambios, {len(pendientes)} a procesar")
+    return pendientes, hechos
+
+
+def procesar_lote(pendientes, fcc_db, almacen, concurrency, catalogo, imagenes, etapa_logos=None):
+    """
+    Vínculo FCC, catálogo ORB (opcional) y pipeline por estación. Cada estación
+    termina en almacen.guardar (con etapa de logos, al terminar su render).
+    """
+    from vinculacion.vinculacion import vincular_con_fcc
 
-        # 1. LIMPIAR TÍTULO PRIMERO (Mejor búsqueda)
-        clean_title, extracted_freq = clean_title_extract_freq(raw_title, None)
+    # Vínculo RB -> FCC de todo el lote en una pasada vectorizada
+    with TIEMPOS.medir("fcc_vinculo"):
+        fcc_db.fijar_vinculos(vincular_con_fcc(pendientes, fcc_db, clave_estacion))
 
-        # CALLSIGN
-        call_match = REGEX_CALLSIGN.search(raw_title)
-        callsign = call_match.group(1).upper() if call_match else None
-        fcc = fcc_db.get(callsign)
-        
-        # 2. SCRAPING ORB (Usando título limpio)
-        orb = scrape_orb_v10(clean_title) 
-        
-        # Fallback con callsign
-        if not orb.get('orb_url') and callsign:
-             print(f"   -> Reintentando con Callsign: {callsign}")
-             orb = scrape_orb_v10(callsign)
-
-        # Debug
-        if orb.get('email'):
-             print(f"   [INFO] Contacto encontrado: {orb.get('email')}")
-
-        # Resolver frecuencia
-        final_freq, mod = resolve_frequency_and_modulation_prefer_orb(fcc, orb, raw_title, st)
-
-        if mod == "STREAM" or not final_freq:
-            broadcast_freq = "Stream"
-            broadcast_freq_value = "Stream"
-            mod = "STREAM"
-        else:
-            broadcast_freq = f"{final_freq} {mod}" if not str(final_freq).lower().endswith(mod.lower()) else str(final_freq)
-            broadcast_freq_value = final_freq
-
-        # --- AQUI ESTÁ EL CAMBIO DE UBICACIÓN ---
-        # Priorizamos los campos separados que ahora devuelve tu nuevo orb.py
-        
-        country = orb.get('country')
-        state = orb.get('state')
-        city = orb.get('city')
-
-        # Fallback a Radio-Browser si ORB no trajo nada
-        if not country: country = st.get('country', '')
-        if not state: state = st.get('state', '')
-        # Si la ciudad viene vacía de ORB, a veces RB la tiene
-        if not city: city = st.get('state', '') # RB a veces pone ciudad en state, cuidado aqui.
-
-        # Postal Code
-        postal = None
-        if orb and orb.get('address'):
-            mzip = REGEX_ZIPCODE.search(orb['address'])
-            if mzip: postal = mzip.group(0)
-
-        # Slug & Imagen
-        slug_base = city if city else (state if state else "station")
-        slug = generate_unique_slug(clean_title, slug_base)
-
-        local_img = None
-        if orb and orb.get('logo'):
-            try:
-                local_img = download_and_process(orb['logo'], slug, CARPETA_LOGOS)
-            except Exception as e:
-                local_img = None
-
-        # Tags & Tipo
-        tags_final = orb.get('tags') if orb and orb.get('tags') else st.get('tags', '')
-        about_type = classify_about_type(tags_final)
+    if catalogo:
+        with TIEMPOS.medir("catalogo_orb"):
+            sembrar_desde_catalogo(pendientes)
 
-        # Geo
-        geo_lat = fcc.get('lat') if (fcc and fcc.get('lat')) else st.get('geo_lat')
-        geo_long = fcc.get('lon') if (fcc and fcc.get('lon')) else st.get('geo_long')
-
-        # --- MAPEO DEFINITIVO ---
-        item = {
-            "orb_url": orb.get('orb_url'),
-            "title": clean_title,
-            "slug": slug,
-            "broadcastFrequency": broadcast_freq,
-            "broadcastFrequencyValue": broadcast_freq_value,
-            "broadcastSignalModulation": mod,
-            "slogan": None,
-            "imagen": local_img,
-            "imagenurl": orb.get('logo'),
-            "tags": tags_final,
-            "web": orb.get('web') if orb.get('web') else st.get('homepage'), # Ojo: orb devuelve 'web' en contacts
-            "address": orb.get('address'),
-            "country": country,  # NUEVA COLUMNA
-            "state": state,      # SEPARADO
-            "city": city,        # SEPARADO
-            "postalcode": postal,
-            "geo_lat": geo_lat,
-            "geo_long": geo_long,
-            "geo_distance": None,
-            "telephone": orb.get('phone'),
-            "email": orb.get('email'),
-            "facebook": orb.get('fb'),
-            "instagram": orb.get('insta'),
-            "red_x": orb.get('tw'),
-            "tiktok": orb.get('tiktok'),
-            "playstore": None,
-              "language": orb.get('language') if orb.get('language') else st.get('language', ''),
-            # --- DATOS EXTRA ---
-            "content": orb.get('description'),
-            "about_type": about_type,
-            # --- CONTACTOS Extra---
-            "whatsapp": orb.get('whatsapp'),
-            "youtube": orb.get('yt')
-            
-        }
-
-        final_data.append(item)
-
-        if (i + 1) % 5 == 0:
-            print(f"[{i+1}] Procesado: {slug}")
-
-    print("4. Guardando DATA_FINAL_RADIOS_USA.xlsx ...")
-    df = pd.DataFrame(final_data)
-
-    # COLUMNAS ACTUALIZADAS (Agregado 'country' y reordenado location)
-    cols = [
-       "orb_url",
-        "title", 
-        "slug", 
-        "broadcastFrequency", 
-        "broadcastFrequencyValue", 
-        "broadcastSignalModulation",
-        "slogan", 
-        "imagen", 
-        "imagenurl", 
-        "tags",  
-        "web",
-        "address",
-        "country",
-        "state",
-        "city", 
-        "postalcode",
-        "geo_lat", 
-        "geo_long", 
-        "geo_distance", 
-        "telephone",
-        "email", 
-        "facebook",
-        "instagram", 
-        "red_x", 
-        "tiktok",
-        "youtube", 
-        "playstore", 
-        "language",
-        "content", 
-        "about_type", 
-    ]
-
-    # Rellenar columnas faltantes
-    for c in cols:
-        if c not in df.columns:
-            df[c] = None
-            
-    # Reordenar y exportar
-    df = df[cols]
-    df.to_excel("DATA_FINAL_RADIOS_USA.xlsx", index=False)
-    print("¡MISIÓN CUMPLIDA! Datos exportados con columnas de ubicación separadas.")
+    if concurrency and concurrency > 1:
+        print(f"   -> Modo concurrente: {concurrency} estaciones en vuelo")
+        import asyncio
+        asyncio.run(_procesar_concurrente(pendientes, fcc_db, concurrency, almacen, etapa_logos, imagenes))
+    else:
+        procesar_serial(pendientes, fcc_db, almacen, etapa_logos, imagenes)
 
 
-if __name__ == "__main__":
-    main()
\ No newline at end of file
+def etapa_de_logos(logo_workers, imagenes):
+    """Etapa de logos en process pool (logo_workers=0 -> render en línea; sin imágenes -> ninguna)."""
+    if not imagenes or logo_workers == 0:
+        return None
+    from gestionDeImagenes.etapaLogos import EtapaLogos
+    return EtapaLogos(CARPETA_LOGOS, workers=logo_workers)
+
+
+def cerrar_etapa_de_logos(etapa_logos):
+    """Espera los renders pendientes; devuelve las stats de logos (None sin etapa)."""
+    if etapa_logos is None:
+        return None
+    print("   -> Esperando renders de logos pendientes...")
+    etapa_logos.cerrar()
+    print("   " + etapa_logos.resumen())
+    return dict(etapa_logos.stats)
+
+
+def ejecutar(concurrency, resume, incremental, logo_workers, catalogo, formatos, reporte, imagenes=True):
+    from scrapers.indiceFcc import cargar_indice_fcc
+    from scrapers.resolucionOrb import RESOLUCION
+
+    print("=== ETL RADIO V10 (DATA COMPLETA & UBICACIÓN SEPARADA) ===")
+    crear_carpeta()
+
+    print("1. Cargando FCC (FM/AM)...")
+    with TIEMPOS.medir("fcc_carga"):
+        fcc_db = cargar_indice_fcc()
+
+    batch = descargar_estaciones()
+    if batch is None:
+        return
+
+    # Checkpoint por estación (ver seleccionar_pendientes)
+    almacen = AlmacenEstado()
+    pendientes, hechos = seleccionar_pendientes(batch, almacen, resume, incremental)
+
+    # Export en streaming: cada fila se escribe al hacer checkpoint, en el orden de Radio-Browser.
+    # Las estaciones ya completas (--resume/--incremental) entran directo desde el almacén.
+    archivos = ", ".join(f"{EXPORT_NOMBRE}.{f}" for f in formatos)
+    exportacion = ExportacionOrdenada(abrir_escritores(formatos), [clave_estacion(st) for st in batch])
+    for clave, item in hechos.items():
+        exportacion.listo(clave, item)
+    almacen.al_guardar = exportacion.listo
+
+    print(f"3. Procesando {len(pendientes)} registros (export en {archivos})...")
+
+    etapa_logos = etapa_de_logos(logo_workers, imagenes)
+    try:
+        procesar_lote(pendientes, fcc_db, almacen, concurrency, catalogo, imagenes, etapa_logos)
+    finally:
+        logos = cerrar_etapa_de_logos(etapa_logos)
+        RESOLUCION.cerrar()
+        REGISTRO_SLUGS.cerrar()
+        # Se cierra aunque la corrida se corte: lo exportado hasta ahí queda en disco.
+        # Una estación que nunca avisó sale con lo último guardado en el almacén
+        almacen.al_guardar = None
+        escritas = exportacion.cerrar(almacen.items)
+
+    conteo = almacen.conteo()
+    print(f"   -> Estado: {conteo.get(STATUS_OK, 0)} OK, {conteo.get(STATUS_ERROR, 0)} con error (reintentables con --resume)")
+    almacen.cerrar()
+
+    print(f"4. Export: {escritas} filas en {archivos}")
+    print(CACHE.resumen())
+    print(RESOLUCION.resumen())
+    print(cliente.METRICAS.resumen())
+    print(TIEMPOS.resumen())
+    if reporte:
+        TIEMPOS.guardar_reporte(reporte, {
+            "parametros": {"concurrency": concurrency, "resume": resume, "incremental": incremental,
+                           "logo_workers": logo_workers, "catalogo": catalogo, "formatos": formatos,
+                           "imagenes": imagenes},
+            "estaciones": {"lote": len(batch), "procesadas": len(pendientes), "estado": conteo},
+            "export": {"filas": escritas, "archivos": archivos},
+            "http": cliente.METRICAS.reporte(),
+            "cache_http": dict(CACHE.stats),
+            "resolucion_orb": dict(RESOLUCION.stats),
+            "logos": logos,
+        })
+        print(f"   -> Reporte de la corrida en {reporte}")
+    print("¡MISIÓN CUMPLIDA! Datos exportados con columnas de ubicación separadas.")
+
@@ -0,0 +1,348 @@
+import math
+import re
+
+import numpy as np
+
+from config import (
+    VINCULACION_UMBRAL, VINCULACION_MARGEN, VINCULACION_PESOS,
+    VINCULACION_EVIDENCIA_MIN, VINCULACION_GEO_ESCALA_KM, VINCULACION_TOKEN_MAX_FRECUENCIA,
+    VINCULACION_UMBRAL_BUSQUEDA
+)
+from limpiezaTitulo.limpiezaTitulo import normalizar_titulo
+from scrapers.indiceFcc import base_callsign, _haversine_km
+
+# ================= VINCULACIÓN DE REGISTROS (RB / FCC / ORB) =================
+# Empareja dos conjuntos de registros sin recorrer n·m pares en Python:
+#   1. Bloqueo: pares candidatos que comparten callsign base, (frecuencia, estado),
+#      frecuencia (si alguno no tiene estado) o un token poco frecuente del título.
+#      Claves enteras + searchsorted, todo vectorizado.
+#   2. Puntaje por par (vectorizado): callsign, frecuencia, similitud de tokens
+#      del título limpio, distancia geográfica y estado. Cada rasgo pesa solo si
+#      ambos registros lo tienen.
+#   3. Mejor candidato por registro si supera el umbral y no hay empate.
+# Los registros son columnas NumPy (ver `registros`).
+
+TOKEN = re.compile(r'[a-z0-9]+')
+TOKENS_VACIOS = frozenset(('fm', 'am', 'mhz', 'khz', 'radio', 'the', 'station', 'la', 'el', 'de', 'hd'))
+
+ESTADOS_US = {
+    'alabama': 'AL', 'alaska': 'AK', 'arizona': 'AZ', 'arkansas': 'AR', 'california': 'CA',
+    'colorado': 'CO', 'connecticut': 'CT', 'delaware': 'DE', 'district of columbia': 'DC',
+    'florida': 'FL', 'georgia': 'GA', 'hawaii': 'HI', 'idaho': 'ID', 'illinois': 'IL',
+    'indiana': 'IN', 'iowa': 'IA', 'kansas': 'KS', 'kentucky': 'KY', 'louisiana': 'LA',
+    'maine': 'ME', 'maryland': 'MD', 'massachusetts': 'MA', 'michigan': 'MI', 'minnesota': 'MN',
+    'mississippi': 'MS', 'missouri': 'MO', 'montana': 'MT', 'nebraska': 'NE', 'nevada': 'NV',
+    'new hampshire': 'NH', 'new jersey': 'NJ', 'new mexico': 'NM', 'new york': 'NY',
+    'north carolina': 'NC', 'north dakota': 'ND', 'ohio': 'OH', 'oklahoma': 'OK', 'oregon': 'OR',
+    'pennsylvania': 'PA', 'rhode island': 'RI', 'south carolina': 'SC', 'south dakota': 'SD',
+    'tennessee': 'TN', 'texas': 'TX', 'utah': 'UT', 'vermont': 'VT', 'virginia': 'VA',
+    'washington': 'WA', 'west virginia': 'WV', 'wisconsin': 'WI', 'wyoming': 'WY',
+    'puerto rico': 'PR', 'guam': 'GU', 'virgin islands': 'VI',
+}
+_CODIGOS_ESTADO = set(ESTADOS_US.values())
+
+
+# ================= NORMALIZACIÓN =================
+
+def codigo_estado(estado):
+    """'Texas' / 'tx' / 'TX ' -> 'TX'; desconocido -> ''."""
+    e = (estado or '').strip()
+    if e.upper() in _CODIGOS_ESTADO: return e.upper()
+    return ESTADOS_US.get(e.lower(), '')
+
+
+def tokens_titulo(titulo):
+    """Tokens significativos del título (sin 'fm', 'radio', ...)."""
+    return sorted({t for t in TOKEN.findall((titulo or '').lower())
+                   if len(t) > 1 and t not in TOKENS_VACIOS})
+
+
+def _float(v):
+    try:
+        f = float(str(v).split()[0])
+        return f if not math.isnan(f) else None
+    except (ValueError, IndexError, TypeError):
+        return None
+
+
+def fila_radio_browser(st):
+    """Registro normalizado de una estación de Radio-Browser."""
+    t = normalizar_titulo((st.get('name') or '').strip())
+    return {
+        'titulo': t.titulo,
+        'callsign': t.callsign,
+        'freq': t.freq,
+        'state': st.get('state'),
+        'lat': st.get('geo_lat'),
+        'lon': st.get('geo_long'),
+    }
+
+
+def fila_orb(entrada):
+    """Registro normalizado de una entrada de ORB (catálogo o resultado de búsqueda)."""
+    t = normalizar_titulo(entrada.get('nombre') or '')
+    return {
+        'titulo': t.titulo,
+        'callsign': entrada.get('callsign') or t.callsign,
+        'freq': _float(entrada.get('freq')) or t.freq,
+        'state': entrada.get('state'),
+    }
+
+
+def registros(filas):
+    """
+    Columnas de vinculación desde dicts con titulo, callsign, freq, state, lat, lon
+    (cualquiera puede faltar). Los tokens van en formato CSR (tok_ptr / tok).
+    """
+    n = len(filas)
+    callsign, state = [], []
+    freq, lat, lon = np.full(n, np.nan), np.full(n, np.nan), np.full(n, np.nan)
+    tok, tok_ptr = [], [0]
+    for i, f in enumerate(filas):
+        callsign.append(base_callsign(f.get('callsign')) if f.get('callsign') else '')
+        state.append(codigo_estado(f.get('state')))
+        for col, k in ((freq, 'freq'), (lat, 'lat'), (lon, 'lon')):
+            v = _float(f.get(k))
+            if v is not None: col[i] = v
+        tok.extend(tokens_titulo(f.get('titulo')))
+        tok_ptr.append(len(tok))
+    return {
+        'n': n,
+        'callsign': np.array(callsign, dtype='<U12'),
+        'freq': freq, 'state': np.array(state, dtype='<U2'),
+        'lat': lat, 'lon': lon,
+        'tok': np.array(tok, dtype=object), 'tok_ptr': np.array(tok_ptr, dtype=np.int64),
+    }
+
+
+def registros_fcc(indice):
+    """Registros desde las columnas del índice FCC (sin título: la FCC no trae nombre)."""
+    c = indice.cols
+    n = indice.n
+    return {
+        'n': n,
+        'callsign': np.asarray(c['base']),
+        'freq': np.asarray(c['freq'], dtype=np.float64),
+        'state': np.asarray(c['state']),
+        'lat': np.asarray(c['lat']), 'lon': np.asarray(c['lon']),
+        'tok': np.array([], dtype=object), 'tok_ptr': np.zeros(n + 1, dtype=np.int64),
+    }
+
+
+# ================= BLOQUEO =================
+
+def _codigos(a, b, vacio=''):
+    """Códigos enteros comunes para dos columnas de texto (-1 = vacío)."""
+    valores, inv = np.unique(np.concatenate([a, b]), return_inverse=True)
+    inv = inv.astype(np.int64)
+    vacios = np.nonzero(valores == vacio)[0]
+    if len(vacios):
+        inv[inv == vacios[0]] = -1
+    return inv[:len(a)], inv[len(a):]
+
+
+def _clave_freq(freq):
+    """Frecuencia a décimas (FM 88.1 -> 881, AM 1070 -> 10700); -1 si falta."""
+    k = np.full(len(freq), -1, dtype=np.int64)
+    ok = ~np.isnan(freq)
+    k[ok] = np.round(freq[ok] * 10).astype(np.int64)
+    return k
+
+
+def _pares_por_clave(kizq, kder):
+    """Todos los pares (i, j) con kizq[i] == kder[j] != -1, sin bucles en Python."""
+    orden = np.argsort(kder, kind='stable')
+    ordenadas = kder[orden]
+    lo = np.searchsorted(ordenadas, kizq, side='left')
+    hi = np.searchsorted(ordenadas, kizq, side='right')
+    cuenta = np.where(kizq >= 0, hi - lo, 0)
+    total = int(cuenta.sum())
+    if not total:
+        return np.empty(0, np.int64), np.empty(0, np.int64)
+    izq = np.repeat(np.arange(len(kizq)), cuenta)
+    inicio = np.repeat(np.cumsum(cuenta) - cuenta, cuenta)
+    der = orden[np.repeat(lo, cuenta) + (np.arange(total) - inicio)]
+    return izq, der
+
+
+def _codigos_tokens(a, b):
+    """Tokens de ambos lados como enteros de un vocabulario común, y su tamaño."""
+    if not len(a['tok']) and not len(b['tok']):
+        return np.empty(0, np.int64), np.empty(0, np.int64), 0
+    _, inv = np.unique(np.concatenate([a['tok'], b['tok']]).astype(str), return_inverse=True)
+    inv = inv.astype(np.int64)
+    return inv[:len(a['tok'])], inv[len(a['tok']):], int(inv.max()) + 1
+
+
+def _pares_por_tokens(a, b, max_frecuencia=VINCULACION_TOKEN_MAX_FRECUENCIA):
+    """Pares que comparten algún token poco frecuente en `b` (los comunes no sirven para bloquear)."""
+    tok_a, tok_b, vocab = _codigos_tokens(a, b)
+    if not len(tok_a) or not len(tok_b):
+        return np.empty(0, np.int64), np.empty(0, np.int64)
+    reg_a = np.repeat(np.arange(a['n']), np.diff(a['tok_ptr']))
+    reg_b = np.repeat(np.arange(b['n']), np.diff(b['tok_ptr']))
+    frecuencia = np.bincount(tok_b, minlength=vocab)
+    util = frecuencia[tok_b] <= max_frecuencia
+    i, j = _pares_por_clave(tok_a, np.where(util, tok_b, -1))
+    return reg_a[i], reg_b[j]
+
+
+def pares_candidatos(a, b):
+    """
+    Unión de bloques: callsign, (frecuencia, estado), frecuencia sola cuando
+    alguno no tiene estado, y tokens del título poco frecuentes.
+    """
+    ca, cb = _codigos(a['callsign'], b['callsign'])
+    ea, eb = _codigos(a['state'], b['state'])
+    fa, fb = _clave_freq(a['freq']), _clave_freq(b['freq'])
+
+    bloques = [_pares_por_clave(ca, cb)]
+    con_estado_a = (fa >= 0) & (ea >= 0)
+    con_estado_b = (fb >= 0) & (eb >= 0)
+    n_estados = int(max(ea.max(initial=0), eb.max(initial=0))) + 1
+    bloques.append(_pares_por_clave(np.where(con_estado_a, fa * n_estados + ea, -1),
+                                    np.where(con_estado_b, fb * n_estados + eb, -1)))
+    bloques.append(_pares_por_clave(np.where(ea < 0, fa, -1), fb))
+    bloques.append(_pares_por_clave(fa, np.where(eb < 0, fb, -1)))
+    bloques.append(_pares_por_tokens(a, b))
+
+    izq = np.concatenate([p[0] for p in bloques])
+    der = np.concatenate([p[1] for p in bloques])
+    unicos = np.unique(izq * b['n'] + der)
+    return unicos // b['n'], unicos % b['n']
+
+
+# ================= PUNTAJE =================
+
+def _similitud_tokens(a, b, izq, der):
+    """
+    Similitud de conjuntos de tokens por par: |A ∩ B| / min(|A|, |B|) (0 si alguno está vacío).
+    Cada token de A se busca en B con una clave (registro, token) ordenada: sin bucles por par.
+    """
+    la = np.diff(a['tok_ptr'])[izq]
+    lb = np.diff(b['tok_ptr'])[der]
+    disponible = (la > 0) & (lb > 0)
+    sim = np.zeros(len(izq))
+    if not disponible.any():
+        return sim, disponible
+
+    tok_a, tok_b, vocab = _codigos_tokens(a, b)
+
+    # Claves (registro de B, token) ordenadas
+    reg_b = np.repeat(np.arange(b['n']), np.diff(b['tok_ptr']))
+    claves_b = np.sort(reg_b.astype(np.int64) * vocab + tok_b)
+
+    # Expandir los tokens de A de cada par y buscarlos en el registro de B del par
+    par = np.repeat(np.arange(len(izq)), la)
+    inicio = np.repeat(a['tok_ptr'][izq], la)
+    desplaz = np.arange(len(par)) - np.repeat(np.cumsum(la) - la, la)
+    buscadas = der[par].astype(np.int64) * vocab + tok_a[inicio + desplaz]
+    pos = np.searchsorted(claves_b, buscadas)
+    pos = np.minimum(pos, len(claves_b) - 1)
+    encontrados = claves_b[pos] == buscadas
+    comunes = np.bincount(par, weights=encontrados, minlength=len(izq))
+
+    sim[disponible] = comunes[disponible] / np.minimum(la, lb)[disponible]
+    return sim, disponible
+
+
+def puntajes(a, b, izq, der, pesos=VINCULACION_PESOS, evidencia_min=VINCULACION_EVIDENCIA_MIN):
+    """Puntaje 0..1 de cada par (izq[k], der[k])."""
+    rasgos = []
+
+    ca, cb = a['callsign'][izq], b['callsign'][der]
+    rasgos.append(('callsign', (ca == cb).astype(float), (ca != '') & (cb != '')))
+
+    fa, fb = a['freq'][izq], b['freq'][der]
+    disponible = ~(np.isnan(fa) | np.isnan(fb))
+    rasgos.append(('freq', (np.abs(fa - fb) <= 0.05).astype(float), disponible))
+
+    rasgos.append(('titulo',) + _similitud_tokens(a, b, izq, der))
+
+    lat1, lon1, lat2, lon2 = a['lat'][izq], a['lon'][izq], b['lat'][der], b['lon'][der]
+    disponible = ~(np.isnan(lat1) | np.isnan(lon1) | np.isnan(lat2) | np.isnan(lon2))
+    geo = np.zeros(len(izq))
+    if disponible.any():
+        km = _haversine_km(lat1[disponible], lon1[disponible], lat2[disponible], lon2[disponible])
+        geo[disponible] = np.exp(-km / VINCULACION_GEO_ESCALA_KM)
+    rasgos.append(('geo', geo, disponible))
+
+    ea, eb = a['state'][izq], b['state'][der]
+    rasgos.append(('estado', (ea == eb).astype(float), (ea != '') & (eb != '')))
+
+    suma, evidencia = np.zeros(len(izq)), np.zeros(len(izq))
+    for nombre, valor, disponible in rasgos:
+        suma += pesos[nombre] * valor * disponible
+        evidencia += pesos[nombre] * disponible
+    # Poca evidencia (p. ej. solo frecuencia) no alcanza para un puntaje alto.
+    # Sin ningún rasgo comparable (solo con evidencia_min=0) no hay nada en contra: 1.0
+    piso = np.maximum(evidencia, evidencia_min)
+    return np.divide(suma, piso, out=np.ones(len(izq)), where=piso > 0)
+
+
+# ================= VINCULACIÓN =================
+
+def vincular(a, b, umbral=VINCULACION_UMBRAL, margen=VINCULACION_MARGEN, pares=None,
+             evidencia_min=VINCULACION_EVIDENCIA_MIN):
+    """
+    Para cada registro de `a`, el índice del mejor registro de `b` (o -1) y su puntaje.
+    Se descarta si no supera `umbral` o si el segundo mejor está a menos de `margen` (empate).
+    A igual puntaje gana el menor índice de `b`. `pares` reemplaza el bloqueo (izq, der).
+    """
+    mejor = np.full(a['n'], -1, dtype=np.int64)
+    puntaje = np.zeros(a['n'])
+    if not a['n'] or not b['n']:
+        return mejor, puntaje
+
+    izq, der = pares if pares is not None else pares_candidatos(a, b)
+    if not len(izq):
+        return mejor, puntaje
+    s = puntajes(a, b, izq, der, evidencia_min=evidencia_min)
+
+    orden = np.lexsort((der, -s, izq))  # por registro: mayor puntaje primero (desempate estable)
+    izq, der, s = izq[orden], der[orden], s[orden]
+    primeros = np.nonzero(np.r_[True, izq[1:] != izq[:-1]])[0]
+    segundo = np.full(len(primeros), -np.inf)
+    tiene_segundo = (primeros + 1 < len(izq))
+    tiene_segundo[tiene_segundo] &= izq[primeros[tiene_segundo] + 1] == izq[primeros[tiene_segundo]]
+    segundo[tiene_segundo] = s[primeros[tiene_segundo] + 1]
+
+    ok = (s[primeros] >= umbral) & (s[primeros] - segundo >= margen)
+    mejor[izq[primeros[ok]]] = der[primeros[ok]]
+    puntaje[izq[primeros]] = s[primeros]
+    return mejor, puntaje
+
+
+def elegir_candidato(referencia, candidatos, umbral=VINCULACION_UMBRAL_BUSQUEDA):
+    """
+    Índice del candidato (dicts de ORB: nombre, freq, callsign) que mejor corresponde
+    a `referencia` (dict con titulo/callsign/freq), o None. Son pocos: se puntúan
+    todos (sin bloqueo) y a igual puntaje gana el primero (orden de ORB).
+    La búsqueda de ORB ya filtró por nombre: sin piso de evidencia, un candidato
+    solo se descarta si los rasgos comparables no coinciden.
+    """
+    if not candidatos:
+        return None
+    n = len(candidatos)
+    pares = (np.zeros(n, dtype=np.int64), np.arange(n, dtype=np.int64))
+    mejor, _ = vincular(registros([referencia]), registros([fila_orb(c) for c in candidatos]),
+                        umbral, margen=0.0, pares=pares, evidencia_min=0.0)
+    return int(mejor[0]) if mejor[0] >= 0 else None
+
+
+def vincular_con_fcc(batch, indice, clave):
+    """dict clave(estación) -> índice FCC para las estaciones de `batch` con vínculo."""
+    if not batch or not len(indice):
+        return {}
+    mejor, _ = vincular(registros([fila_radio_browser(st) for st in batch]), registros_fcc(indice))
+    return {clave(st): int(j) for st, j in zip(batch, mejor) if j >= 0}
+
+
+def vincular_con_orb(batch, entradas, clave):
+    """dict clave(estación) -> (orb_url, puntaje) contra entradas del catálogo ORB."""
+    if not batch or not entradas:
+        return {}
+    mejor, puntaje = vincular(registros([fila_radio_browser(st) for st in batch]),
+                              registros([fila_orb(e) for e in entradas]))
+    return {clave(st): (entradas[j]['orb_url'], round(float(p), 2))
+            for st, j, p in zip(batch, mejor, puntaje) if j >= 0}